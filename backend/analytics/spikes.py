@@ -0,0 +1,200 @@
+
+import math
+import os
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from ingestion.ids import new_ulid
+
+Key = Tuple[str, str]
+Alert = Dict[str, Any]
+
+
+class RateState:
+    """EWMA mean and variance of one key's negative posts per bucket, plus the bucket being filled"""
+
+    __slots__ = ("mean", "var", "bucket", "count", "buckets_seen", "alerted_bucket")
+
+    def __init__(self, bucket: int):
+        self.mean = 0.0
+        self.var = 0.0
+        self.bucket = bucket
+        self.count = 0
+        self.buckets_seen = 0
+        self.alerted_bucket: Optional[int] = None
+
+    def advance(self, bucket: int, alpha: float):
+        """Fold the finished bucket, and any empty ones after it, into the averages"""
+        if bucket <= self.bucket:
+            return
+        self._fold(self.count, alpha)
+        # Each empty bucket decays the mean by (1 - alpha); beyond a few
+        # hundred the state is indistinguishable from a fresh one
+        for _ in range(min(bucket - self.bucket - 1, 500)):
+            self._fold(0, alpha)
+        self.bucket = bucket
+        self.count = 0
+
+    def _fold(self, value: int, alpha: float):
+        diff = value - self.mean
+        increment = alpha * diff
+        self.mean += increment
+        self.var = (1 - alpha) * (self.var + diff * increment)
+        self.buckets_seen += 1
+
+    def zscore(self) -> float:
+        # Counts are roughly Poisson, so the spread is at least sqrt(mean), and
+        # at least 1 so a quiet key's first few complaints don't look extreme
+        return (self.count - self.mean) / math.sqrt(max(self.var, self.mean, 1.0))
+
+
+class SpikeDetector:
+    """
+    Online spike detection on the rate of negative posts per location x category.
+
+    Time is cut into buckets of `bucket_seconds`. Each key keeps an EWMA of
+    its negative posts per bucket and of their variance; every negative post
+    increments the current bucket and is checked straight away, so a spike is
+    reported in the ingestion batch that completes it rather than when the
+    bucket closes. A key alerts at most once per bucket, when the bucket holds
+    at least `min_count` negative posts and is `threshold` standard deviations
+    above its average, and only once `min_buckets` buckets have passed since
+    it was first seen, so a key's first complaints are not compared to
+    nothing. State is a handful of numbers per key, least recently active
+    keys are dropped beyond `max_keys`, and nothing is read back from the
+    database.
+    """
+
+    def __init__(
+        self,
+        bucket_seconds: float = 300.0,
+        alpha: float = 0.1,
+        threshold: float = 3.0,
+        min_count: int = 5,
+        min_buckets: int = 3,
+        max_keys: int = 10000,
+        keep_alerts: int = 50,
+        on_alert: Optional[Callable[[Alert], None]] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.bucket_seconds = bucket_seconds
+        self.alpha = min(1.0, max(0.001, alpha))
+        self.threshold = threshold
+        self.min_count = max(1, min_count)
+        self.min_buckets = min_buckets
+        self.max_keys = max_keys
+        self.on_alert = on_alert
+        self.clock = clock
+        self.keys: "OrderedDict[Key, RateState]" = OrderedDict()
+        self.alerts: Deque[Alert] = deque(maxlen=keep_alerts)
+        self._counters = {"posts": 0, "negative_posts": 0, "late_posts": 0, "alerts": 0, "evicted_keys": 0}
+
+    @classmethod
+    def from_env(cls, on_alert: Optional[Callable[[Alert], None]] = None) -> "SpikeDetector":
+        """SPIKE_BUCKET_SECONDS, SPIKE_EWMA_ALPHA, SPIKE_Z_THRESHOLD, SPIKE_MIN_COUNT and SPIKE_MAX_KEYS"""
+        return cls(
+            bucket_seconds=float(os.getenv("SPIKE_BUCKET_SECONDS", "300")),
+            alpha=float(os.getenv("SPIKE_EWMA_ALPHA", "0.1")),
+            threshold=float(os.getenv("SPIKE_Z_THRESHOLD", "3")),
+            min_count=int(os.getenv("SPIKE_MIN_COUNT", "5")),
+            max_keys=int(os.getenv("SPIKE_MAX_KEYS", "10000")),
+            on_alert=on_alert,
+        )
+
+    @property
+    def warmup_seconds(self) -> float:
+        """History needed for the averages to settle: about three EWMA time constants"""
+        return self.bucket_seconds * math.ceil(3 / self.alpha)
+
+    def _post_time(self, post: Mapping[str, Any], now: float) -> float:
+        try:
+            return min(now, datetime.fromisoformat(str(post.get("timestamp"))).timestamp())
+        except ValueError:
+            return now
+
+    def load(self, posts: Iterable[Mapping[str, Any]]):
+        """Warm the averages up from stored posts, oldest first; alerts found are kept but not pushed"""
+        self.keys.clear()
+        self.alerts.clear()
+        on_alert, self.on_alert = self.on_alert, None
+        try:
+            self.add_posts(sorted(posts, key=lambda post: str(post.get("timestamp"))))
+        finally:
+            self.on_alert = on_alert
+
+    def add_posts(self, posts: Iterable[Mapping[str, Any]]) -> List[Alert]:
+        """Count a batch of newly stored posts; returns the alerts it raised"""
+        now = self.clock()
+        raised = []
+        for post in posts:
+            self._counters["posts"] += 1
+            if post.get("sentiment") != "negative":
+                continue
+            self._counters["negative_posts"] += 1
+            alert = self._observe(post, now)
+            if alert is not None:
+                raised.append(alert)
+        return raised
+
+    def _observe(self, post: Mapping[str, Any], now: float) -> Optional[Alert]:
+        at = self._post_time(post, now)
+        bucket = int(at // self.bucket_seconds)
+        key = (post.get("location") or "Tamil Nadu", post.get("category") or "uncategorized")
+        state = self.keys.get(key)
+        if state is None:
+            state = self.keys[key] = RateState(bucket)
+            if len(self.keys) > self.max_keys:
+                self.keys.popitem(last=False)
+                self._counters["evicted_keys"] += 1
+        else:
+            self.keys.move_to_end(key)
+            if bucket < state.bucket:
+                # Arrived after its bucket was folded in; too late to matter
+                self._counters["late_posts"] += 1
+                return None
+            state.advance(bucket, self.alpha)
+
+        state.count += 1
+        if state.count < self.min_count or state.buckets_seen < self.min_buckets or state.alerted_bucket == bucket:
+            return None
+        zscore = state.zscore()
+        if zscore < self.threshold:
+            return None
+        state.alerted_bucket = bucket
+        return self._alert(key, state, zscore, bucket)
+
+    def _alert(self, key: Key, state: RateState, zscore: float, bucket: int) -> Alert:
+        location, category = key
+        alert = {
+            "id": f"spike-{new_ulid()}",
+            "location": location,
+            "category": category,
+            "count": state.count,
+            "expected": round(state.mean, 2),
+            "zscore": round(zscore, 1),
+            "bucket_start": datetime.fromtimestamp(bucket * self.bucket_seconds).isoformat(),
+            "bucket_seconds": self.bucket_seconds,
+            "detected_at": datetime.fromtimestamp(self.clock()).isoformat(),
+        }
+        self.alerts.appendleft(alert)
+        self._counters["alerts"] += 1
+        if self.on_alert is not None:
+            self.on_alert(alert)
+        return alert
+
+    def recent_alerts(self, max_age_seconds: float) -> List[Alert]:
+        """Alerts whose bucket started within max_age_seconds, newest first"""
+        cutoff = datetime.fromtimestamp(self.clock() - max_age_seconds).isoformat()
+        return [alert for alert in self.alerts if alert["bucket_start"] >= cutoff]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "keys": len(self.keys),
+            "bucket_seconds": self.bucket_seconds,
+            "alpha": self.alpha,
+            "threshold": self.threshold,
+            "min_count": self.min_count,
+            **self._counters,
+        }
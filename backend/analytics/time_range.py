@@ -0,0 +1,65 @@
+
+import re
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+_WINDOW = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([mhdw])\s*$", re.IGNORECASE)
+_UNITS = {"m": "minutes", "h": "hours", "d": "days", "w": "weeks"}
+
+
+def parse_window(window: str) -> timedelta:
+    """Parse a window such as 30m, 24h, 7d or 2w"""
+    match = _WINDOW.match(window)
+    if not match:
+        raise ValueError("window must be a number followed by m, h, d or w, e.g. 24h")
+    length = timedelta(**{_UNITS[match.group(2).lower()]: float(match.group(1))})
+    if length <= timedelta(0):
+        raise ValueError("window must be positive")
+    return length
+
+
+def local_naive(moment: datetime) -> datetime:
+    """The server's local time without an offset; naive values are assumed to be local already"""
+    if moment.tzinfo is not None:
+        return moment.astimezone().replace(tzinfo=None)
+    return moment
+
+
+def stored_timestamp(moment: datetime) -> str:
+    """
+    The form post timestamps are stored in: naive local ISO 8601, like
+    datetime.now().isoformat(). Range filters compare these as text, so
+    sources that report UTC or another offset convert before storing.
+    """
+    return local_naive(moment).isoformat()
+
+
+def parse_timestamp(value: str) -> datetime:
+    """ISO 8601 date or datetime; values with an offset (or Z) are converted to local time"""
+    try:
+        parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    except ValueError:
+        raise ValueError(f"{value!r} is not an ISO 8601 date or datetime") from None
+    return local_naive(parsed)
+
+
+def resolve_time_range(
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    window: Optional[str] = None,
+    now: Optional[datetime] = None,
+) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """
+    The [since, until) range asked for by the analytics query parameters.
+    window counts back from until (or now); None on either side leaves that
+    side open, and no parameters at all means the whole history.
+    """
+    if since and window:
+        raise ValueError("Give either since or window, not both")
+    start = parse_timestamp(since) if since else None
+    end = parse_timestamp(until) if until else None
+    if window:
+        start = (end or now or datetime.now()) - parse_window(window)
+    if start is not None and end is not None and start >= end:
+        raise ValueError("since must be before until")
+    return start, end
@@ -0,0 +1,291 @@
+
+import heapq
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, Hashable, Iterable, List, Mapping, Tuple
+
+from analytics.time_range import parse_window
+from ml.text_preprocessing import tokenize
+
+# Words that make poor key phrases on their own or as half of one
+STOPWORDS = frozenset("""
+a about after again all also am an and any are as at be been before being but by can could did do does
+doing done during each even every for from get got had has have having he her here him his how i if in
+into is it its just know like make many me more most much my near need needs no not now of off on once
+one only or other our out over please same she should since so some still such than that the their them
+then there these they this those through to today too under until up us very via was we were what when
+where which while who why will with within without would yet you your amp http https www com rt
+""".split())
+
+# Dimensions tracked for every post
+DIMENSIONS = ("issues", "phrases")
+
+
+def key_phrases(text: str, limit: int = 20) -> List[str]:
+    """Distinct two-word phrases of a post, ignoring stopwords and numbers"""
+    words = [
+        token for token in tokenize(text)
+        if token not in STOPWORDS and not token.isdigit() and not (token.isascii() and len(token) < 3)
+    ]
+    phrases: List[str] = []
+    seen = set()
+    for first, second in zip(words, words[1:]):
+        phrase = f"{first} {second}"
+        if first != second and phrase not in seen:
+            seen.add(phrase)
+            phrases.append(phrase)
+            if len(phrases) >= limit:
+                break
+    return phrases
+
+
+class SpaceSaving:
+    """
+    Approximate top-k of a stream in a fixed number of counters (Space-Saving).
+
+    A new key takes over the smallest counter once all are in use, inheriting
+    its count as the key's error. Any key counted more than total/capacity
+    times is guaranteed to be present, and every count overestimates the true
+    count by at most its error.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, capacity)
+        self.counts: Dict[Hashable, int] = {}
+        self.errors: Dict[Hashable, int] = {}
+        self.total = 0
+        # (count, key) entries; stale ones (count no longer current) are skipped
+        self._heap: List[Tuple[int, int, Hashable]] = []
+        self._seq = 0
+
+    def _push(self, key: Hashable):
+        self._seq += 1
+        heapq.heappush(self._heap, (self.counts[key], self._seq, key))
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(count, index, key) for index, (key, count) in enumerate(self.counts.items())]
+            heapq.heapify(self._heap)
+            self._seq = len(self._heap)
+
+    def _pop_min(self) -> Tuple[Hashable, int]:
+        while True:
+            count, _, key = heapq.heappop(self._heap)
+            if self.counts.get(key) == count:
+                return key, count
+
+    @property
+    def floor(self) -> int:
+        """Upper bound on the count of any key that is not tracked"""
+        if len(self.counts) < self.capacity:
+            return 0
+        while True:
+            count, _, key = self._heap[0]
+            if self.counts.get(key) == count:
+                return count
+            heapq.heappop(self._heap)
+
+    def add(self, key: Hashable, weight: int = 1):
+        self.total += weight
+        if key in self.counts:
+            self.counts[key] += weight
+        elif len(self.counts) < self.capacity:
+            self.counts[key] = weight
+            self.errors[key] = 0
+        else:
+            evicted, count = self._pop_min()
+            del self.counts[evicted]
+            del self.errors[evicted]
+            self.counts[key] = count + weight
+            self.errors[key] = count
+        self._push(key)
+
+
+class SlidingTopK:
+    """
+    Space-Saving summaries over a sliding time window.
+
+    The window is split into `panes` equal panes, each with its own summary
+    per dimension; panes older than two windows are dropped, so memory stays
+    at 2 x panes x capacity counters per dimension whatever the post rate.
+    A query merges the panes of the current window (and of the one before it,
+    for comparison), which costs the same however many posts were counted.
+    """
+
+    def __init__(self, window_seconds: float, panes: int = 12, capacity: int = 200):
+        self.window_seconds = window_seconds
+        self.panes = max(1, panes)
+        self.pane_seconds = window_seconds / self.panes
+        self.capacity = capacity
+        self._panes: Dict[int, Dict[str, SpaceSaving]] = {}
+        self._posts: Dict[int, int] = {}
+        self.version = 0
+
+    def _pane(self, at: float) -> int:
+        return int(at // self.pane_seconds)
+
+    def _expire(self, current: int):
+        oldest = current - 2 * self.panes
+        for index in [index for index in self._panes if index <= oldest]:
+            del self._panes[index]
+            del self._posts[index]
+
+    def add(self, at: float, keys: Mapping[str, Iterable[Hashable]], now: float):
+        current = self._pane(now)
+        index = min(self._pane(at), current)
+        if index <= current - 2 * self.panes:
+            return
+        pane = self._panes.get(index)
+        if pane is None:
+            pane = self._panes[index] = {dimension: SpaceSaving(self.capacity) for dimension in DIMENSIONS}
+            self._posts[index] = 0
+            self._expire(current)
+        self._posts[index] += 1
+        for dimension, values in keys.items():
+            for value in values:
+                pane[dimension].add(value)
+        self.version += 1
+
+    def posts(self, first: int, last: int) -> int:
+        return sum(self._posts.get(index, 0) for index in range(first, last + 1))
+
+    def _merge(self, dimension: str, first: int, last: int) -> Tuple[Dict[Hashable, List[int]], int]:
+        """key -> [count, error] over panes first..last, plus the upper bound for untracked keys"""
+        merged: Dict[Hashable, List[int]] = {}
+        floor = 0
+        panes = [self._panes[index][dimension] for index in range(first, last + 1) if index in self._panes]
+        for summary in panes:
+            floor += summary.floor
+            for key, count in summary.counts.items():
+                entry = merged.setdefault(key, [0, 0])
+                entry[0] += count
+                entry[1] += summary.errors[key]
+        # A key missing from a full pane may still have up to that pane's floor there
+        for summary in panes:
+            pane_floor = summary.floor
+            if pane_floor:
+                for key, entry in merged.items():
+                    if key not in summary.counts:
+                        entry[1] += pane_floor
+        return merged, floor
+
+    def top(self, dimension: str, limit: int, now: float, sort: str = "count") -> List[Dict[str, Any]]:
+        """The `limit` biggest keys of the window ending now, by count or by growth over the window before"""
+        current = self._pane(now)
+        self._expire(current)
+        merged, _ = self._merge(dimension, current - self.panes + 1, current)
+        previous, previous_floor = self._merge(dimension, current - 2 * self.panes + 1, current - self.panes)
+        items = []
+        for key, (count, error) in merged.items():
+            # Untracked in the previous window: taken at its upper bound, so a key
+            # evicted there does not look like it has just appeared
+            before = previous[key][0] if key in previous else min(previous_floor, count)
+            items.append({"key": key, "count": count, "error": error, "previous": before, "change": count - before})
+        rank = (lambda item: (item["change"], item["count"])) if sort == "rising" else (lambda item: (item["count"], item["change"]))
+        items.sort(key=rank, reverse=True)
+        return items[:limit]
+
+
+def _post_time(post: Mapping[str, Any], now: float) -> float:
+    try:
+        return datetime.fromisoformat(str(post.get("timestamp"))).timestamp()
+    except ValueError:
+        return now
+
+
+def post_keys(post: Mapping[str, Any]) -> Dict[str, List[Hashable]]:
+    category = post.get("category")
+    location = post.get("location") or "Tamil Nadu"
+    return {
+        "issues": [(category, location)] if category else [],
+        "phrases": key_phrases(post.get("content") or ""),
+    }
+
+
+class TrendingTracker:
+    """
+    Live trending issues (category x location) and key phrases for a few
+    fixed windows, fed with every batch of newly stored posts. Queries are
+    cached until the next batch arrives.
+    """
+
+    def __init__(self, windows: Mapping[str, float], panes: int = 12, capacity: int = 200, clock=time.time):
+        self.windows = {name: SlidingTopK(seconds, panes, capacity) for name, seconds in windows.items()}
+        self.clock = clock
+        self.loaded = False
+        self._cache: Dict[Tuple[str, int, str], Tuple[int, float, Dict[str, Any]]] = {}
+        self.posts_counted = 0
+
+    @classmethod
+    def from_env(cls) -> "TrendingTracker":
+        """TRENDING_WINDOWS (default "1h,24h"), TRENDING_PANES and TRENDING_CAPACITY"""
+        names = [name.strip() for name in os.getenv("TRENDING_WINDOWS", "1h,24h").split(",") if name.strip()]
+        return cls(
+            {name: parse_window(name).total_seconds() for name in names},
+            panes=int(os.getenv("TRENDING_PANES", "12")),
+            capacity=int(os.getenv("TRENDING_CAPACITY", "200")),
+        )
+
+    @property
+    def longest_window_seconds(self) -> float:
+        return max((window.window_seconds for window in self.windows.values()), default=0.0)
+
+    def load(self, posts: Iterable[Mapping[str, Any]]):
+        """Start over from stored posts, e.g. the last two longest windows"""
+        self.windows = {
+            name: SlidingTopK(window.window_seconds, window.panes, window.capacity)
+            for name, window in self.windows.items()
+        }
+        self._cache.clear()
+        self.posts_counted = 0
+        self.add_posts(list(posts))
+        self.loaded = True
+
+    def add_posts(self, posts: List[Mapping[str, Any]]):
+        now = self.clock()
+        for post in posts:
+            at = _post_time(post, now)
+            keys = post_keys(post)
+            for window in self.windows.values():
+                window.add(at, keys, now)
+        self.posts_counted += len(posts)
+
+    def top(self, window: str, limit: int = 10, sort: str = "count") -> Dict[str, Any]:
+        """Raises KeyError for a window that is not tracked"""
+        tracker = self.windows[window]
+        now = self.clock()
+        pane = tracker._pane(now)
+        cache_key = (window, limit, sort)
+        cached = self._cache.get(cache_key)
+        if cached is not None and cached[0] == tracker.version and cached[1] == pane:
+            return cached[2]
+
+        issues = tracker.top("issues", limit, now, sort)
+        phrases = tracker.top("phrases", limit, now, sort)
+        for item in issues:
+            item["category"], item["location"] = item.pop("key")
+        for item in phrases:
+            item["phrase"] = item.pop("key")
+        result = {
+            "window": window,
+            "generated_at": datetime.fromtimestamp(now).isoformat(),
+            "posts": tracker.posts(pane - tracker.panes + 1, pane),
+            "previous_posts": tracker.posts(pane - 2 * tracker.panes + 1, pane - tracker.panes),
+            "issues": issues,
+            "phrases": phrases,
+        }
+        self._cache[cache_key] = (tracker.version, pane, result)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "loaded": self.loaded,
+            "posts_counted": self.posts_counted,
+            "windows": {
+                name: {
+                    "seconds": window.window_seconds,
+                    "panes": len(window._panes),
+                    "counters": sum(len(summary.counts) for pane in window._panes.values() for summary in pane.values()),
+                }
+                for name, window in self.windows.items()
+            },
+        }
@@ -0,0 +1,241 @@
+"""
+Measure API endpoint and ingestion performance at several data sizes.
+
+Usage (from backend/):
+    python -m benchmarks.scale --sizes 1000,100000 --output scale-report.json
+    python -m benchmarks.scale --sizes 100000 --baseline scale-report.json
+
+For every size a fresh SQLite database is filled with synthetic posts, then
+each read endpoint is called through the ASGI app (latency percentiles over
+--repeats calls, plus peak Python memory of one traced call) and a batch of new
+posts is pushed through the ingestion pipeline. With --baseline, p50 latencies
+are compared against an earlier report and regressions are listed.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Benchmarks run against the mock models and without the live pollers
+os.environ.setdefault("USE_MOCK_ML", "true")
+os.environ.setdefault("ENABLE_BACKGROUND_JOBS", "false")
+
+import httpx
+
+from benchmarks.synthetic import generate_posts, write_database
+
+ENDPOINTS = [
+    "/posts?limit=50",
+    "/posts?limit=50&search=water",
+    "/posts?limit=50&category=transportation&sentiment=negative",
+    "/analytics-overview",
+    "/analytics-overview?window=24h",
+    "/geo-analytics",
+    "/geo-analytics?window=24h",
+    "/dashboard-summary",
+    "/dashboard-summary?window=24h",
+    "/sentiment-data",
+    "/category-data",
+    "/platform-data",
+    "/trend-data",
+    "/historical-trends",
+    "/notifications",
+    "/message-queue",
+]
+
+
+def _percentile(values: List[float], percentile: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(percentile / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _latency_summary(latencies_ms: List[float]) -> Dict[str, float]:
+    return {
+        "mean": round(statistics.mean(latencies_ms), 2),
+        "p50": round(_percentile(latencies_ms, 50), 2),
+        "p95": round(_percentile(latencies_ms, 95), 2),
+        "max": round(max(latencies_ms), 2),
+    }
+
+
+async def benchmark_endpoint(client, path: str, repeats: int) -> Dict[str, Any]:
+    response = await client.get(path)
+    if response.status_code != 200:
+        return {"status": response.status_code}
+
+    latencies_ms = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        await client.get(path)
+        latencies_ms.append((time.perf_counter() - started) * 1000)
+
+    # Traced separately since tracemalloc slows the call down considerably
+    tracemalloc.start()
+    await client.get(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "status": 200,
+        "latency_ms": _latency_summary(latencies_ms),
+        "peak_memory_kib": round(peak / 1024, 1),
+        "response_bytes": len(response.content),
+    }
+
+
+async def benchmark_ingestion(main, count: int, batch_size: int, seed: int) -> Dict[str, Any]:
+    """Push `count` unseen posts through the live pipeline in source-sized batches"""
+    from ingestion.sources import PollingSource
+
+    source = PollingSource("benchmark", None, 1, 1)
+    fields = ("id", "platform", "content", "timestamp", "location")
+    posts = [{field: post[field] for field in fields} for post in generate_posts(count, seed=seed, days=1)]
+
+    tracemalloc.start()
+    main.ingestion_pipeline.start()
+    started = time.perf_counter()
+    for offset in range(0, len(posts), batch_size):
+        await main.handle_source_posts(source, posts[offset:offset + batch_size])
+    await main.ingestion_pipeline.drain()
+    elapsed = time.perf_counter() - started
+    stats = main.ingestion_pipeline.stats()
+    await main.ingestion_pipeline.stop()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "posts": count,
+        "batch_size": batch_size,
+        "seconds": round(elapsed, 3),
+        "posts_per_second": round(count / elapsed, 1) if elapsed else None,
+        "peak_memory_kib": round(peak / 1024, 1),
+        "stages": {name: {"avg_batch_ms": stage["avg_batch_ms"], "batches": stage["batches"]} for name, stage in stats.items()},
+    }
+
+
+async def run_size(main, client, size: int, args: argparse.Namespace, work_dir: Path) -> Dict[str, Any]:
+    from db.database import DatabaseManager
+
+    db_path = work_dir / f"scale-{size}.db"
+    started = time.perf_counter()
+    await asyncio.get_running_loop().run_in_executor(
+        None, lambda: write_database(str(db_path), size, seed=args.seed, days=args.days)
+    )
+    populate_seconds = time.perf_counter() - started
+    main.db_manager = DatabaseManager(str(db_path))
+
+    endpoints = {}
+    for path in ENDPOINTS:
+        endpoints[path] = await benchmark_endpoint(client, path, args.repeats)
+        result = endpoints[path]
+        if result["status"] == 200:
+            print(f"  {path:<60} p50 {result['latency_ms']['p50']:>9.1f} ms  peak {result['peak_memory_kib']:>10.0f} KiB")
+        else:
+            print(f"  {path:<60} HTTP {result['status']}")
+
+    ingestion = await benchmark_ingestion(main, args.ingest_posts, args.ingest_batch_size, seed=args.seed + size)
+    print(f"  ingestion: {ingestion['posts_per_second']} posts/s, peak {ingestion['peak_memory_kib']:.0f} KiB")
+
+    return {
+        "posts": size,
+        "populate_seconds": round(populate_seconds, 2),
+        "db_bytes": db_path.stat().st_size,
+        "endpoints": endpoints,
+        "ingestion": ingestion,
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """p50 regressions beyond `threshold` (e.g. 1.2 = 20% slower) for sizes in both reports"""
+    previous = {run["posts"]: run for run in baseline.get("runs", [])}
+    regressions = []
+    for run in report["runs"]:
+        before = previous.get(run["posts"])
+        if before is None:
+            continue
+        for path, result in run["endpoints"].items():
+            old = before["endpoints"].get(path, {}).get("latency_ms")
+            new = result.get("latency_ms")
+            if old and new and old["p50"] > 0 and new["p50"] / old["p50"] > threshold:
+                regressions.append(f"{run['posts']} posts {path}: p50 {old['p50']} -> {new['p50']} ms")
+        old_rate = before.get("ingestion", {}).get("posts_per_second")
+        new_rate = run["ingestion"]["posts_per_second"]
+        if old_rate and new_rate and old_rate / new_rate > threshold:
+            regressions.append(f"{run['posts']} posts ingestion: {old_rate} -> {new_rate} posts/s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Comma separated post counts")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed calls per endpoint")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--days", type=int, default=30, help="Days of history the posts are spread over")
+    parser.add_argument("--ingest-posts", type=int, default=2000, help="New posts pushed through the pipeline per size")
+    parser.add_argument("--ingest-batch-size", type=int, default=100)
+    parser.add_argument("--work-dir", default=None, help="Keep the generated databases here instead of a temp dir")
+    parser.add_argument("--output", default=None, help="Write the JSON report to this path")
+    parser.add_argument("--baseline", default=None, help="Earlier report to compare p50 latencies against")
+    parser.add_argument("--threshold", type=float, default=1.2, help="Slowdown ratio reported as a regression")
+    args = parser.parse_args()
+
+    import main as app_main
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    report: Dict[str, Any] = {
+        "generated_at": datetime.now().isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "repeats": args.repeats,
+        "runs": [],
+    }
+
+    temp_dir: Optional[tempfile.TemporaryDirectory] = None
+    if args.work_dir:
+        work_dir = Path(args.work_dir)
+        work_dir.mkdir(parents=True, exist_ok=True)
+    else:
+        temp_dir = tempfile.TemporaryDirectory()
+        work_dir = Path(temp_dir.name)
+
+    async def run_all():
+        # ASGITransport skips lifespan events, so demo seeding and pollers stay off
+        transport = httpx.ASGITransport(app=app_main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            for size in sizes:
+                print(f"{size} posts")
+                report["runs"].append(await run_size(app_main, client, size, args, work_dir))
+
+    try:
+        asyncio.run(run_all())
+    finally:
+        if temp_dir is not None:
+            temp_dir.cleanup()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(report, output_file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            regressions = compare(report, json.load(baseline_file), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Compare the PyTorch and quantized ONNX sentiment backends on a fixed corpus.
+
+Usage (from backend/):
+    python -m benchmarks.sentiment_backends --onnx-dir models/sentiment-onnx-int8
+
+Reports per-post latency (batch size 1), batched throughput, accuracy against
+the hand-labelled corpus below and agreement between the two backends.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import time
+from typing import Dict, List, Tuple
+
+LABELLED_CORPUS: List[Tuple[str, str]] = [
+    ("The new metro extension in Chennai is making my commute so much easier!", "positive"),
+    ("Garbage has not been collected in Adyar for the third day in a row.", "negative"),
+    ("Beautiful new park opened in T. Nagar today. A much-needed green space.", "positive"),
+    ("Traffic at Kathipara junction is terrible today due to construction.", "negative"),
+    ("Water supply interrupted in Velachery since morning.", "negative"),
+    ("Coimbatore smart city work is improving public spaces.", "positive"),
+    ("Schools in Madurai closed tomorrow due to heavy rain forecast.", "neutral"),
+    ("Trichy Corporation fixed the potholes on East Boulevard Road.", "positive"),
+    ("New bus routes announced for Salem city.", "neutral"),
+    ("Streetlights in my neighborhood have not worked for weeks.", "negative"),
+    ("The roads in Madurai need immediate repair. Too many potholes!", "negative"),
+    ("Loving the new park in Salem. Great job by the municipality!", "positive"),
+    ("Power outage in Tirunelveli again. Third time this week!", "negative"),
+    ("Water supply issue in Nagercoil has been fixed. Thanks to the corporation!", "positive"),
+    ("Garbage bins are overflowing near the market in Thoothukudi.", "negative"),
+    ("The government hospital queue in Coimbatore moved quickly today.", "positive"),
+    ("Drainage water is flooding the main street in Chennai after rain.", "negative"),
+    ("Public announcement: Water supply will be interrupted in Trichy tomorrow for maintenance.", "neutral"),
+    ("Community cleanup event this weekend at Chennai beach. All volunteers welcome!", "positive"),
+    ("Ward office in Salem is open on Saturday for property tax payments.", "neutral"),
+    ("Ambulance took forty minutes to arrive in Tambaram. Completely unacceptable.", "negative"),
+    ("சென்னையில் புதிய பேருந்து சேவை மிகவும் நன்றாக உள்ளது", "positive"),
+    ("மதுரையில் குடிநீர் வரவில்லை, மிகவும் மோசமான நிலை", "negative"),
+    ("கோவை மாநகராட்சி கூட்டம் நாளை நடைபெறும்", "neutral"),
+    ("Velachery lo traffic romba mosam today, 2 hours stuck", "negative"),
+    ("Thanks to GCC for clearing the fallen tree so quickly in Mylapore", "positive"),
+]
+
+
+def _percentile(values: List[float], percentile: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(percentile / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def benchmark_backend(analyzer, texts: List[str], labels: List[str], repeats: int, batch_size: int) -> Dict:
+    """Measure one analyzer; the first call is treated as warm-up and discarded"""
+    analyzer.analyze(texts[0])
+
+    latencies_ms = []
+    for _ in range(repeats):
+        for text in texts:
+            started = time.perf_counter()
+            analyzer.analyze(text)
+            latencies_ms.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    processed = 0
+    predictions: List[str] = []
+    for _ in range(repeats):
+        predictions = []
+        for offset in range(0, len(texts), batch_size):
+            predictions.extend(analyzer.analyze_batch(texts[offset:offset + batch_size]))
+        processed += len(texts)
+    elapsed = time.perf_counter() - started
+
+    correct = sum(1 for predicted, label in zip(predictions, labels) if predicted == label)
+    return {
+        "backend": analyzer.backend,
+        "mock": analyzer.use_mock_data,
+        "latency_ms": {
+            "mean": statistics.mean(latencies_ms),
+            "p50": _percentile(latencies_ms, 50),
+            "p95": _percentile(latencies_ms, 95),
+        },
+        "throughput_posts_per_second": processed / elapsed if elapsed else 0.0,
+        "accuracy": correct / len(labels),
+        "predictions": predictions,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--onnx-dir", default=None, help="Exported ONNX directory (defaults to SENTIMENT_ONNX_MODEL_DIR)")
+    parser.add_argument("--backends", default="pytorch,onnx", help="Comma separated backends to compare")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--output", default=None, help="Write the JSON report to this path")
+    args = parser.parse_args()
+
+    # The real models only load when mock ML is disabled
+    os.environ["USE_MOCK_ML"] = "false"
+    from ml.sentiment_analyzer import SentimentAnalyzer
+
+    texts = [text for text, _ in LABELLED_CORPUS]
+    labels = [label for _, label in LABELLED_CORPUS]
+    results = []
+    for backend in [name.strip() for name in args.backends.split(",") if name.strip()]:
+        analyzer = SentimentAnalyzer(backend=backend, model_dir=args.onnx_dir)
+        if analyzer.use_mock_data:
+            print(f"Skipping {backend}: model could not be loaded")
+            continue
+        results.append(benchmark_backend(analyzer, texts, labels, args.repeats, args.batch_size))
+
+    report: Dict = {"corpus_size": len(texts), "results": results}
+    if len(results) == 2:
+        first, second = results[0]["predictions"], results[1]["predictions"]
+        report["agreement"] = sum(1 for a, b in zip(first, second) if a == b) / len(texts)
+        report["speedup_p50"] = results[0]["latency_ms"]["p50"] / results[1]["latency_ms"]["p50"]
+
+    for result in results:
+        print(
+            f"{result['backend']:>8}: p50 {result['latency_ms']['p50']:.1f} ms, "
+            f"p95 {result['latency_ms']['p95']:.1f} ms, "
+            f"{result['throughput_posts_per_second']:.1f} posts/s, "
+            f"accuracy {result['accuracy']:.2%}"
+        )
+    if "agreement" in report:
+        print(f"agreement {report['agreement']:.2%}, p50 speedup {report['speedup_p50']:.2f}x")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(report, output_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
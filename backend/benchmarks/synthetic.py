@@ -0,0 +1,142 @@
+"""
+Deterministic synthetic posts for scale testing.
+
+Usage (from backend/):
+    python -m benchmarks.synthetic --count 100000 --db /tmp/citypulse-100k.db
+    python -m benchmarks.synthetic --count 100000 --ndjson /tmp/posts.ndjson
+
+Posts reuse the mock client templates with skewed location, topic and platform
+weights and a day/night posting rhythm, ending at the current hour. The same
+seed always produces the same posts relative to that hour, so reports from
+different runs are comparable.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sqlite3
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from db.database import DatabaseManager
+from ingestion.enrichment import geocode
+from social_media.twitter_client import MOCK_LOCATIONS, MOCK_PLATFORMS, MOCK_TOPICS
+
+# Roughly proportional to city population; Chennai dominates the feed
+LOCATION_WEIGHTS = [40, 15, 12, 9, 8, 6, 5, 5]
+# Complaints are posted far more often than praise
+TOPIC_WEIGHTS = [3, 1, 3, 1, 2, 3, 2, 1, 2, 1]
+PLATFORM_WEIGHTS = [55, 35, 10]
+# Posts per hour of day, quiet overnight with morning and evening peaks
+HOUR_WEIGHTS = [1, 1, 1, 1, 1, 2, 4, 6, 8, 9, 8, 7, 7, 7, 6, 6, 7, 8, 9, 9, 7, 5, 3, 2]
+# Share of posts with no usable location
+UNLOCATED_SHARE = 0.03
+
+Labeller = Callable[[str], Tuple[str, str]]
+
+
+def default_labeller() -> Labeller:
+    """Label with the app's analysers, cached per text since templates repeat"""
+    from ml.category_classifier import CategoryClassifier
+    from ml.sentiment_analyzer import SentimentAnalyzer
+
+    sentiment_analyzer = SentimentAnalyzer()
+    category_classifier = CategoryClassifier()
+    cache: Dict[str, Tuple[str, str]] = {}
+
+    def label(content: str) -> Tuple[str, str]:
+        if content not in cache:
+            cache[content] = (sentiment_analyzer.analyze(content), category_classifier.classify(content))
+        return cache[content]
+
+    return label
+
+
+def generate_posts(
+    count: int,
+    seed: int = 7,
+    days: int = 30,
+    end: Optional[datetime] = None,
+    label: Optional[Labeller] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Yield `count` analysed posts spread over the `days` before `end`"""
+    rng = random.Random(seed)
+    end = (end or datetime.now()).replace(minute=0, second=0, microsecond=0)
+    # Whole days, so the hour weights line up with the time of day
+    first_day = (end - timedelta(seconds=1)).replace(hour=0, minute=0, second=0) - timedelta(days=days - 1)
+    label = label or default_labeller()
+
+    for index in range(count):
+        template = rng.choices(MOCK_TOPICS, TOPIC_WEIGHTS)[0]
+        place = rng.choices(MOCK_LOCATIONS, LOCATION_WEIGHTS)[0]
+        location = None if rng.random() < UNLOCATED_SHARE else place
+        content = template.format(loc=place)
+        timestamp = end
+        while timestamp >= end:
+            timestamp = first_day + timedelta(
+                days=rng.randrange(days),
+                hours=rng.choices(range(24), HOUR_WEIGHTS)[0],
+                seconds=rng.randrange(3600),
+            )
+        sentiment, category = label(content)
+        latitude, longitude = geocode(location)
+        yield {
+            "id": f"synthetic-{seed}-{index}",
+            "platform": rng.choices(MOCK_PLATFORMS, PLATFORM_WEIGHTS)[0],
+            "content": content,
+            "timestamp": timestamp.isoformat(),
+            "location": location,
+            "latitude": latitude,
+            "longitude": longitude,
+            "sentiment": sentiment,
+            "category": category,
+        }
+
+
+def write_database(db_path: str, count: int, seed: int = 7, days: int = 30, batch_size: int = 50000) -> DatabaseManager:
+    """Fill a database with synthetic posts and their hourly rollups"""
+    db_manager = DatabaseManager(db_path)
+    conn = sqlite3.connect(db_manager.db_path)
+    try:
+        batch = []
+        for post in generate_posts(count, seed=seed, days=days):
+            batch.append(DatabaseManager._post_row(post))
+            if len(batch) >= batch_size:
+                conn.executemany(DatabaseManager._INSERT_POST_SQL, batch)
+                conn.commit()
+                batch = []
+        if batch:
+            conn.executemany(DatabaseManager._INSERT_POST_SQL, batch)
+            conn.commit()
+    finally:
+        conn.close()
+    asyncio.run(db_manager.rebuild_hourly_trends())
+    return db_manager
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--db", default=None, help="Write posts and rollups into this SQLite database")
+    parser.add_argument("--ndjson", default=None, help="Write raw posts as NDJSON (for ingestion.bulk_import)")
+    args = parser.parse_args()
+    if not args.db and not args.ndjson:
+        parser.error("pass --db and/or --ndjson")
+
+    started = time.perf_counter()
+    if args.db:
+        write_database(args.db, args.count, seed=args.seed, days=args.days)
+    if args.ndjson:
+        fields = ("id", "platform", "content", "timestamp", "location")
+        with open(args.ndjson, "w", encoding="utf-8") as output_file:
+            for post in generate_posts(args.count, seed=args.seed, days=args.days):
+                output_file.write(json.dumps({field: post[field] for field in fields}) + "\n")
+    print(f"Generated {args.count} posts in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,586 @@
+"""
+Load-test WebSocket fan-out: many local /ws clients against a live server.
+
+Usage (from backend/):
+    python -m benchmarks.ws_fanout --clients 2000 --rate 100 --duration 30
+    python -m benchmarks.ws_fanout --clients 5000 --slow-fraction 0.2 --policy coalesce --output ws-report.json
+
+The server runs in a child process (uvicorn, fresh database, mock models) with
+a synthetic "loadtest" source in place of Twitter and Facebook. Once every
+client has connected, the source produces --rate posts per second for
+--duration seconds, and they go through the normal ingestion pipeline and
+broadcaster. A --slow-fraction of the clients sleep --slow-delay-ms after each
+frame, so their sockets back up and the slow-client policy kicks in.
+
+Clients record how long after its timestamp each post arrived and how many
+posts never arrived; the server's CPU and resident memory are sampled from
+/proc meanwhile. The report splits results between normal and slow clients and
+includes the server's own broadcaster counters.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# The server child runs the mock models; its ingestion is the load source below
+os.environ.setdefault("USE_MOCK_ML", "true")
+
+import httpx
+
+from social_media.twitter_client import MOCK_LOCATIONS, MOCK_TOPICS
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+# Prefix of the IDs the load source gives its posts
+POST_ID_PREFIX = "load-"
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+# Socket receive buffer of a slow client, in bytes
+SLOW_CLIENT_RCVBUF = 4096
+
+
+class LoadSource:
+    """
+    Mock client for the source registry: nothing until `ready()` (or
+    `start_timeout` seconds), then `rate` posts per second for `duration`
+    seconds, however often it is polled.
+    """
+
+    is_configured = False
+
+    def __init__(
+        self,
+        rate: float,
+        duration: float,
+        ready: Callable[[], bool],
+        start_timeout: float = 120.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.rate = rate
+        self.duration = duration
+        self.ready = ready
+        self.start_timeout = start_timeout
+        self.clock = clock
+        self.created = clock()
+        self.started_at: Optional[float] = None
+        self.finished = False
+        self.generated = 0
+
+    async def fetch_recent_posts(self) -> List[Dict[str, Any]]:
+        now = self.clock()
+        if self.started_at is None:
+            if not self.ready() and now - self.created < self.start_timeout:
+                return []
+            self.started_at = now
+        if self.finished:
+            return []
+        elapsed = min(now - self.started_at, self.duration)
+        if elapsed >= self.duration:
+            self.finished = True
+        due = int(elapsed * self.rate) - self.generated
+        timestamp = datetime.now().isoformat()
+        posts = []
+        for seq in range(self.generated, self.generated + due):
+            location = random.choice(MOCK_LOCATIONS)
+            posts.append({
+                "id": f"{POST_ID_PREFIX}{seq}",
+                "content": random.choice(MOCK_TOPICS).format(loc=location),
+                "timestamp": timestamp,
+                "location": location,
+            })
+        self.generated += len(posts)
+        return posts
+
+    def state(self) -> Dict[str, Any]:
+        return {
+            "started": self.started_at is not None,
+            "finished": self.finished,
+            "generated": self.generated,
+        }
+
+
+def serve(args: argparse.Namespace):
+    """Child process: the app with the load source registered, served by uvicorn"""
+    # Twitter and Facebook stay unregistered; the load source is the only one
+    os.environ["INGEST_SOURCES"] = "loadtest"
+    os.environ["ENABLE_BACKGROUND_JOBS"] = "true"
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    _raise_file_limit()
+
+    import uvicorn
+    import main as app_main
+
+    source = LoadSource(
+        args.rate,
+        args.duration,
+        ready=lambda: len(app_main.broadcaster) >= args.clients,
+        start_timeout=args.start_timeout,
+    )
+    app_main.source_registry.register("loadtest", source, interval_seconds=args.batch_interval, adaptive=False)
+    app_main.app.add_api_route("/loadtest", source.state, methods=["GET"])
+
+    uvicorn.run(
+        app_main.app,
+        host="127.0.0.1",
+        port=args.port,
+        log_level="warning",
+        backlog=4096,
+        ws_per_message_deflate=os.getenv("WS_PER_MESSAGE_DEFLATE", "true").lower() == "true",
+    )
+
+
+def _raise_file_limit():
+    """Thousands of sockets need more than the usual 1024 descriptors"""
+    try:
+        import resource
+    except ImportError:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard == resource.RLIM_INFINITY or soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def histogram_percentiles(histogram: Dict[int, int]) -> Optional[Dict[str, float]]:
+    """Percentiles of latencies bucketed to whole milliseconds"""
+    total = sum(histogram.values())
+    if not total:
+        return None
+    ordered = sorted(histogram.items())
+    summary: Dict[str, float] = {}
+    for percentile in PERCENTILES:
+        rank = max(1, int(round(percentile / 100 * total)))
+        seen = 0
+        for value, count in ordered:
+            seen += count
+            if seen >= rank:
+                summary[f"p{percentile:g}"] = value
+                break
+    summary["max"] = ordered[-1][0]
+    summary["mean"] = round(sum(value * count for value, count in ordered) / total, 1)
+    return summary
+
+
+async def _connect(url: str, slow: bool):
+    import websockets
+
+    if not slow:
+        return await websockets.connect(url, max_size=None, open_timeout=60, close_timeout=2)
+    # Small receive buffers, so a slow reader pushes back on the server within
+    # a few frames instead of after megabytes of loopback buffering
+    host, port = url.split("//", 1)[1].split("/", 1)[0].rsplit(":", 1)
+    sock = socket.socket()
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SLOW_CLIENT_RCVBUF)
+    sock.setblocking(False)
+    await asyncio.get_running_loop().sock_connect(sock, (host, int(port)))
+    return await websockets.connect(
+        url, sock=sock, max_size=None, max_queue=1, read_limit=SLOW_CLIENT_RCVBUF, open_timeout=60, close_timeout=2,
+    )
+
+
+async def _run_client(url: str, slow_delay: float, connect_limit: asyncio.Semaphore, state: Dict[str, Any], latencies: Counter, draining, stopping: asyncio.Event):
+    import websockets
+    from realtime.framing import decode_frame
+
+    try:
+        async with connect_limit:
+            ws = await _connect(url, slow_delay > 0)
+    except Exception as e:
+        state["error"] = type(e).__name__
+        return
+    state["connected"] = True
+    state["ws"] = ws
+    try:
+        async for frame in ws:
+            message = decode_frame(frame)
+            if isinstance(message, list):
+                now = time.time()
+                for post in message:
+                    if not str(post.get("id", "")).startswith(POST_ID_PREFIX):
+                        continue
+                    state["received"] += 1
+                    posted_at = datetime.fromisoformat(post["timestamp"]).timestamp()
+                    latencies[max(0, int((now - posted_at) * 1000))] += 1
+            # Once the load is over every client reads at full speed, so what
+            # is still buffered arrives and only dropped posts stay missing
+            if slow_delay and not draining.is_set():
+                await asyncio.sleep(slow_delay)
+    except websockets.ConnectionClosed:
+        pass
+    if not stopping.is_set():
+        # The server hung up first, e.g. 1013 under the "disconnect" policy
+        state["closed_by_server"] = ws.close_code
+
+
+def run_clients(url: str, count: int, slow_count: int, slow_delay: float, connect_concurrency: int, drain, stop, results):
+    """
+    Client process: `count` connections, the first `slow_count` of them slow
+    until `drain` is set, all of them reading until `stop` is set
+    """
+    _raise_file_limit()
+
+    async def run():
+        connect_limit = asyncio.Semaphore(connect_concurrency)
+        stopping = asyncio.Event()
+        latencies = {"normal": Counter(), "slow": Counter()}
+        states = []
+        tasks = []
+        for index in range(count):
+            slow = index < slow_count
+            state = {"slow": slow, "connected": False, "received": 0, "closed_by_server": None, "error": None}
+            states.append(state)
+            tasks.append(asyncio.create_task(_run_client(
+                url, slow_delay if slow else 0.0, connect_limit, state,
+                latencies["slow" if slow else "normal"], drain, stopping,
+            )))
+
+        await asyncio.get_running_loop().run_in_executor(None, stop.wait)
+        stopping.set()
+        await asyncio.gather(
+            *(state["ws"].close() for state in states if "ws" in state),
+            return_exceptions=True,
+        )
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for state in states:
+            state.pop("ws", None)
+        return {"clients": states, "latencies": {name: dict(counts) for name, counts in latencies.items()}}
+
+    started = time.process_time()
+    result = asyncio.run(run())
+    result["cpu_seconds"] = round(time.process_time() - started, 2)
+    results.put(result)
+
+
+class ProcessSampler(threading.Thread):
+    """CPU time and resident memory of one process, read from /proc (Linux only)"""
+
+    def __init__(self, pid: int, interval: float = 0.5):
+        super().__init__(name="process-sampler", daemon=True)
+        self.pid = pid
+        self.interval = interval
+        # (wall time, cpu seconds, rss bytes)
+        self.samples: List[Tuple[float, float, int]] = []
+        self._stopped = threading.Event()
+        self._ticks = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+        self.available = Path(f"/proc/{pid}/stat").exists()
+
+    def _read(self) -> Optional[Tuple[float, float, int]]:
+        try:
+            with open(f"/proc/{self.pid}/stat") as stat_file:
+                # Fields after the parenthesised command name; utime and stime are 14th and 15th
+                fields = stat_file.read().rsplit(")", 1)[1].split()
+            rss = 0
+            with open(f"/proc/{self.pid}/status") as status_file:
+                for line in status_file:
+                    if line.startswith("VmRSS:"):
+                        rss = int(line.split()[1]) * 1024
+                        break
+        except (OSError, IndexError, ValueError):
+            return None
+        cpu = (int(fields[11]) + int(fields[12])) / self._ticks
+        return time.monotonic(), cpu, rss
+
+    def run(self):
+        while not self._stopped.is_set():
+            sample = self._read()
+            if sample is not None:
+                self.samples.append(sample)
+            self._stopped.wait(self.interval)
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+    def summary(self, since: float = 0.0, until: float = float("inf")) -> Optional[Dict[str, Any]]:
+        samples = [sample for sample in self.samples if since <= sample[0] <= until]
+        if len(samples) < 2:
+            return None
+        busy = [
+            (cpu - previous_cpu) / (at - previous_at) * 100
+            for (previous_at, previous_cpu, _), (at, cpu, _) in zip(samples, samples[1:])
+            if at > previous_at
+        ]
+        wall = samples[-1][0] - samples[0][0]
+        rss = [sample[2] for sample in samples]
+        return {
+            "seconds": round(wall, 1),
+            "cpu_seconds": round(samples[-1][1] - samples[0][1], 2),
+            "cpu_percent_avg": round((samples[-1][1] - samples[0][1]) / wall * 100, 1) if wall else None,
+            "cpu_percent_max": round(max(busy), 1) if busy else None,
+            "rss_mib_start": round(rss[0] / 2 ** 20, 1),
+            "rss_mib_max": round(max(rss) / 2 ** 20, 1),
+            "rss_mib_end": round(rss[-1] / 2 ** 20, 1),
+        }
+
+
+def _free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def start_server(args: argparse.Namespace, port: int, work_dir: Path) -> Tuple[subprocess.Popen, Path]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(BACKEND_DIR), env.get("PYTHONPATH")]))
+    if args.policy:
+        env["WS_SLOW_CLIENT_POLICY"] = args.policy
+    if args.queue_size:
+        env["WS_QUEUE_SIZE"] = str(args.queue_size)
+    command = [
+        sys.executable, "-m", "benchmarks.ws_fanout", "--serve",
+        "--port", str(port),
+        "--clients", str(args.clients),
+        "--rate", str(args.rate),
+        "--duration", str(args.duration),
+        "--batch-interval", str(args.batch_interval),
+        "--start-timeout", str(args.start_timeout),
+    ]
+    log_path = work_dir / "server.log"
+    with open(log_path, "w") as log_file:
+        # The database and profiles land in the temporary working directory
+        server = subprocess.Popen(command, cwd=work_dir, env=env, stdout=log_file, stderr=subprocess.STDOUT)
+    return server, log_path
+
+
+def wait_until_healthy(server: subprocess.Popen, base_url: str, log_path: Path, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise SystemExit(f"Server exited with {server.returncode}:\n{log_path.read_text()[-2000:]}")
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise SystemExit(f"Server did not become healthy within {timeout:.0f}s")
+
+
+def wait_for_load(base_url: str, args: argparse.Namespace) -> Tuple[Dict[str, Any], float, float]:
+    """Until the source has finished and the pipeline has broadcast everything it produced"""
+    load_started = None
+    deadline = time.monotonic() + args.start_timeout + args.duration + args.drain_timeout
+    with httpx.Client(base_url=base_url, timeout=10) as client:
+        while time.monotonic() < deadline:
+            load = client.get("/loadtest").json()
+            if load["started"] and load_started is None:
+                load_started = time.monotonic()
+                print(f"  load started: {args.rate:g} posts/s for {args.duration:g}s")
+            if load["finished"]:
+                status = client.get("/ingestion-status").json()
+                broadcast = status["pipeline"]["broadcast"]
+                drained = not broadcast["queue_depth"] and not broadcast["busy_workers"]
+                if status["total_processed"] >= load["generated"] and drained:
+                    return load, load_started or time.monotonic(), time.monotonic()
+            time.sleep(0.25)
+    print("  pipeline did not drain before --drain-timeout; reporting what arrived")
+    return client_get_json(base_url, "/loadtest"), load_started or time.monotonic(), time.monotonic()
+
+
+def client_get_json(base_url: str, path: str) -> Dict[str, Any]:
+    return httpx.get(f"{base_url}{path}", timeout=10).json()
+
+
+def stop_server(server: subprocess.Popen):
+    if server.poll() is None:
+        server.send_signal(signal.SIGINT)
+        try:
+            server.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            server.kill()
+            server.wait()
+
+
+def summarize_clients(results: List[Dict[str, Any]], generated: int) -> Dict[str, Any]:
+    summary = {}
+    for name, slow in (("normal", False), ("slow", True)):
+        clients = [state for result in results for state in result["clients"] if state["slow"] is slow]
+        if not clients:
+            continue
+        connected = [state for state in clients if state["connected"]]
+        disconnected = [state for state in connected if state["closed_by_server"] is not None]
+        stayed = [state for state in connected if state["closed_by_server"] is None]
+        dropped = [generated - state["received"] for state in stayed]
+        histogram: Counter = Counter()
+        for result in results:
+            histogram.update({int(value): count for value, count in result["latencies"][name].items()})
+        summary[name] = {
+            "clients": len(clients),
+            "connect_failures": len(clients) - len(connected),
+            "disconnected_by_server": len(disconnected),
+            "close_codes": dict(Counter(str(state["closed_by_server"]) for state in disconnected)),
+            "posts_received": sum(state["received"] for state in connected),
+            # Only clients that stayed connected; a disconnected client misses everything after
+            "posts_dropped": sum(dropped),
+            "clients_with_drops": sum(1 for count in dropped if count > 0),
+            "max_dropped_per_client": max(dropped, default=0),
+            "delivery_ratio": round(1 - sum(dropped) / (generated * len(stayed)), 4) if stayed and generated else None,
+            "latency_ms": histogram_percentiles(histogram),
+        }
+    return summary
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    _raise_file_limit()
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    query = {}
+    if args.protocol:
+        query["protocol"] = args.protocol
+    if args.window_ms is not None:
+        query["window_ms"] = str(args.window_ms)
+    ws_url = f"ws://127.0.0.1:{port}/ws" + ("?" + "&".join(f"{key}={value}" for key, value in query.items()) if query else "")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        server, log_path = start_server(args, port, Path(temp_dir))
+        try:
+            wait_until_healthy(server, base_url, log_path)
+            sampler = ProcessSampler(server.pid)
+            if sampler.available:
+                sampler.start()
+
+            context = multiprocessing.get_context("spawn")
+            drain = context.Event()
+            stop = context.Event()
+            results_queue = context.Queue()
+            processes = []
+            slow_total = int(round(args.clients * args.slow_fraction))
+            process_count = max(1, min(args.client_processes, args.clients))
+            for index in range(process_count):
+                count = args.clients // process_count + (1 if index < args.clients % process_count else 0)
+                slow = slow_total // process_count + (1 if index < slow_total % process_count else 0)
+                process = context.Process(
+                    target=run_clients,
+                    args=(ws_url, count, slow, args.slow_delay_ms / 1000, args.connect_concurrency, drain, stop, results_queue),
+                    daemon=True,
+                )
+                process.start()
+                processes.append(process)
+            print(f"  {args.clients} clients ({slow_total} slow) in {process_count} process(es)")
+
+            connect_started = time.monotonic()
+            load, load_started, load_finished = wait_for_load(base_url, args)
+            connect_seconds = load_started - connect_started
+            drain.set()
+            time.sleep(args.settle)
+            status = client_get_json(base_url, "/ingestion-status")
+
+            stop.set()
+            results = [results_queue.get(timeout=120) for _ in processes]
+            for process in processes:
+                process.join(timeout=10)
+            if sampler.is_alive():
+                sampler.stop()
+        finally:
+            stop_server(server)
+
+    return {
+        "generated_at": datetime.now().isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "config": {
+            "clients": args.clients,
+            "slow_fraction": args.slow_fraction,
+            "slow_delay_ms": args.slow_delay_ms,
+            "rate": args.rate,
+            "duration": args.duration,
+            "batch_interval": args.batch_interval,
+            "policy": status["websocket"]["policy"],
+            "queue_size": status["websocket"]["queue_size"],
+            "protocol": args.protocol or "json",
+            "window_ms": args.window_ms,
+            "client_processes": len(processes),
+        },
+        "connect_seconds": round(connect_seconds, 2),
+        "load_seconds": round(load_finished - load_started, 2),
+        "posts_generated": load["generated"],
+        "delivery": summarize_clients(results, load["generated"]),
+        "server": {
+            "websocket": status["websocket"],
+            "broadcast_stage": status["pipeline"]["broadcast"],
+            "process": sampler.summary(load_started, load_finished) if sampler.available else None,
+            "process_whole_run": sampler.summary() if sampler.available else None,
+        },
+        "client_cpu_seconds": [result["cpu_seconds"] for result in results],
+    }
+
+
+def print_summary(report: Dict[str, Any]):
+    print(f"  {report['posts_generated']} posts in {report['load_seconds']}s after {report['connect_seconds']}s connecting")
+    for name, result in report["delivery"].items():
+        latency = result["latency_ms"] or {}
+        print(
+            f"  {name:<6} clients {result['clients']:>6}  "
+            f"p50 {latency.get('p50', '-'):>6} ms  p99 {latency.get('p99', '-'):>6} ms  max {latency.get('max', '-'):>6} ms  "
+            f"dropped {result['posts_dropped']:>8}  disconnected {result['disconnected_by_server']:>5}  "
+            f"connect failures {result['connect_failures']}"
+        )
+    process = report["server"]["process"]
+    if process:
+        print(
+            f"  server cpu avg {process['cpu_percent_avg']}% max {process['cpu_percent_max']}%  "
+            f"rss {process['rss_mib_start']} -> {process['rss_mib_max']} MiB"
+        )
+    websocket = report["server"]["websocket"]
+    print(
+        f"  broadcaster dropped {websocket['dropped']}  coalesced {websocket['coalesced']}  "
+        f"slow disconnects {websocket['slow_disconnects']}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=1000, help="WebSocket clients to open")
+    parser.add_argument("--slow-fraction", type=float, default=0.1, help="Share of clients that read slowly")
+    parser.add_argument("--slow-delay-ms", type=float, default=200, help="Pause of a slow client after each frame")
+    parser.add_argument("--rate", type=float, default=50, help="Posts per second produced by the load source")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds of load")
+    parser.add_argument("--batch-interval", type=float, default=0.5, help="Seconds between polls of the load source")
+    parser.add_argument("--policy", choices=("drop_oldest", "coalesce", "disconnect"), default=None,
+                        help="WS_SLOW_CLIENT_POLICY for the server (default: the environment's)")
+    parser.add_argument("--queue-size", type=int, default=None, help="WS_QUEUE_SIZE for the server")
+    parser.add_argument("--protocol", choices=("json", "compact", "msgpack"), default=None, help="?protocol= for every client")
+    parser.add_argument("--window-ms", type=float, default=None, help="?window_ms= for every client")
+    parser.add_argument("--client-processes", type=int, default=os.cpu_count() or 1,
+                        help="Processes the clients are spread over, so the clients are not the bottleneck")
+    parser.add_argument("--connect-concurrency", type=int, default=200, help="Handshakes in flight per client process")
+    parser.add_argument("--start-timeout", type=float, default=120, help="Start the load after this long even if clients are missing")
+    parser.add_argument("--drain-timeout", type=float, default=60, help="Wait this long after the load for the pipeline to drain")
+    parser.add_argument("--settle", type=float, default=5, help="Seconds for buffered frames to reach clients before stopping")
+    parser.add_argument("--output", default=None, help="Write the JSON report to this path")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args)
+        return
+
+    print(f"ws fan-out: {args.clients} clients, {args.rate:g} posts/s")
+    report = run(args)
+    print_summary(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(report, output_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
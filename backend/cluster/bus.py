@@ -0,0 +1,185 @@
+
+import os
+import logging
+import asyncio
+import json
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set
+
+Handler = Callable[[Any], None]
+
+# Batches of posts can be large; lines longer than this are rejected
+MAX_FRAME_BYTES = 16 * 1024 * 1024
+# A subscriber whose unsent backlog exceeds this is dropped; it reconnects
+MAX_BACKLOG_BYTES = 8 * 1024 * 1024
+
+logger = logging.getLogger(__name__)
+# Published by a BusClient each time it (re)connects to the broker
+WORKER_JOINED = "worker_joined"
+
+
+class LocalBus:
+    """In-process pub/sub; what a single worker uses"""
+
+    def __init__(self):
+        self._handlers: Dict[str, List[Handler]] = {}
+        self._counters = {"published": 0, "delivered": 0, "handler_errors": 0}
+
+    def subscribe(self, channel: str, handler: Handler):
+        self._handlers.setdefault(channel, []).append(handler)
+
+    def _deliver(self, channel: str, payload: Any):
+        for handler in self._handlers.get(channel, []):
+            try:
+                handler(payload)
+                self._counters["delivered"] += 1
+            except Exception:
+                self._counters["handler_errors"] += 1
+                logger.exception("Error handling %s bus message", channel)
+
+    def publish(self, channel: str, payload: Any):
+        self._counters["published"] += 1
+        self._deliver(channel, payload)
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {"mode": "local", **self._counters}
+
+
+class BusBroker:
+    """
+    Unix-domain socket broker, run by the leader worker. Every line a worker
+    sends is forwarded to every other connected worker.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._writers: Set[asyncio.StreamWriter] = set()
+        self._handlers: Set[asyncio.Task] = set()
+        self._counters = {"forwarded": 0, "dropped_subscribers": 0}
+
+    async def start(self):
+        # Only the lock holder runs a broker, so a leftover socket file is stale
+        if self.path.exists():
+            self.path.unlink()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._server = await asyncio.start_unix_server(self._handle, path=str(self.path), limit=MAX_FRAME_BYTES)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        task = asyncio.current_task()
+        self._handlers.add(task)
+        self._writers.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                for other in list(self._writers):
+                    if other is writer:
+                        continue
+                    if other.transport.get_write_buffer_size() > MAX_BACKLOG_BYTES:
+                        self._counters["dropped_subscribers"] += 1
+                        self._writers.discard(other)
+                        other.close()
+                        continue
+                    other.write(line)
+                self._counters["forwarded"] += 1
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError, asyncio.CancelledError):
+            pass
+        finally:
+            self._handlers.discard(task)
+            self._writers.discard(writer)
+            writer.close()
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._writers):
+                writer.close()
+            # Handlers blocked in readline() would otherwise be cancelled untracked
+            handlers = list(self._handlers)
+            for task in handlers:
+                task.cancel()
+            await asyncio.gather(*handlers, return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"workers": len(self._writers), **self._counters}
+
+
+class BusClient(LocalBus):
+    """
+    Pub/sub across workers through the broker socket. Messages are delivered to
+    local handlers immediately and forwarded to the other workers; while the
+    broker is unreachable (e.g. during a leader change) they stay local.
+    """
+
+    def __init__(self, path: str, reconnect_seconds: float = 1.0):
+        super().__init__()
+        self.path = path
+        self.reconnect_seconds = reconnect_seconds
+        self.origin = os.getpid()
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._task: Optional[asyncio.Task] = None
+        self._counters.update({"sent": 0, "received": 0, "unsent": 0, "reconnects": 0})
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None
+
+    async def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                reader, self._writer = await asyncio.open_unix_connection(self.path, limit=MAX_FRAME_BYTES)
+            except (FileNotFoundError, ConnectionError, OSError):
+                await asyncio.sleep(self.reconnect_seconds)
+                continue
+            # Lets workers that hold state (the leader) send it to the newcomer
+            self.publish(WORKER_JOINED, self.origin)
+            try:
+                while True:
+                    line = await reader.readline()
+                    if not line:
+                        break
+                    message = json.loads(line)
+                    self._counters["received"] += 1
+                    self._deliver(message["channel"], message["payload"])
+            except (ConnectionError, ValueError):
+                pass
+            finally:
+                self._writer.close()
+                self._writer = None
+            self._counters["reconnects"] += 1
+            await asyncio.sleep(self.reconnect_seconds)
+
+    def publish(self, channel: str, payload: Any):
+        super().publish(channel, payload)
+        if self._writer is None:
+            self._counters["unsent"] += 1
+            return
+        line = json.dumps({"channel": channel, "origin": self.origin, "payload": payload}, default=str)
+        self._writer.write(line.encode() + b"\n")
+        self._counters["sent"] += 1
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "mode": "unix_socket", "connected": self.connected}
@@ -0,0 +1,78 @@
+
+import os
+import logging
+import asyncio
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, so every process runs as a single worker
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class FileLock:
+    """
+    Exclusive, non-blocking flock on a file. The OS releases it when the
+    holding process exits, however it exits, so a crashed leader never leaves
+    the lock behind.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._fd: Optional[int] = None
+
+    @property
+    def held(self) -> bool:
+        return self._fd is not None
+
+    def try_acquire(self) -> bool:
+        if self._fd is not None:
+            return True
+        if fcntl is None:
+            self._fd = -1
+            return True
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+        return True
+
+    def release(self):
+        if self._fd is None:
+            return
+        if self._fd >= 0:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+        self._fd = None
+
+
+class LeaderElection:
+    """
+    Workers race for the lock; the winner runs on_elected once and stays
+    leader until it exits. Followers keep retrying so one of them takes over
+    when the leader dies.
+    """
+
+    def __init__(self, lock_path: str, on_elected: Callable[[], Awaitable[None]], retry_seconds: float = 2.0):
+        self.lock = FileLock(lock_path)
+        self.on_elected = on_elected
+        self.retry_seconds = retry_seconds
+
+    @property
+    def is_leader(self) -> bool:
+        return self.lock.held
+
+    async def run(self):
+        while not self.lock.try_acquire():
+            await asyncio.sleep(self.retry_seconds)
+        logger.info("Worker %s elected leader", os.getpid())
+        await self.on_elected()
@@ -1,17 +1,23 @@
 
 import os
+import logging
 from datetime import datetime, timedelta
 import asyncio
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Set
 import json
 import sqlite3
 from pathlib import Path
 
+from analytics.time_range import stored_timestamp
+from observability.metrics import DB_QUERY_SECONDS, timed
+
+logger = logging.getLogger(__name__)
+
 class DatabaseManager:
-    def __init__(self):
+    def __init__(self, db_path: Optional[str] = None):
         # Use in-memory database for simplicity in prototype
         # In production, use PostgreSQL or similar with asyncpg
-        self.db_path = Path("./data.db") 
+        self.db_path = Path(db_path or "./data.db")
         self._initialize_db()
     
     def _initialize_db(self):
@@ -21,7 +27,9 @@ class DatabaseManager:
         
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
-        
+        # Readers don't block the writer (or each other) while a commit is in progress
+        cursor.execute("PRAGMA journal_mode=WAL")
+
         # Create posts table
         cursor.execute('''
         CREATE TABLE IF NOT EXISTS posts (
@@ -43,7 +51,14 @@ class DatabaseManager:
             cursor.execute("ALTER TABLE posts ADD COLUMN latitude REAL")
         if "longitude" not in existing_columns:
             cursor.execute("ALTER TABLE posts ADD COLUMN longitude REAL")
-        
+        # Time-range analytics and newest-first listings read posts by timestamp
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_posts_timestamp ON posts(timestamp)")
+        # Version 1: every post timestamp is naive local time
+        cursor.execute("PRAGMA user_version")
+        if cursor.fetchone()[0] < 1:
+            self._localize_timestamps(cursor)
+            cursor.execute("PRAGMA user_version = 1")
+
         # Create trend_data table for storing aggregated trends
         cursor.execute('''
         CREATE TABLE IF NOT EXISTS trend_data (
@@ -71,7 +86,42 @@ class DatabaseManager:
         
         conn.commit()
         conn.close()
-    
+
+    @staticmethod
+    def _localize_timestamps(cursor: sqlite3.Cursor):
+        """Rewrite timestamps stored with an offset (by older Twitter, Facebook and bulk imports) as naive local time"""
+        cursor.execute("SELECT id, timestamp FROM posts WHERE timestamp GLOB '*[+Z]*' OR timestamp GLOB '*T*-*'")
+        updates = []
+        for post_id, value in cursor.fetchall():
+            try:
+                updates.append((stored_timestamp(datetime.fromisoformat(value.replace("Z", "+00:00"))), post_id))
+            except ValueError:
+                continue
+        cursor.executemany("UPDATE posts SET timestamp = ? WHERE id = ?", updates)
+        if updates:
+            logger.info("Converted %d post timestamps to local time", len(updates))
+
+    _INSERT_POST_SQL = """
+        INSERT OR IGNORE INTO posts (
+            id, platform, content, timestamp, location, latitude, longitude, sentiment, category
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+
+    @staticmethod
+    def _post_row(post: Dict[str, Any]) -> tuple:
+        return (
+            post['id'],
+            post['platform'],
+            post['content'],
+            post['timestamp'],
+            post.get('location'),
+            post.get('latitude'),
+            post.get('longitude'),
+            post.get('sentiment'),
+            post.get('category')
+        )
+
+    @timed(DB_QUERY_SECONDS)
     async def store_post(self, post: Dict[str, Any]) -> bool:
         """Store a processed social media post in the database"""
         try:
@@ -82,41 +132,90 @@ class DatabaseManager:
                 conn = sqlite3.connect(self.db_path)
                 cursor = conn.cursor()
                 
-                # Check if post already exists
-                cursor.execute("SELECT id FROM posts WHERE id = ?", (post['id'],))
-                if cursor.fetchone():
-                    conn.close()
-                    return False
-                
-                # Insert post
-                cursor.execute(
-                    """
-                    INSERT INTO posts (
-                        id, platform, content, timestamp, location, latitude, longitude, sentiment, category
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """,
-                    (
-                        post['id'], 
-                        post['platform'], 
-                        post['content'],
-                        post['timestamp'],
-                        post.get('location'),
-                        post.get('latitude'),
-                        post.get('longitude'),
-                        post.get('sentiment'),
-                        post.get('category')
-                    )
-                )
+                # Existing posts are ignored by the primary key; rowcount tells us which
+                cursor.execute(self._INSERT_POST_SQL, self._post_row(post))
+                inserted = cursor.rowcount == 1
                 
                 conn.commit()
                 conn.close()
-                return True
+                return inserted
             
             return await loop.run_in_executor(None, _insert)
         except Exception as e:
-            print(f"Error storing post: {e}")
+            logger.error("Error storing post: %s", e)
             return False
+
+    @timed(DB_QUERY_SECONDS)
+    async def store_posts(self, posts: List[Dict[str, Any]]) -> Optional[List[str]]:
+        """
+        Store several posts in one transaction.
+        Returns the IDs that were newly inserted, or None if the write failed.
+        """
+        try:
+            loop = asyncio.get_event_loop()
+
+            def _insert():
+                conn = sqlite3.connect(self.db_path)
+                try:
+                    cursor = conn.cursor()
+                    inserted = []
+                    for post in posts:
+                        cursor.execute(self._INSERT_POST_SQL, self._post_row(post))
+                        if cursor.rowcount == 1:
+                            inserted.append(post['id'])
+                    conn.commit()
+                    return inserted
+                finally:
+                    conn.close()
+
+            return await loop.run_in_executor(None, _insert)
+        except Exception as e:
+            logger.error("Error storing posts: %s", e)
+            return None
+
+    @timed(DB_QUERY_SECONDS)
+    async def get_recent_post_ids(self, limit: int = 50000) -> List[str]:
+        """IDs of the most recent posts, newest first"""
+        try:
+            loop = asyncio.get_event_loop()
+
+            def _query():
+                conn = sqlite3.connect(self.db_path)
+                cursor = conn.cursor()
+                cursor.execute("SELECT id FROM posts ORDER BY timestamp DESC LIMIT ?", (limit,))
+                ids = [row[0] for row in cursor.fetchall()]
+                conn.close()
+                return ids
+
+            return await loop.run_in_executor(None, _query)
+        except Exception as e:
+            logger.error("Error getting recent post IDs: %s", e)
+            return []
     
+    @timed(DB_QUERY_SECONDS)
+    async def get_existing_ids(self, post_ids: List[str]) -> Set[str]:
+        """The given IDs that are already stored, looked up in chunks by primary key"""
+        try:
+            loop = asyncio.get_event_loop()
+
+            def _query():
+                conn = sqlite3.connect(self.db_path)
+                cursor = conn.cursor()
+                existing = set()
+                # Stay under SQLite's bound-parameter limit
+                for start in range(0, len(post_ids), 500):
+                    chunk = post_ids[start:start + 500]
+                    cursor.execute(f"SELECT id FROM posts WHERE id IN ({', '.join('?' * len(chunk))})", chunk)
+                    existing.update(row[0] for row in cursor.fetchall())
+                conn.close()
+                return existing
+
+            return await loop.run_in_executor(None, _query)
+        except Exception as e:
+            logger.error("Error looking up post IDs: %s", e)
+            return set()
+
+    @timed(DB_QUERY_SECONDS)
     async def aggregate_hourly_trends(self, start_time: datetime, end_time: datetime):
         """Aggregate and store hourly trend data"""
         try:
@@ -196,16 +295,105 @@ class DatabaseManager:
             
             return await loop.run_in_executor(None, _aggregate)
         except Exception as e:
-            print(f"Error aggregating trends: {e}")
+            logger.error("Error aggregating trends: %s", e)
             return False
     
+    @timed(DB_QUERY_SECONDS)
+    async def rebuild_hourly_trends(self, start_time: Optional[datetime] = None, end_time: Optional[datetime] = None) -> bool:
+        """
+        Recompute hourly sentiment and category rollups for every hour with
+        posts in [start_time, end_time] using one grouped pass over the posts
+        table. Used after bulk imports instead of aggregating hour by hour.
+        """
+        try:
+            loop = asyncio.get_event_loop()
+
+            def _rebuild():
+                conn = sqlite3.connect(self.db_path)
+                cursor = conn.cursor()
+
+                # Posts are bucketed on their ISO hour, the same key aggregate_hourly_trends writes
+                hour = "substr(timestamp, 1, 13) || ':00:00'"
+                where = "WHERE 1 = 1"
+                params: List[str] = []
+                if start_time is not None:
+                    where += " AND timestamp >= ?"
+                    params.append(start_time.replace(minute=0, second=0, microsecond=0).isoformat())
+                if end_time is not None:
+                    where += " AND timestamp < ?"
+                    params.append((end_time.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)).isoformat())
+
+                cursor.execute(
+                    f"""
+                    INSERT INTO trend_data (timestamp, interval_type, positive_count, neutral_count, negative_count)
+                    SELECT {hour}, 'hourly',
+                           SUM(sentiment = 'positive'), SUM(sentiment = 'neutral'), SUM(sentiment = 'negative')
+                    FROM posts
+                    {where}
+                    GROUP BY 1
+                    ON CONFLICT(timestamp, interval_type)
+                    DO UPDATE SET positive_count=excluded.positive_count,
+                                  neutral_count=excluded.neutral_count,
+                                  negative_count=excluded.negative_count
+                    """,
+                    params
+                )
+
+                cursor.execute(
+                    f"""
+                    DELETE FROM category_trends
+                    WHERE interval_type = 'hourly'
+                    AND timestamp IN (SELECT DISTINCT {hour} FROM posts {where})
+                    """,
+                    params
+                )
+                cursor.execute(
+                    f"""
+                    INSERT INTO category_trends (timestamp, interval_type, category, count)
+                    SELECT {hour}, 'hourly', category, COUNT(*)
+                    FROM posts
+                    {where} AND category IS NOT NULL
+                    GROUP BY 1, category
+                    """,
+                    params
+                )
+
+                conn.commit()
+                conn.close()
+                return True
+
+            return await loop.run_in_executor(None, _rebuild)
+        except Exception as e:
+            logger.error("Error rebuilding trends: %s", e)
+            return False
+
+    @staticmethod
+    def _time_range(since: Optional[datetime], until: Optional[datetime]) -> tuple:
+        """
+        Conditions and parameters for posts in [since, until); served by
+        idx_posts_timestamp. Timestamps are compared as text, so the bounds are
+        converted to naive local time like the stored ones.
+        """
+        conditions = []
+        params = []
+        if since is not None:
+            conditions.append("timestamp >= ?")
+            params.append(stored_timestamp(since))
+        if until is not None:
+            conditions.append("timestamp < ?")
+            params.append(stored_timestamp(until))
+        return conditions, params
+
+    @timed(DB_QUERY_SECONDS)
     async def get_posts(
         self,
         limit: Optional[int] = 50,
         filters: Optional[Dict[str, str]] = None,
         search: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
     ) -> List[Dict[str, Any]]:
-        """Get posts from the database with optional filters"""
+        """Get posts from the database with optional filters and time range"""
         try:
             loop = asyncio.get_event_loop()
             
@@ -215,8 +403,7 @@ class DatabaseManager:
                 cursor = conn.cursor()
                 
                 query = "SELECT * FROM posts"
-                params = []
-                conditions = []
+                conditions, params = self._time_range(since, until)
                 
                 if filters:
                     allowed_filters = {"platform", "category", "sentiment"}
@@ -252,9 +439,10 @@ class DatabaseManager:
             
             return await loop.run_in_executor(None, _query)
         except Exception as e:
-            print(f"Error getting posts: {e}")
+            logger.error("Error getting posts: %s", e)
             return []
     
+    @timed(DB_QUERY_SECONDS)
     async def get_sentiment_trends(self, start_date: datetime, end_date: datetime) -> List[Dict[str, Any]]:
         """Get sentiment trends for the date range"""
         try:
@@ -361,9 +549,10 @@ class DatabaseManager:
             
             return await loop.run_in_executor(None, _query)
         except Exception as e:
-            print(f"Error getting sentiment trends: {e}")
+            logger.error("Error getting sentiment trends: %s", e)
             return []
     
+    @timed(DB_QUERY_SECONDS)
     async def get_historical_trends(self, start_date: datetime, end_date: datetime, interval: str = "daily") -> List[Dict[str, Any]]:
         """Get historical sentiment trend data with specified interval
         
@@ -421,7 +610,7 @@ class DatabaseManager:
                 
                 # If we have no stored trend data, try to calculate from raw posts
                 if not result:
-                    print("No stored trend data found, calculating from raw posts...")
+                    logger.info("No stored trend data found, calculating from raw posts")
                     
                     # Fall back to calculating from posts table
                     query = f"""
@@ -462,10 +651,11 @@ class DatabaseManager:
             
             return await loop.run_in_executor(None, _query)
         except Exception as e:
-            print(f"Error getting historical trends: {e}")
+            logger.error("Error getting historical trends: %s", e)
             return []
     
-    async def get_category_counts(self) -> List[Dict[str, Any]]:
+    @timed(DB_QUERY_SECONDS)
+    async def get_category_counts(self, since: Optional[datetime] = None, until: Optional[datetime] = None) -> List[Dict[str, Any]]:
         """Get post counts by category"""
         try:
             loop = asyncio.get_event_loop()
@@ -473,13 +663,16 @@ class DatabaseManager:
             def _query():
                 conn = sqlite3.connect(self.db_path)
                 cursor = conn.cursor()
+                conditions, params = self._time_range(since, until)
+                where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
                 
                 cursor.execute(
-                    """
+                    f"""
                     SELECT category, COUNT(*) as count 
-                    FROM posts 
+                    FROM posts {where}
                     GROUP BY category
-                    """
+                    """,
+                    params,
                 )
                 rows = cursor.fetchall()
                 
@@ -491,10 +684,11 @@ class DatabaseManager:
             
             return await loop.run_in_executor(None, _query)
         except Exception as e:
-            print(f"Error getting category counts: {e}")
+            logger.error("Error getting category counts: %s", e)
             return []
     
-    async def get_platform_counts(self) -> List[Dict[str, Any]]:
+    @timed(DB_QUERY_SECONDS)
+    async def get_platform_counts(self, since: Optional[datetime] = None, until: Optional[datetime] = None) -> List[Dict[str, Any]]:
         """Get post counts by platform"""
         try:
             loop = asyncio.get_event_loop()
@@ -502,13 +696,16 @@ class DatabaseManager:
             def _query():
                 conn = sqlite3.connect(self.db_path)
                 cursor = conn.cursor()
+                conditions, params = self._time_range(since, until)
+                where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
                 
                 cursor.execute(
-                    """
+                    f"""
                     SELECT platform, COUNT(*) as count 
-                    FROM posts 
+                    FROM posts {where}
                     GROUP BY platform
-                    """
+                    """,
+                    params,
                 )
                 rows = cursor.fetchall()
                 
@@ -520,5 +717,101 @@ class DatabaseManager:
             
             return await loop.run_in_executor(None, _query)
         except Exception as e:
-            print(f"Error getting platform counts: {e}")
+            logger.error("Error getting platform counts: %s", e)
             return []
+
+    @timed(DB_QUERY_SECONDS)
+    async def get_sentiment_counts(self, since: Optional[datetime] = None, until: Optional[datetime] = None) -> Dict[str, int]:
+        """Post counts by sentiment; a missing sentiment counts as neutral"""
+        try:
+            loop = asyncio.get_event_loop()
+
+            def _query():
+                conn = sqlite3.connect(self.db_path)
+                cursor = conn.cursor()
+                conditions, params = self._time_range(since, until)
+                where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+                cursor.execute(
+                    f"""
+                    SELECT COALESCE(NULLIF(sentiment, ''), 'neutral') AS sentiment, COUNT(*) AS count
+                    FROM posts {where}
+                    GROUP BY COALESCE(NULLIF(sentiment, ''), 'neutral')
+                    """,
+                    params,
+                )
+                rows = cursor.fetchall()
+                conn.close()
+                return {sentiment: count for sentiment, count in rows}
+
+            return await loop.run_in_executor(None, _query)
+        except Exception as e:
+            logger.error("Error getting sentiment counts: %s", e)
+            return {}
+
+    @timed(DB_QUERY_SECONDS)
+    async def get_signal_summary(self, since: Optional[datetime] = None, until: Optional[datetime] = None) -> Dict[str, int]:
+        """Total, citizen portal and negative post counts in one pass"""
+        try:
+            loop = asyncio.get_event_loop()
+
+            def _query():
+                conn = sqlite3.connect(self.db_path)
+                cursor = conn.cursor()
+                conditions, params = self._time_range(since, until)
+                where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+                cursor.execute(
+                    f"""
+                    SELECT
+                        COUNT(*),
+                        COALESCE(SUM(platform = 'Citizen Portal'), 0),
+                        COALESCE(SUM(sentiment = 'negative'), 0)
+                    FROM posts {where}
+                    """,
+                    params,
+                )
+                total, citizen_reports, negative = cursor.fetchone()
+                conn.close()
+                return {"total": total, "citizen_reports": citizen_reports, "negative": negative}
+
+            return await loop.run_in_executor(None, _query)
+        except Exception as e:
+            logger.error("Error getting signal summary: %s", e)
+            return {"total": 0, "citizen_reports": 0, "negative": 0}
+
+    @timed(DB_QUERY_SECONDS)
+    async def get_live_aggregate_counts(self) -> Optional[Dict[str, List[tuple]]]:
+        """
+        GROUP BY counts that seed the live dashboard totals without loading posts:
+        "groups" rows of (sentiment, category, platform, location, count) and
+        "trend" rows of (hour, sentiment, count). None if the query fails.
+        """
+        try:
+            loop = asyncio.get_event_loop()
+
+            def _query():
+                conn = sqlite3.connect(self.db_path)
+                cursor = conn.cursor()
+                cursor.execute(
+                    """
+                    SELECT sentiment, category, platform, location, COUNT(*)
+                    FROM posts
+                    GROUP BY sentiment, category, platform, location
+                    """
+                )
+                groups = cursor.fetchall()
+                cursor.execute(
+                    """
+                    SELECT substr(timestamp, 1, 13) AS hour, sentiment, COUNT(*)
+                    FROM posts
+                    WHERE timestamp IS NOT NULL AND timestamp != ''
+                    GROUP BY hour, sentiment
+                    """
+                )
+                trend = cursor.fetchall()
+                conn.close()
+                return {"groups": groups, "trend": trend}
+
+            return await loop.run_in_executor(None, _query)
+        except Exception as e:
+            logger.error("Error getting live aggregate counts: %s", e)
+            return None
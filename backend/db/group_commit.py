@@ -0,0 +1,121 @@
+
+import os
+import logging
+import asyncio
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Record = Dict[str, Any]
+StoreBatch = Callable[[List[Record]], Awaitable[Optional[List[str]]]]
+OnCommit = Callable[[List[Record]], Awaitable[None]]
+
+
+class GroupCommitWriter:
+    """
+    Batches single-record writes into shared transactions.
+
+    write() queues a record and waits until the transaction holding it has
+    committed. A flusher task waits up to max_delay after the first queued
+    record (less if max_batch records arrive first) and stores everything
+    queued in one call; while a commit is in progress new records keep
+    queuing, so under load each commit carries more records instead of
+    callers waiting on each other's transactions. Committed records are
+    handed to on_commit for follow-up work.
+    """
+
+    def __init__(
+        self,
+        store: StoreBatch,
+        on_commit: Optional[OnCommit] = None,
+        max_batch: Optional[int] = None,
+        max_delay: Optional[float] = None,
+    ):
+        self.store = store
+        self.on_commit = on_commit
+        self.max_batch = max(1, max_batch if max_batch is not None else int(os.getenv("GROUP_COMMIT_MAX_BATCH", "500")))
+        self.max_delay = max_delay if max_delay is not None else float(os.getenv("GROUP_COMMIT_DELAY_MS", "5")) / 1000
+        self._pending: Deque[Tuple[Record, asyncio.Future]] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._full: Optional[asyncio.Event] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._flusher_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._counters = {"commits": 0, "records": 0, "inserted": 0, "failed": 0, "largest_commit": 0}
+
+    def _ensure_flusher(self):
+        loop = asyncio.get_running_loop()
+        if self._flusher is None or self._flusher.done() or self._flusher_loop is not loop:
+            self._wakeup = asyncio.Event()
+            self._full = asyncio.Event()
+            self._flusher = asyncio.create_task(self._flush_loop())
+            self._flusher_loop = loop
+
+    async def write(self, record: Record) -> bool:
+        """True once the record is committed; False if it already existed or the commit failed"""
+        self._ensure_flusher()
+        committed = asyncio.get_running_loop().create_future()
+        self._pending.append((record, committed))
+        if len(self._pending) >= self.max_batch:
+            self._full.set()
+        self._wakeup.set()
+        return await committed
+
+    async def _flush_loop(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            if len(self._pending) < self.max_batch:
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.max_delay)
+                except asyncio.TimeoutError:
+                    pass
+            self._full.clear()
+            while self._pending:
+                batch = [self._pending.popleft() for _ in range(min(self.max_batch, len(self._pending)))]
+                await self._commit(batch)
+
+    async def _commit(self, batch: List[Tuple[Record, asyncio.Future]]):
+        records = [record for record, _ in batch]
+        try:
+            inserted_ids = await self.store(records)
+        except Exception:
+            logger.exception("Error storing group commit", extra={"records": len(records)})
+            inserted_ids = None
+
+        inserted = set(inserted_ids or ())
+        for record, committed in batch:
+            if not committed.done():
+                committed.set_result(record["id"] in inserted)
+
+        self._counters["commits"] += 1
+        self._counters["records"] += len(records)
+        self._counters["inserted"] += len(inserted)
+        self._counters["largest_commit"] = max(self._counters["largest_commit"], len(records))
+        if inserted_ids is None:
+            self._counters["failed"] += len(records)
+
+        if inserted and self.on_commit is not None:
+            try:
+                await self.on_commit([record for record in records if record["id"] in inserted])
+            except Exception:
+                logger.exception("Error handing off committed batch", extra={"records": len(inserted)})
+
+    async def close(self):
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+
+    def stats(self) -> Dict[str, Any]:
+        commits = self._counters["commits"]
+        return {
+            "pending": len(self._pending),
+            "max_batch": self.max_batch,
+            "delay_ms": round(self.max_delay * 1000, 2),
+            **self._counters,
+            "avg_commit_size": round(self._counters["records"] / commits, 2) if commits else None,
+        }
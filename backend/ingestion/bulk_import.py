@@ -0,0 +1,295 @@
+"""
+Backfill historical posts from NDJSON or CSV exports.
+
+Usage (from backend/):
+    python -m ingestion.bulk_import exports/tweets.ndjson exports/facebook.csv --db data.db
+
+Rows are classified in worker processes, geocoded and inserted in large
+transactions; hourly trend rollups are rebuilt once at the end. Progress is
+checkpointed next to each input file, so running the same command again after
+an interruption resumes where it stopped (use --restart to start over).
+"""
+
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from analytics.time_range import stored_timestamp
+from db.database import DatabaseManager
+from ingestion.enrichment import enrich_posts
+
+# Column names accepted for each post field, in order of preference
+FIELD_ALIASES = {
+    "id": ("id", "post_id", "tweet_id"),
+    "content": ("content", "text", "full_text", "message"),
+    "timestamp": ("timestamp", "created_at", "created_time", "date"),
+    "location": ("location", "place", "city"),
+    "platform": ("platform", "source"),
+}
+
+
+def read_rows(path: Path, file_format: str = "auto") -> Iterator[Dict[str, Any]]:
+    """Stream rows from an NDJSON or CSV file without loading it into memory"""
+    if file_format == "auto":
+        file_format = "csv" if path.suffix.lower() == ".csv" else "ndjson"
+
+    with open(path, newline="", encoding="utf-8") as handle:
+        if file_format == "csv":
+            yield from csv.DictReader(handle)
+            return
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                # Keep row numbering stable for checkpoints; the row is skipped later
+                yield {}
+
+
+def _field(row: Dict[str, Any], name: str) -> Optional[str]:
+    for key in FIELD_ALIASES[name]:
+        value = row.get(key)
+        if value not in (None, ""):
+            return str(value)
+    return None
+
+
+def _parse_timestamp(value: str) -> Optional[str]:
+    try:
+        if value.replace(".", "", 1).isdigit():
+            return stored_timestamp(datetime.fromtimestamp(float(value), tz=timezone.utc))
+        return stored_timestamp(datetime.fromisoformat(value.replace("Z", "+00:00")))
+    except ValueError:
+        return None
+
+
+def normalize_row(row: Dict[str, Any], default_platform: str) -> Optional[Dict[str, Any]]:
+    """Map an exported row onto a post; None when it has no usable content or time"""
+    content = _field(row, "content")
+    timestamp = _parse_timestamp(_field(row, "timestamp") or "")
+    if not content or not timestamp:
+        return None
+
+    platform = _field(row, "platform") or default_platform
+    post_id = _field(row, "id")
+    if post_id is None:
+        # Stable id so re-importing the same export never duplicates posts
+        digest = hashlib.sha1(f"{platform}|{timestamp}|{content}".encode("utf-8")).hexdigest()
+        post_id = f"import-{digest[:16]}"
+
+    return {
+        "id": post_id,
+        "platform": platform,
+        "content": content,
+        "timestamp": timestamp,
+        "location": _field(row, "location"),
+    }
+
+
+_analyzers = None
+
+
+def _init_worker():
+    global _analyzers
+    from ml.category_classifier import CategoryClassifier
+    from ml.sentiment_analyzer import SentimentAnalyzer
+
+    _analyzers = (SentimentAnalyzer(), CategoryClassifier())
+
+
+def classify_chunk(posts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Runs in a worker process, which loads the models once"""
+    if _analyzers is None:
+        _init_worker()
+    return enrich_posts(posts, *_analyzers)
+
+
+class Checkpoint:
+    """Rows of one input already committed, stored beside the input file"""
+
+    def __init__(self, source: Path):
+        self.path = source.with_name(source.name + ".import-checkpoint.json")
+
+    def load(self) -> Dict[str, Any]:
+        if not self.path.exists():
+            return {"rows_done": 0, "completed": False}
+        return json.loads(self.path.read_text())
+
+    def save(self, rows_done: int, completed: bool = False):
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps({"rows_done": rows_done, "completed": completed}))
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        if self.path.exists():
+            self.path.unlink()
+
+
+class BulkImporter:
+    def __init__(
+        self,
+        db_manager: DatabaseManager,
+        executor: Executor,
+        in_flight: int,
+        chunk_size: int = 1000,
+        commit_size: int = 20000,
+        default_platform: str = "Import",
+    ):
+        self.db_manager = db_manager
+        self.executor = executor
+        self.in_flight = max(1, in_flight)
+        self.chunk_size = chunk_size
+        self.commit_size = commit_size
+        self.default_platform = default_platform
+        self.stats = {"rows": 0, "inserted": 0, "duplicates": 0, "skipped": 0}
+        self.min_timestamp: Optional[str] = None
+        self.max_timestamp: Optional[str] = None
+        self._started = time.perf_counter()
+
+    def _chunks(self, path: Path, file_format: str, skip_rows: int) -> Iterator[tuple]:
+        """(posts, rows consumed so far) for every chunk after the checkpoint"""
+        chunk: List[Dict[str, Any]] = []
+        rows_done = 0
+        for rows_done, row in enumerate(read_rows(path, file_format), start=1):
+            if rows_done <= skip_rows:
+                continue
+            self.stats["rows"] += 1
+            post = normalize_row(row, self.default_platform)
+            if post is None:
+                self.stats["skipped"] += 1
+                continue
+            chunk.append(post)
+            if len(chunk) >= self.chunk_size:
+                yield chunk, rows_done
+                chunk = []
+        if chunk:
+            yield chunk, rows_done
+
+    async def _commit(self, records: List[Dict[str, Any]]):
+        inserted = await self.db_manager.store_posts(records)
+        if inserted is None:
+            raise RuntimeError("database write failed; run the import again to resume")
+        self.stats["inserted"] += len(inserted)
+        self.stats["duplicates"] += len(records) - len(inserted)
+        for record in records:
+            timestamp = record["timestamp"]
+            if self.min_timestamp is None or timestamp < self.min_timestamp:
+                self.min_timestamp = timestamp
+            if self.max_timestamp is None or timestamp > self.max_timestamp:
+                self.max_timestamp = timestamp
+
+    def report(self, label: str):
+        elapsed = time.perf_counter() - self._started
+        rate = self.stats["rows"] / elapsed if elapsed else 0.0
+        print(
+            f"[{label}] {self.stats['rows']} rows read, {self.stats['inserted']} inserted, "
+            f"{self.stats['duplicates']} already stored, {self.stats['skipped']} skipped "
+            f"({rate:.0f} rows/s)"
+        )
+
+    async def import_file(self, path: Path, file_format: str = "auto", restart: bool = False):
+        checkpoint = Checkpoint(path)
+        if restart:
+            checkpoint.clear()
+        state = checkpoint.load()
+        if state["completed"]:
+            print(f"[{path.name}] already imported; use --restart to import it again")
+            return
+        if state["rows_done"]:
+            print(f"[{path.name}] resuming after row {state['rows_done']}")
+
+        loop = asyncio.get_running_loop()
+        pending: deque = deque()
+        buffer: List[Dict[str, Any]] = []
+        buffered_rows = state["rows_done"]
+
+        async def collect_oldest():
+            nonlocal buffer, buffered_rows
+            future, rows_done = pending.popleft()
+            buffer.extend(await future)
+            buffered_rows = rows_done
+            if len(buffer) >= self.commit_size:
+                await self._commit(buffer)
+                checkpoint.save(buffered_rows)
+                buffer = []
+                self.report(path.name)
+
+        # Chunks are classified out of order but committed in file order,
+        # so the checkpoint always marks a prefix of the file that is stored
+        for chunk, rows_done in self._chunks(path, file_format, state["rows_done"]):
+            pending.append((loop.run_in_executor(self.executor, classify_chunk, chunk), rows_done))
+            if len(pending) >= self.in_flight:
+                await collect_oldest()
+        while pending:
+            await collect_oldest()
+
+        if buffer:
+            await self._commit(buffer)
+        checkpoint.save(buffered_rows, completed=True)
+        self.report(path.name)
+
+    async def rebuild_trends(self):
+        if self.min_timestamp is None:
+            return
+        started = time.perf_counter()
+        await self.db_manager.rebuild_hourly_trends(
+            datetime.fromisoformat(self.min_timestamp[:19]),
+            datetime.fromisoformat(self.max_timestamp[:19]),
+        )
+        print(f"Rebuilt hourly trends in {time.perf_counter() - started:.1f}s")
+
+
+async def run_import(args: argparse.Namespace):
+    workers = args.workers if args.workers is not None else (os.cpu_count() or 1)
+    if workers > 0:
+        executor: Executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+    else:
+        # Classify in this process; useful for debugging and small files
+        executor = ThreadPoolExecutor(max_workers=1)
+
+    importer = BulkImporter(
+        DatabaseManager(args.db),
+        executor,
+        in_flight=max(1, workers) * 2,
+        chunk_size=args.chunk_size,
+        commit_size=args.commit_size,
+        default_platform=args.platform,
+    )
+    try:
+        for path in args.inputs:
+            await importer.import_file(Path(path), args.format, restart=args.restart)
+    finally:
+        # Rollups cover whatever was committed, even if a later file failed
+        await importer.rebuild_trends()
+        executor.shutdown()
+    return importer.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inputs", nargs="+", help="NDJSON (.ndjson/.jsonl) or CSV exports")
+    parser.add_argument("--db", default="data.db", help="SQLite database to import into")
+    parser.add_argument("--format", choices=["auto", "ndjson", "csv"], default="auto")
+    parser.add_argument("--platform", default="Import", help="Platform for rows that do not name one")
+    parser.add_argument("--workers", type=int, default=None, help="Classifier processes (default: CPU count, 0 = in-process)")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Rows per classification task")
+    parser.add_argument("--commit-size", type=int, default=20000, help="Rows per database transaction")
+    parser.add_argument("--restart", action="store_true", help="Ignore checkpoints and import from the first row")
+    args = parser.parse_args()
+
+    asyncio.run(run_import(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+
+import math
+from collections import OrderedDict
+from hashlib import blake2b
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings using double hashing of one blake2b digest"""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.size = max(8, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = blake2b(item.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + index * second) % self.size for index in range(self.hash_count)]
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class SeenIdFilter:
+    """
+    In-memory screen for post IDs in front of the database.
+
+    - IDs in the exact LRU of recent IDs are known duplicates and are dropped
+    - IDs the Bloom filter has never seen are certainly new and skip any lookup
+    - anything else ("maybe") is looked up in the database, in one query per batch
+
+    Only IDs confirmed to be in the database should be added, so a failed
+    write never hides a post. The Bloom filter is rebuilt from the LRU once
+    it has taken `capacity` IDs, which keeps its false-positive rate bounded.
+    """
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.001, recent_size: int = 50_000):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.recent_size = recent_size
+        self.bloom = BloomFilter(capacity, error_rate)
+        self.recent: "OrderedDict[str, None]" = OrderedDict()
+        self._counters = {"checked": 0, "rejected": 0, "new": 0, "maybe": 0, "maybe_stored": 0, "rebuilds": 0}
+
+    def add(self, post_id: str):
+        if post_id in self.recent:
+            self.recent.move_to_end(post_id)
+            return
+        self.recent[post_id] = None
+        if len(self.recent) > self.recent_size:
+            self.recent.popitem(last=False)
+
+        if self.bloom.count >= self.capacity:
+            self.bloom = BloomFilter(self.capacity, self.error_rate)
+            for recent_id in self.recent:
+                self.bloom.add(recent_id)
+            self._counters["rebuilds"] += 1
+        else:
+            self.bloom.add(post_id)
+
+    def add_many(self, post_ids: Iterable[str]):
+        for post_id in post_ids:
+            self.add(post_id)
+
+    def check(self, post_id: str) -> str:
+        """Whether the ID is a "duplicate" (certainly stored), "new" (certainly not) or "maybe" stored"""
+        self._counters["checked"] += 1
+        if post_id in self.recent:
+            self.recent.move_to_end(post_id)
+            self._counters["rejected"] += 1
+            return "duplicate"
+        if post_id in self.bloom:
+            self._counters["maybe"] += 1
+            return "maybe"
+        self._counters["new"] += 1
+        return "new"
+
+    def screen(self, posts: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Set[str]]:
+        """
+        Drop known duplicates and repeats within the batch; returns the rest
+        and the IDs among them that still need a database lookup
+        """
+        fresh = []
+        maybe: Set[str] = set()
+        batch_ids = set()
+        for post in posts:
+            post_id = str(post["id"])
+            if post_id in batch_ids:
+                continue
+            verdict = self.check(post_id)
+            if verdict == "duplicate":
+                continue
+            if verdict == "maybe":
+                maybe.add(post_id)
+            batch_ids.add(post_id)
+            fresh.append(post)
+        return fresh, maybe
+
+    def mark_stored(self, post_ids: Iterable[str]):
+        """Record "maybe" IDs the database confirmed, so repeats are rejected in memory"""
+        for post_id in post_ids:
+            self._counters["maybe_stored"] += 1
+            self.add(post_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._counters,
+            "recent_ids": len(self.recent),
+            "bloom_ids": self.bloom.count,
+            "bloom_capacity": self.capacity,
+        }
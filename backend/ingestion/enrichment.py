@@ -0,0 +1,46 @@
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from ml.text_preprocessing import preprocess
+
+LOCATION_COORDS = {
+    "Chennai": (13.0827, 80.2707),
+    "Coimbatore": (11.0168, 76.9558),
+    "Madurai": (9.9252, 78.1198),
+    "Trichy": (10.7905, 78.7047),
+    "Tiruchirappalli": (10.7905, 78.7047),
+    "Salem": (11.6643, 78.1460),
+    "Tirunelveli": (8.7139, 77.7567),
+    "Thoothukudi": (8.7642, 78.1348),
+    "Nagercoil": (8.1833, 77.4119),
+    "Tamil Nadu": (11.1271, 78.6569),
+}
+
+
+def geocode(location: Optional[str]) -> Tuple[float, float]:
+    """Coordinates for a known location, falling back to the centre of the state"""
+    return LOCATION_COORDS.get(location, LOCATION_COORDS["Tamil Nadu"])
+
+
+def enrich_posts(posts: List[Dict[str, Any]], sentiment_analyzer: Any, category_classifier: Any) -> List[Dict[str, Any]]:
+    """Classify and geocode raw posts into database records"""
+    # Normalise and tokenise once; both analysers share the result
+    texts = [preprocess(t['content']) for t in posts]
+    sentiments = sentiment_analyzer.analyze_batch(texts)
+    categories = category_classifier.classify_batch(texts)
+    records = []
+    for t, sentiment, category in zip(posts, sentiments, categories):
+        loc = t.get('location')
+        lat, lon = geocode(loc)
+        records.append({
+            'id': t['id'],
+            'platform': t.get('platform', 'Twitter'),
+            'content': t['content'],
+            'timestamp': t['timestamp'],
+            'location': loc,
+            'latitude': lat,
+            'longitude': lon,
+            'sentiment': sentiment,
+            'category': category
+        })
+    return records
@@ -0,0 +1,48 @@
+
+import os
+import threading
+import time
+
+# Crockford base32, as used by the ULID spec
+_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_RANDOM_BITS = 80
+
+_lock = threading.Lock()
+_last_ms = -1
+_last_random = 0
+
+
+def _encode(value: int) -> str:
+    chars = []
+    for _ in range(26):
+        chars.append(_ALPHABET[value & 31])
+        value >>= 5
+    return "".join(reversed(chars))
+
+
+def new_ulid() -> str:
+    """
+    26-character ULID: a 48-bit millisecond timestamp followed by 80 random bits.
+    IDs made in the same millisecond increment the random part, so they stay
+    unique and sort in creation order within this process.
+    """
+    global _last_ms, _last_random
+    with _lock:
+        now_ms = int(time.time() * 1000)
+        if now_ms > _last_ms:
+            _last_ms = now_ms
+            _last_random = int.from_bytes(os.urandom(10), "big")
+        else:
+            _last_random += 1
+            if _last_random >> _RANDOM_BITS:
+                # Random part exhausted within one millisecond; borrow the next one
+                _last_ms += 1
+                _last_random = int.from_bytes(os.urandom(10), "big")
+        return _encode((_last_ms << _RANDOM_BITS) | _last_random)
+
+
+def ulid_timestamp_ms(ulid: str) -> int:
+    value = 0
+    for char in ulid[:10]:
+        value = (value << 5) | _ALPHABET.index(char)
+    return value
@@ -0,0 +1,184 @@
+
+import os
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from observability.log import correlated, correlation_ids
+from observability.metrics import PIPELINE_STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+Batch = List[Dict[str, Any]]
+StageHandler = Callable[[Batch], Awaitable[Optional[Batch]]]
+
+# What a full queue does to the stage feeding it:
+#   "block"       - the producer waits, so backpressure reaches the sources
+#   "drop_oldest" - the oldest queued batch is discarded to make room
+OVERFLOW_POLICIES = ("block", "drop_oldest")
+
+
+class Stage:
+    """
+    One pipeline step: a bounded queue of post batches served by N workers.
+    With coalesce=True a worker folds every batch already waiting into one
+    call, so a stage that falls behind does less work per post, not more.
+    Each batch carries the correlation IDs that were current when it was
+    submitted, and the handler runs with them set.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: StageHandler,
+        concurrency: int = 1,
+        queue_size: int = 100,
+        overflow: str = "block",
+        coalesce: bool = False,
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy {overflow!r}; expected one of {OVERFLOW_POLICIES}")
+        self.name = name
+        self.handler = handler
+        self.concurrency = max(1, concurrency)
+        self.queue_size = max(1, queue_size)
+        self.overflow = overflow
+        self.coalesce = coalesce
+        self.next: Optional["Stage"] = None
+        self.queue: Optional[asyncio.Queue] = None
+        self._busy = 0
+        self._counters: Dict[str, float] = {
+            "batches": 0,
+            "items": 0,
+            "dropped_items": 0,
+            "errors": 0,
+            "blocked_puts": 0,
+            "busy_seconds": 0.0,
+        }
+
+    @classmethod
+    def from_env(cls, name: str, handler: StageHandler, **defaults) -> "Stage":
+        """Build a stage whose settings can be overridden with PIPELINE_<NAME>_* variables"""
+        prefix = f"PIPELINE_{name.upper()}_"
+        return cls(
+            name,
+            handler,
+            concurrency=int(os.getenv(prefix + "CONCURRENCY", defaults.get("concurrency", 1))),
+            queue_size=int(os.getenv(prefix + "QUEUE_SIZE", defaults.get("queue_size", 100))),
+            overflow=os.getenv(prefix + "OVERFLOW", defaults.get("overflow", "block")),
+            coalesce=defaults.get("coalesce", False),
+        )
+
+    async def put(self, batch: Batch, ids: Optional[Tuple[str, ...]] = None):
+        if not batch:
+            return
+        item = (batch, correlation_ids.get() if ids is None else ids)
+        if self.overflow == "block":
+            if self.queue.full():
+                self._counters["blocked_puts"] += 1
+            await self.queue.put(item)
+            return
+
+        while self.queue.full():
+            dropped, _ = self.queue.get_nowait()
+            self.queue.task_done()
+            self._counters["dropped_items"] += len(dropped)
+        self.queue.put_nowait(item)
+
+    async def _worker(self):
+        while True:
+            batch, ids = await self.queue.get()
+            taken = 1
+            if self.coalesce:
+                batch = list(batch)
+                while not self.queue.empty():
+                    more, more_ids = self.queue.get_nowait()
+                    batch.extend(more)
+                    ids += more_ids
+                    taken += 1
+
+            self._busy += 1
+            started = time.perf_counter()
+            try:
+                with correlated(ids):
+                    result = await self.handler(batch)
+                    self._counters["batches"] += 1
+                    self._counters["items"] += len(batch)
+                    logger.debug("Stage finished", extra={
+                        "stage": self.name, "items": len(batch),
+                        "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                    })
+                if result and self.next is not None:
+                    await self.next.put(result, ids)
+            except Exception:
+                self._counters["errors"] += 1
+                with correlated(ids):
+                    logger.exception("Error processing batch in stage %s", self.name, extra={"items": len(batch)})
+            finally:
+                elapsed = time.perf_counter() - started
+                self._counters["busy_seconds"] += elapsed
+                PIPELINE_STAGE_SECONDS.observe(elapsed, self.name)
+                self._busy -= 1
+                for _ in range(taken):
+                    self.queue.task_done()
+
+    def start(self) -> List[asyncio.Task]:
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        return [
+            asyncio.create_task(self._worker(), name=f"pipeline-{self.name}-{index}")
+            for index in range(self.concurrency)
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        batches = self._counters["batches"]
+        return {
+            "queue_depth": self.queue.qsize() if self.queue else 0,
+            "queue_size": self.queue_size,
+            "concurrency": self.concurrency,
+            "busy_workers": self._busy,
+            "overflow": self.overflow,
+            "coalesce": self.coalesce,
+            "batches": int(batches),
+            "items": int(self._counters["items"]),
+            "dropped_items": int(self._counters["dropped_items"]),
+            "blocked_puts": int(self._counters["blocked_puts"]),
+            "errors": int(self._counters["errors"]),
+            "avg_batch_ms": round(self._counters["busy_seconds"] * 1000 / batches, 2) if batches else None,
+        }
+
+
+class IngestionPipeline:
+    """Stages chained by bounded queues; each stage forwards its result to the next"""
+
+    def __init__(self, stages: List[Stage]):
+        self.stages = stages
+        for current, following in zip(stages, stages[1:]):
+            current.next = following
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self):
+        """Create queues and workers on the running event loop"""
+        self._tasks = [task for stage in self.stages for task in stage.start()]
+
+    async def submit(self, batch: Batch):
+        """Hand a batch to the first stage, waiting while it is full"""
+        await self.stages[0].put(batch)
+
+    async def drain(self):
+        """Wait until every queued batch has passed through every stage"""
+        for stage in self.stages:
+            await stage.queue.join()
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {stage.name: stage.stats() for stage in self.stages}
@@ -0,0 +1,77 @@
+
+from typing import Dict, Optional
+
+
+class AdaptivePollScheduler:
+    """
+    Chooses the delay before a source's next poll.
+
+    - a poll that came back full (more pages waiting) shortens the interval
+    - empty or failed polls back off exponentially up to max_interval
+    - a normal poll drifts back towards the base interval
+    - the delay never spends the rate-limit budget faster than it refills
+    """
+
+    def __init__(
+        self,
+        base_interval: float,
+        min_interval: Optional[float] = None,
+        max_interval: Optional[float] = None,
+        backoff_factor: float = 2.0,
+        speedup_factor: float = 0.5,
+    ):
+        self.base_interval = base_interval
+        self.min_interval = min_interval if min_interval is not None else min(base_interval, max(1.0, base_interval / 4))
+        self.max_interval = max_interval if max_interval is not None else max(base_interval, min(900.0, base_interval * 16))
+        self.backoff_factor = backoff_factor
+        self.speedup_factor = speedup_factor
+        self.current_interval = base_interval
+        self.last_reason = "base"
+
+    def _clamp(self, value: float) -> float:
+        return min(self.max_interval, max(self.min_interval, value))
+
+    def next_delay(
+        self,
+        post_count: int,
+        saturated: bool = False,
+        failed: bool = False,
+        rate_limit: Optional[Dict[str, Optional[float]]] = None,
+        requests_per_poll: int = 1,
+    ) -> float:
+        if failed:
+            self.current_interval = self._clamp(self.current_interval * self.backoff_factor)
+            self.last_reason = "error"
+        elif saturated:
+            self.current_interval = self._clamp(self.current_interval * self.speedup_factor)
+            self.last_reason = "saturated"
+        elif post_count == 0:
+            self.current_interval = self._clamp(self.current_interval * self.backoff_factor)
+            self.last_reason = "empty"
+        else:
+            # Step back towards the base interval from either side
+            if self.current_interval > self.base_interval:
+                self.current_interval = max(self.base_interval, self.current_interval / self.backoff_factor)
+            elif self.current_interval < self.base_interval:
+                self.current_interval = min(self.base_interval, self.current_interval / self.speedup_factor)
+            self.last_reason = "base"
+
+        delay = self.current_interval
+        budget_delay = self._budget_delay(rate_limit, requests_per_poll)
+        if budget_delay is not None and budget_delay > delay:
+            delay = budget_delay
+            self.last_reason = "rate_limit"
+        return delay
+
+    @staticmethod
+    def _budget_delay(rate_limit: Optional[Dict[str, Optional[float]]], requests_per_poll: int) -> Optional[float]:
+        """Spread the remaining requests evenly over the time left in the window"""
+        if not rate_limit:
+            return None
+        remaining = rate_limit.get("remaining")
+        reset_in = rate_limit.get("reset_in_seconds")
+        if remaining is None or reset_in is None:
+            return None
+        if remaining <= 0:
+            return reset_in
+        return reset_in * max(1, requests_per_poll) / remaining
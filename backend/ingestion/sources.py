@@ -0,0 +1,199 @@
+
+import os
+import logging
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from ingestion.scheduler import AdaptivePollScheduler
+from observability.metrics import SOURCE_FETCH_SECONDS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL_SECONDS = 8
+DEFAULT_TIMEOUT_SECONDS = 20
+
+PostHandler = Callable[["PollingSource", List[Dict[str, Any]]], Awaitable[None]]
+
+
+class PollingSource:
+    """
+    One social media client polled on its own schedule.
+    The client only needs an async fetch_recent_posts() and an is_configured flag.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        client: Any,
+        interval_seconds: float,
+        timeout_seconds: float,
+        scheduler: Optional[AdaptivePollScheduler] = None,
+    ):
+        self.name = name
+        self.client = client
+        self.interval_seconds = interval_seconds
+        self.timeout_seconds = timeout_seconds
+        # Without a scheduler the source sleeps a fixed interval_seconds
+        self.scheduler = scheduler
+        self.last_fetch_failed = False
+        self.stats: Dict[str, Any] = {
+            "mode": "live" if getattr(client, "is_configured", False) else "mock",
+            "interval_seconds": interval_seconds,
+            "timeout_seconds": timeout_seconds,
+            "running": False,
+            "last_run_at": None,
+            "last_duration_ms": None,
+            "last_post_count": 0,
+            "total_fetched": 0,
+            "polls": 0,
+            "errors": 0,
+            "timeouts": 0,
+            "last_error": None,
+            "next_delay_seconds": interval_seconds,
+            "schedule_reason": "fixed" if scheduler is None else "base",
+            "rate_limit": None,
+        }
+
+    async def fetch(self) -> List[Dict[str, Any]]:
+        """Fetch once, bounded by the source timeout; failures return no posts"""
+        started = time.perf_counter()
+        posts: List[Dict[str, Any]] = []
+        self.last_fetch_failed = True
+        outcome = "ok"
+        try:
+            posts = await asyncio.wait_for(self.client.fetch_recent_posts(), self.timeout_seconds)
+            self.last_fetch_failed = False
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            self.stats["timeouts"] += 1
+            self.stats["last_error"] = f"timed out after {self.timeout_seconds}s"
+            logger.warning("Fetch timed out", extra={"source": self.name, "timeout_seconds": self.timeout_seconds})
+        except Exception as e:
+            outcome = "error"
+            self.stats["errors"] += 1
+            self.stats["last_error"] = str(e)
+            logger.error("Error fetching posts: %s", e, extra={"source": self.name})
+
+        self.stats["polls"] += 1
+        self.stats["last_run_at"] = datetime.now().isoformat()
+        duration = time.perf_counter() - started
+        SOURCE_FETCH_SECONDS.observe(duration, self.name, outcome)
+        self.stats["last_duration_ms"] = round(duration * 1000, 1)
+        self.stats["last_post_count"] = len(posts)
+        self.stats["total_fetched"] += len(posts)
+        return posts
+
+    def next_delay(self, post_count: int) -> float:
+        """Seconds to wait before the next poll, given how the last one went"""
+        rate_limit = self.client.rate_limit_status() if hasattr(self.client, "rate_limit_status") else None
+        self.stats["rate_limit"] = rate_limit
+        if self.scheduler is None:
+            return self.interval_seconds
+
+        delay = self.scheduler.next_delay(
+            post_count,
+            saturated=getattr(self.client, "last_fetch_saturated", False),
+            failed=self.last_fetch_failed,
+            rate_limit=rate_limit,
+            requests_per_poll=getattr(self.client, "last_request_count", 1),
+        )
+        self.stats["schedule_reason"] = self.scheduler.last_reason
+        return delay
+
+    async def run(self, handle_posts: PostHandler):
+        """Poll forever; a failing handler never stops the schedule"""
+        self.stats["running"] = True
+        try:
+            while True:
+                posts = await self.fetch()
+                if posts:
+                    try:
+                        await handle_posts(self, posts)
+                    except Exception as e:
+                        self.stats["errors"] += 1
+                        self.stats["last_error"] = str(e)
+                        logger.exception("Error processing posts", extra={"source": self.name})
+                delay = self.next_delay(len(posts))
+                self.stats["next_delay_seconds"] = round(delay, 2)
+                await asyncio.sleep(delay)
+        finally:
+            self.stats["running"] = False
+
+
+class SourceRegistry:
+    """Registered ingestion sources, each polled by its own task"""
+
+    def __init__(self):
+        self._sources: Dict[str, PollingSource] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    def register(
+        self,
+        name: str,
+        client: Any,
+        interval_seconds: Optional[float] = None,
+        timeout_seconds: Optional[float] = None,
+        adaptive: Optional[bool] = None,
+    ) -> PollingSource:
+        """
+        Add a source. Unset intervals come from <NAME>_INGEST_INTERVAL_SECONDS,
+        then REALTIME_INGEST_INTERVAL_SECONDS; timeouts from <NAME>_FETCH_TIMEOUT_SECONDS.
+        Adaptive scheduling (ADAPTIVE_POLLING, on by default) is bounded by
+        <NAME>_MIN_INTERVAL_SECONDS and <NAME>_MAX_INTERVAL_SECONDS
+        """
+        prefix = name.upper()
+        if interval_seconds is None:
+            interval_seconds = float(os.getenv(
+                f"{prefix}_INGEST_INTERVAL_SECONDS",
+                os.getenv("REALTIME_INGEST_INTERVAL_SECONDS", str(DEFAULT_INTERVAL_SECONDS)),
+            ))
+        if timeout_seconds is None:
+            timeout_seconds = float(os.getenv(f"{prefix}_FETCH_TIMEOUT_SECONDS", str(DEFAULT_TIMEOUT_SECONDS)))
+
+        if adaptive is None:
+            adaptive = os.getenv("ADAPTIVE_POLLING", "true").lower() == "true"
+        scheduler = None
+        if adaptive:
+            min_interval = os.getenv(f"{prefix}_MIN_INTERVAL_SECONDS")
+            max_interval = os.getenv(f"{prefix}_MAX_INTERVAL_SECONDS")
+            scheduler = AdaptivePollScheduler(
+                interval_seconds,
+                min_interval=float(min_interval) if min_interval else None,
+                max_interval=float(max_interval) if max_interval else None,
+            )
+
+        source = PollingSource(name, client, interval_seconds, timeout_seconds, scheduler)
+        self._sources[name] = source
+        return source
+
+    def get(self, name: str) -> Optional[PollingSource]:
+        return self._sources.get(name)
+
+    def __iter__(self):
+        return iter(list(self._sources.values()))
+
+    def __len__(self):
+        return len(self._sources)
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._sources)
+
+    def start(self, handle_posts: PostHandler) -> List[asyncio.Task]:
+        """Start one polling task per source"""
+        self._tasks = [
+            asyncio.create_task(source.run(handle_posts), name=f"ingest-{source.name}")
+            for source in self
+        ]
+        return self._tasks
+
+    async def poll_once(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Fetch every source concurrently once, keyed by source name"""
+        sources = list(self)
+        results = await asyncio.gather(*(source.fetch() for source in sources))
+        return {source.name: posts for source, posts in zip(sources, results)}
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: dict(source.stats) for name, source in self._sources.items()}
@@ -1,19 +1,48 @@
 import os
 import uvicorn
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import Depends, FastAPI, Header, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import PlainTextResponse, Response
+from pydantic import BaseModel, ValidationError
 from typing import List, Dict, Any, Optional
 import asyncio
+import hmac
+import json
+import logging
+import time
 from datetime import datetime, timedelta
 
-# Twitter agent client (from agent-twitter-client)
+# Social media clients
 from social_media.twitter_client import TwitterClient
+from social_media.facebook_client import FacebookClient
+from ingestion.sources import PollingSource, SourceRegistry
+from ingestion.pipeline import IngestionPipeline, Stage
+from ingestion.dedup import SeenIdFilter
+from ingestion.enrichment import LOCATION_COORDS, enrich_posts
+from ingestion.ids import new_ulid
+from realtime.aggregates import LiveAggregates
+from realtime.broadcaster import Broadcaster
+from realtime.framing import resolve_protocol
+from realtime.subscriptions import FILTER_FIELDS, Subscription, post_priority
+from cluster.bus import WORKER_JOINED, BusBroker, BusClient, LocalBus
+from cluster.leader import LeaderElection
 # ML modules
 from ml.sentiment_analyzer import SentimentAnalyzer
 from ml.category_classifier import CategoryClassifier
+from ml.text_preprocessing import preprocess_all
 # Database manager
 from db.database import DatabaseManager
+from analytics.time_range import resolve_time_range
+from analytics.spikes import SpikeDetector
+from analytics.trending import TrendingTracker
+from db.group_commit import GroupCommitWriter
+from observability.metrics import CONTENT_TYPE, HTTP_REQUEST_SECONDS, INGESTION_LAG_SECONDS, REGISTRY, HTTPMetricsMiddleware
+from observability.profiler import ProfilingMiddleware, SamplingProfiler
+from observability.log import correlated, setup_logging
+
+# JSON lines on stdout, written from a background thread; LOG_LEVEL / LOG_FORMAT
+setup_logging()
+logger = logging.getLogger("citypulse")
 
 app = FastAPI(title="TamilNadu CityPulse API")
 
@@ -25,15 +54,53 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(HTTPMetricsMiddleware, histogram=HTTP_REQUEST_SECONDS)
+# Off until switched on through /admin/profiler
+profiler = SamplingProfiler()
+app.add_middleware(ProfilingMiddleware, profiler=profiler)
 
 # Initialize components
 sentiment_analyzer = SentimentAnalyzer()
 category_classifier = CategoryClassifier()
 db_manager = DatabaseManager()
-# Twitter agent
+# Social media clients, each polled on its own schedule
 twitter_client = TwitterClient()
-# Connected WebSocket clients
-connected_clients: List[WebSocket] = []
+facebook_client = FacebookClient()
+source_registry = SourceRegistry()
+enabled_sources = {
+    name.strip().lower()
+    for name in os.getenv("INGEST_SOURCES", "twitter,facebook").split(",")
+    if name.strip()
+}
+if "twitter" in enabled_sources:
+    source_registry.register("twitter", twitter_client)
+if "facebook" in enabled_sources:
+    source_registry.register("facebook", facebook_client)
+# Rejects already-stored post IDs in memory before they reach the models or the DB
+seen_ids = SeenIdFilter(
+    capacity=int(os.getenv("SEEN_FILTER_CAPACITY", "1000000")),
+    recent_size=int(os.getenv("SEEN_FILTER_RECENT_SIZE", "50000")),
+)
+# Connected WebSocket clients, each with its own bounded send queue
+broadcaster = Broadcaster()
+# Running dashboard totals pushed as deltas on /ws/aggregates. A client that
+# falls behind is disconnected rather than silently missing a delta; it gets a
+# fresh snapshot when it reconnects.
+live_aggregates = LiveAggregates()
+aggregate_broadcaster = Broadcaster(policy="disconnect", name="aggregates")
+# Top issues and key phrases over sliding windows, kept in bounded memory and
+# updated per ingestion batch, so /trending never scans posts
+trending = TrendingTracker.from_env()
+# Per location x category EWMA of negative posts, checked per ingestion batch;
+# spikes are listed in /notifications and pushed to /ws clients as they happen
+spike_detector = SpikeDetector.from_env(on_alert=lambda alert: push_spike_alert(alert))
+# With CLUSTER_MODE=true several uvicorn workers share the work: one worker,
+# elected through a file lock, polls the sources and runs the hourly rollup,
+# and every worker publishes new posts on a Unix-socket bus so dashboards on
+# any worker receive them. A single worker uses the in-process bus.
+cluster_mode = os.getenv("CLUSTER_MODE", "false").lower() == "true"
+bus_broker = BusBroker(os.getenv("CLUSTER_BUS_SOCKET", "cluster-bus.sock")) if cluster_mode else None
+live_bus = BusClient(os.getenv("CLUSTER_BUS_SOCKET", "cluster-bus.sock")) if cluster_mode else LocalBus()
 ingestion_state: Dict[str, Any] = {
     "running": False,
     "mode": "mock",
@@ -43,19 +110,6 @@ ingestion_state: Dict[str, Any] = {
     "total_processed": 0,
 }
 
-LOCATION_COORDS = {
-    "Chennai": (13.0827, 80.2707),
-    "Coimbatore": (11.0168, 76.9558),
-    "Madurai": (9.9252, 78.1198),
-    "Trichy": (10.7905, 78.7047),
-    "Tiruchirappalli": (10.7905, 78.7047),
-    "Salem": (11.6643, 78.1460),
-    "Tirunelveli": (8.7139, 77.7567),
-    "Thoothukudi": (8.7642, 78.1348),
-    "Nagercoil": (8.1833, 77.4119),
-    "Tamil Nadu": (11.1271, 78.6569),
-}
-
 SEED_POSTS = [
     ("seed-1", "Twitter", "The new metro extension in Chennai is making my commute so much easier!", "Chennai", "positive", "transportation"),
     ("seed-2", "Facebook", "Garbage has not been collected in Adyar for the third day in a row.", "Chennai", "negative", "waste"),
@@ -86,6 +140,29 @@ class GrievanceSubmission(BaseModel):
     area: str
     district: str
 
+class GrievanceBatch(BaseModel):
+    # Validated one by one so a bad item doesn't reject the whole batch
+    grievances: List[Any]
+
+class GrievanceBatchItem(BaseModel):
+    index: int
+    status: str
+    id: Optional[str] = None
+    error: Optional[str] = None
+
+class GrievanceBatchResult(BaseModel):
+    stored: int
+    invalid: int
+    failed: int
+    results: List[GrievanceBatchItem]
+
+class ProfilerSettings(BaseModel):
+    enabled: bool
+    sample_rate: float = 0.05
+    route: Optional[str] = None
+    interval_ms: float = 5
+    min_duration_ms: float = 0
+
 class DashboardNotification(BaseModel):
     title: str
     detail: str
@@ -135,10 +212,41 @@ class AnalyticsOverview(BaseModel):
 @app.on_event("startup")
 async def startup_event():
     await seed_demo_data()
+    await hydrate_seen_ids()
+    await load_live_aggregates()
+    await load_trending()
+    await load_spike_detector()
+    await live_bus.start()
+    # Grievances can arrive at any worker
+    grievance_pipeline.start()
+    if leader_election is not None:
+        asyncio.create_task(leader_election.run())
+    else:
+        await start_leader_duties()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await grievance_writer.close()
+    await grievance_pipeline.stop()
+    await live_bus.stop()
+    if bus_broker is not None:
+        await bus_broker.stop()
+
+async def start_leader_duties():
+    """Work that must run in exactly one worker."""
+    if cluster_mode:
+        await bus_broker.start()
+        # Another worker may have stored posts since this one started
+        await hydrate_seen_ids()
     if os.getenv("ENABLE_BACKGROUND_JOBS", "true").lower() == "true":
         asyncio.create_task(process_social_media_stream())
         asyncio.create_task(aggregate_trends_hourly())
 
+leader_election = (
+    LeaderElection(os.getenv("CLUSTER_LOCK_FILE", "cluster-leader.lock"), start_leader_duties)
+    if cluster_mode else None
+)
+
 @app.get("/")
 async def root():
     return {"name": "TamilNadu CityPulse API", "status": "ok"}
@@ -147,14 +255,144 @@ async def root():
 async def health():
     return {"status": "ok"}
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text format; each worker reports its own process."""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Admin endpoints need X-Admin-Token to match ADMIN_TOKEN; without ADMIN_TOKEN they don't exist."""
+    expected = os.getenv("ADMIN_TOKEN")
+    if not expected:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, expected):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@app.get("/admin/profiler", dependencies=[Depends(require_admin)])
+async def get_profiler():
+    return profiler.stats()
+
+@app.post("/admin/profiler", dependencies=[Depends(require_admin)])
+async def configure_profiler(settings: ProfilerSettings):
+    """Sample a fraction of requests (optionally only one route) until disabled again."""
+    profiler.configure(
+        settings.enabled,
+        sample_rate=settings.sample_rate,
+        route=settings.route,
+        interval_ms=settings.interval_ms,
+        min_duration_ms=settings.min_duration_ms,
+    )
+    return profiler.stats()
+
+@app.post("/admin/profiler/ingestion", dependencies=[Depends(require_admin)])
+async def profile_ingestion(seconds: float = 30):
+    """Profile the background ingestion tasks for the next few seconds."""
+    profiler.start_ingestion(min(max(seconds, 1), 600))
+    return profiler.stats()
+
+@app.get("/admin/profiles", dependencies=[Depends(require_admin)])
+async def list_profiles():
+    return list(profiler.recent)
+
+@app.get("/admin/profiles/{name}", dependencies=[Depends(require_admin)], response_class=PlainTextResponse)
+async def get_profile(name: str):
+    folded = profiler.read(name)
+    if folded is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return folded
+
 @app.get("/ingestion-status")
 async def ingestion_status():
     return {
         **ingestion_state,
-        "connected_clients": len(connected_clients),
+        "connected_clients": len(broadcaster),
+        "websocket": broadcaster.stats(),
+        "aggregate_stream": aggregate_broadcaster.stats(),
         "twitter_configured": twitter_client.is_configured,
+        "facebook_configured": facebook_client.is_configured,
+        "sources": source_registry.stats(),
+        "pipeline": ingestion_pipeline.stats(),
+        "grievances": {"writer": grievance_writer.stats(), "pipeline": grievance_pipeline.stats()},
+        "dedup": seen_ids.stats(),
+        "trending": trending.stats(),
+        "spikes": spike_detector.stats(),
+        "cluster": cluster_status(),
+    }
+
+def cluster_status() -> Dict[str, Any]:
+    if not cluster_mode:
+        return {"enabled": False, "role": "leader", "worker_pid": os.getpid(), "bus": live_bus.stats()}
+    return {
+        "enabled": True,
+        "role": "leader" if leader_election.is_leader else "follower",
+        "worker_pid": os.getpid(),
+        "bus": live_bus.stats(),
+        "broker": bus_broker.stats() if leader_election.is_leader else None,
     }
 
+def update_ingestion_state(state: Dict[str, Any]):
+    """Followers mirror the leader's ingestion counters."""
+    ingestion_state.update(state)
+
+def announce_ingestion_state(worker_pid: int):
+    """The leader sends its counters to workers joining the bus."""
+    if leader_election is not None and leader_election.is_leader:
+        live_bus.publish("ingestion", dict(ingestion_state))
+
+# The load in progress, shared by startup and /ws/aggregates connects
+live_aggregates_loading: Dict[str, asyncio.Task] = {}
+
+async def load_live_aggregates():
+    """Seed the totals from GROUP BY counts, one load at a time; afterwards they are updated per batch."""
+    task = live_aggregates_loading.get("task")
+    if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+        task = live_aggregates_loading["task"] = asyncio.create_task(_load_live_aggregates())
+    await asyncio.shield(task)
+
+async def _load_live_aggregates():
+    counts = await db_manager.get_live_aggregate_counts()
+    if counts is not None:
+        live_aggregates.load_counts(counts["groups"], counts["trend"])
+
+def publish_aggregates(records: List[Dict[str, Any]]):
+    """Fold newly stored posts into the live totals and push the delta."""
+    if live_aggregates.loaded and records:
+        aggregate_broadcaster.publish(live_aggregates.apply(records))
+
+async def load_trending():
+    """Count the posts of the last two longest windows, so /trending can compare windows right away."""
+    since = datetime.now() - timedelta(seconds=2 * trending.longest_window_seconds)
+    trending.load(await db_manager.get_posts(limit=None, filters={}, since=since))
+
+async def load_spike_detector():
+    """Replay recent posts so the per-bucket averages are meaningful from the first batch."""
+    since = datetime.now() - timedelta(seconds=spike_detector.warmup_seconds)
+    spike_detector.load(await db_manager.get_posts(limit=None, filters={"sentiment": "negative"}, since=since))
+
+def push_spike_alert(alert: Dict[str, Any]):
+    """Send a newly detected spike to the /ws clients whose subscription covers its location and category."""
+    logger.warning("Negative signal spike", extra=alert)
+    # Scoped like the negative posts behind it, so a client watching other
+    # locations or categories is not told about it
+    broadcaster.publish(
+        {"type": "alert", "alert": alert},
+        scope={"location": alert["location"], "category": alert["category"], "sentiment": "negative"},
+    )
+
+def spike_notification(alert: Dict[str, Any]) -> DashboardNotification:
+    minutes = round(alert["bucket_seconds"] / 60)
+    return DashboardNotification(
+        title=f"Spike: {alert['category']} in {alert['location']}",
+        detail=f"{alert['count']} negative signal(s) in {minutes} min from {alert['bucket_start'][11:16]}, against {alert['expected']} expected (z={alert['zscore']}).",
+        level="warning",
+    )
+
+async def hydrate_seen_ids():
+    """Load the most recent stored IDs so the first polls after a restart skip them."""
+    recent_ids = await db_manager.get_recent_post_ids(seen_ids.recent_size)
+    # Oldest first, so the newest IDs end up most recently used
+    seen_ids.add_many(reversed(recent_ids))
+
 async def seed_demo_data():
     """Ensure fresh demo data exists so a deployed dashboard is useful immediately."""
     existing_posts = await db_manager.get_posts(limit=1, filters={})
@@ -182,57 +420,164 @@ async def seed_demo_data():
         await db_manager.aggregate_hourly_trends(start, end)
 
 async def process_social_media_stream():
-    """Collect, analyze, store, aggregate, and broadcast new civic posts."""
+    """Poll every registered source concurrently and feed the staged pipeline."""
     interval_seconds = int(os.getenv("REALTIME_INGEST_INTERVAL_SECONDS", "8"))
+    live_sources = [source.name for source in source_registry if source.stats["mode"] == "live"]
     ingestion_state["interval_seconds"] = interval_seconds
-    ingestion_state["mode"] = "twitter" if twitter_client.is_configured else "mock"
+    ingestion_state["mode"] = "+".join(live_sources) if live_sources else "mock"
     ingestion_state["running"] = True
+    live_bus.publish("ingestion", dict(ingestion_state))
 
-    while True:
-        now = datetime.now()
-        print(f"[{now}] Collecting social posts...")
+    ingestion_pipeline.start()
+    try:
+        await asyncio.gather(*source_registry.start(handle_source_posts))
+    finally:
+        ingestion_state["running"] = False
+        live_bus.publish("ingestion", dict(ingestion_state))
+        await ingestion_pipeline.stop()
+
+async def drop_stored_posts(posts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Reject already-stored posts before analysis; only IDs the Bloom filter can't rule out are looked up."""
+    posts, maybe = seen_ids.screen(posts)
+    if not maybe:
+        return posts
+    stored = await db_manager.get_existing_ids(sorted(maybe))
+    seen_ids.mark_stored(stored)
+    return [post for post in posts if str(post['id']) not in stored]
+
+async def handle_source_posts(source: PollingSource, posts: List[Dict[str, Any]]):
+    """Fetch stage: hand a source's new posts to the pipeline, waiting if analysis is backed up."""
+    posts = await drop_stored_posts(posts)
+    if not posts:
+        return
+    for post in posts:
+        post.setdefault('platform', source.name.title())
+    # One ID per fetched batch; every stage logs with it
+    with correlated([f"{source.name}-{new_ulid()}"]):
+        if logger.isEnabledFor(logging.DEBUG):
+            # Ties each post ID to the batch ID the later stages log
+            logger.debug("Fetched new posts", extra={
+                "source": source.name, "count": len(posts), "post_ids": [post.get('id') for post in posts],
+            })
+        await ingestion_pipeline.submit(posts)
+
+def _analyse_batch(posts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return enrich_posts(posts, sentiment_analyzer, category_classifier)
+
+async def analyse_posts(posts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Analyse stage: run the ML models off the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, _analyse_batch, posts)
+
+async def persist_posts(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Persist stage: store records in one transaction and forward only the new ones."""
+    inserted_ids = await db_manager.store_posts(records)
+    if inserted_ids is None:
+        return []
+    # Everything in the batch is now in the DB, whether inserted here or before
+    seen_ids.add_many(record['id'] for record in records)
+    inserted = set(inserted_ids)
+    new_records = [record for record in records if record['id'] in inserted]
+    observe_ingestion_lag(new_records)
+    return new_records
+
+def observe_ingestion_lag(records: List[Dict[str, Any]]):
+    """How long after being posted each record reached the DB."""
+    now = time.time()
+    for record in records:
         try:
-            tweets = await twitter_client.fetch_recent_posts()
-            processed = []
-            for t in tweets:
-                sentiment = sentiment_analyzer.analyze(t['content'])
-                category = category_classifier.classify(t['content'])
-                loc = t.get('location')
-                lat, lon = LOCATION_COORDS.get(loc, LOCATION_COORDS["Tamil Nadu"])
-                record = {
-                    'id': t['id'],
-                    'platform': t.get('platform', 'Twitter'),
-                    'content': t['content'],
-                    'timestamp': t['timestamp'],
-                    'location': loc,
-                    'latitude': lat,
-                    'longitude': lon,
-                    'sentiment': sentiment,
-                    'category': category
-                }
-                stored = await db_manager.store_post(record)
-                if stored:
-                    processed.append(record)
-
-            if processed:
-                hour_start = now.replace(minute=0, second=0, microsecond=0)
-                await db_manager.aggregate_hourly_trends(hour_start, datetime.now())
-
-            ingestion_state["last_run_at"] = datetime.now().isoformat()
-            ingestion_state["last_post_count"] = len(processed)
-            ingestion_state["total_processed"] += len(processed)
-
-            if processed and connected_clients:
-                for ws in list(connected_clients):
-                    try:
-                        await ws.send_json(processed)
-                    except:
-                        connected_clients.remove(ws)
-
-            print(f"[{now}] Processed {len(processed)} social posts")
-        except Exception as e:
-            print(f"Error fetching/processing tweets: {e}")
-        await asyncio.sleep(interval_seconds)
+            posted_at = datetime.fromisoformat(str(record['timestamp'])).timestamp()
+        except ValueError:
+            continue
+        INGESTION_LAG_SECONDS.observe(max(0.0, now - posted_at), record.get('platform') or 'unknown')
+
+async def aggregate_posts(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Aggregate stage: one trend rollup for everything that queued up meanwhile."""
+    now = datetime.now()
+    hour_start = now.replace(minute=0, second=0, microsecond=0)
+    await db_manager.aggregate_hourly_trends(hour_start, now)
+
+    ingestion_state["last_run_at"] = now.isoformat()
+    ingestion_state["last_post_count"] = len(records)
+    ingestion_state["total_processed"] += len(records)
+    live_bus.publish("aggregates", records)
+    live_bus.publish("ingestion", dict(ingestion_state))
+    logger.info("Processed social posts", extra={"count": len(records), "total_processed": ingestion_state["total_processed"]})
+    return records
+
+async def broadcast_posts(records: List[Dict[str, Any]]) -> None:
+    """Broadcast stage: queue new posts for connected dashboards on every worker."""
+    live_bus.publish("posts", records)
+    logger.debug("Broadcast posts", extra={"count": len(records), "clients": len(broadcaster)})
+
+# fetch -> analyse -> persist -> aggregate -> broadcast. Fetching blocks when
+# analysis is backed up (posts are never lost); aggregation and broadcast
+# coalesce whatever queued up, and a backed-up broadcast drops the oldest
+# batches since the posts are already stored.
+ingestion_pipeline = IngestionPipeline([
+    Stage.from_env("analyse", analyse_posts, queue_size=50),
+    Stage.from_env("persist", persist_posts, queue_size=50),
+    Stage.from_env("aggregate", aggregate_posts, queue_size=100, coalesce=True),
+    Stage.from_env("broadcast", broadcast_posts, queue_size=100, overflow="drop_oldest", coalesce=True),
+])
+
+async def aggregate_grievances(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Grievance aggregate stage: one trend rollup for every grievance committed meanwhile."""
+    earliest = min(datetime.fromisoformat(record['timestamp']) for record in records)
+    await db_manager.aggregate_hourly_trends(earliest.replace(minute=0, second=0, microsecond=0), datetime.now())
+    live_bus.publish("aggregates", records)
+    return records
+
+async def after_grievance_commit(records: List[Dict[str, Any]]):
+    """Hand committed grievances to the background stages; inline when they aren't running."""
+    with correlated([record['id'] for record in records]):
+        if grievance_pipeline.running:
+            await grievance_pipeline.submit(records)
+        else:
+            await broadcast_posts(await aggregate_grievances(records))
+
+# Grievance intake: submissions are committed in groups and answered as soon
+# as their transaction commits; trend rollups and broadcasts happen afterwards,
+# coalesced across everything committed meanwhile.
+grievance_writer = GroupCommitWriter(lambda records: db_manager.store_posts(records), after_grievance_commit)
+grievance_pipeline = IngestionPipeline([
+    Stage.from_env("grievance_aggregate", aggregate_grievances, queue_size=100, coalesce=True),
+    Stage.from_env("grievance_broadcast", broadcast_posts, queue_size=100, overflow="drop_oldest", coalesce=True),
+])
+
+# Values already tracked elsewhere, read when /metrics is scraped
+REGISTRY.gauge(
+    "citypulse_ws_clients", "Connected WebSocket clients",
+    lambda: {("posts",): len(broadcaster), ("aggregates",): len(aggregate_broadcaster)}, ("stream",))
+REGISTRY.gauge(
+    "citypulse_ws_queue_depth_max", "Deepest per-client send queue",
+    lambda: {(name,): stream.stats()["queue_depth_max"] for name, stream in (("posts", broadcaster), ("aggregates", aggregate_broadcaster))},
+    ("stream",))
+REGISTRY.gauge(
+    "citypulse_pipeline_queue_depth", "Batches waiting in each pipeline stage",
+    lambda: {
+        (name, stage): stats["queue_depth"]
+        for name, pipeline in (("ingestion", ingestion_pipeline), ("grievances", grievance_pipeline))
+        for stage, stats in pipeline.stats().items()
+    },
+    ("pipeline", "stage"))
+REGISTRY.gauge(
+    "citypulse_grievance_commit_pending", "Grievances waiting for the next group commit",
+    lambda: grievance_writer.stats()["pending"])
+REGISTRY.counter(
+    "citypulse_posts_processed_total", "Posts stored by the ingestion pipeline",
+    lambda: ingestion_state["total_processed"])
+REGISTRY.counter(
+    "citypulse_duplicate_posts_total", "Fetched posts rejected as already stored",
+    lambda: seen_ids.stats()["rejected"])
+
+# Every worker delivers bus messages to its own dashboards
+live_bus.subscribe("posts", broadcaster.publish)
+live_bus.subscribe("aggregates", publish_aggregates)
+live_bus.subscribe("aggregates", trending.add_posts)
+live_bus.subscribe("aggregates", spike_detector.add_posts)
+live_bus.subscribe("ingestion", update_ingestion_state)
+live_bus.subscribe(WORKER_JOINED, announce_ingestion_state)
 
 async def aggregate_trends_hourly():
     """Aggregate sentiment trends hourly"""
@@ -240,11 +585,11 @@ async def aggregate_trends_hourly():
         now = datetime.now()
         start = now - timedelta(hours=1)
         try:
-            print(f"[{now}] Aggregating hourly trends...")
+            started = time.perf_counter()
             await db_manager.aggregate_hourly_trends(start, now)
-            print(f"[{now}] Aggregation done")
-        except Exception as e:
-            print(f"Error in aggregation: {e}")
+            logger.info("Aggregated hourly trends", extra={"duration_ms": round((time.perf_counter() - started) * 1000, 1)})
+        except Exception:
+            logger.exception("Error in hourly aggregation")
         # sleep until next hour
         nxt = now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
         await asyncio.sleep((nxt - now).total_seconds())
@@ -252,12 +597,77 @@ async def aggregate_trends_hourly():
 @app.websocket("/ws")
 async def websocket_endpoint(ws: WebSocket):
     await ws.accept()
-    connected_clients.append(ws)
+    client = await broadcaster.connect(ws)
+    params = dict(ws.query_params)
+    # Opt-in compact framing and coalescing, e.g. /ws?protocol=msgpack&window_ms=250
+    if "protocol" in params or "window_ms" in params:
+        configure_client(client, params)
+    # Filters can be given up front, e.g. /ws?location=Chennai&category=water,waste
+    if any(key in params for key in (*FILTER_FIELDS, "min_priority")):
+        handle_client_message(client, {"type": "subscribe", **params})
     try:
         while True:
-            await ws.receive_text()
+            text = await ws.receive_text()
+            try:
+                message = json.loads(text)
+            except ValueError:
+                continue
+            if isinstance(message, dict):
+                handle_client_message(client, message)
     except WebSocketDisconnect:
-        connected_clients.remove(ws)
+        pass
+    finally:
+        await broadcaster.disconnect(client)
+
+@app.websocket("/ws/aggregates")
+async def aggregates_websocket_endpoint(ws: WebSocket):
+    """Dashboard totals: a snapshot on connect, then one delta per ingestion batch."""
+    await ws.accept()
+    if not live_aggregates.loaded:
+        await load_live_aggregates()
+    client = await aggregate_broadcaster.connect(ws)
+    aggregate_broadcaster.send(client, live_aggregates.snapshot())
+    try:
+        while True:
+            text = await ws.receive_text()
+            try:
+                message = json.loads(text)
+            except ValueError:
+                continue
+            # Clients that detect a gap in seq ask for a fresh snapshot
+            if isinstance(message, dict) and message.get("type") == "snapshot":
+                aggregate_broadcaster.send(client, live_aggregates.snapshot())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await aggregate_broadcaster.disconnect(client)
+
+def configure_client(client, params: Dict[str, str]):
+    """Switch a /ws client to a compact protocol and/or a coalescing window, then greet it."""
+    try:
+        protocol = resolve_protocol(params.get("protocol"))
+        default_window = os.getenv("WS_COALESCE_WINDOW_MS", "250") if protocol != "json" else "0"
+        window_ms = min(5000.0, max(0.0, float(params.get("window_ms", default_window))))
+    except ValueError as e:
+        broadcaster.send(client, {"type": "error", "detail": str(e)})
+        return
+    client.configure(protocol, window_ms / 1000)
+    broadcaster.send(client, {"type": "hello", "protocol": protocol, "window_ms": window_ms})
+
+def handle_client_message(client, message: Dict[str, Any]):
+    """Apply a subscribe/unsubscribe message from a dashboard and acknowledge it."""
+    message_type = message.get("type")
+    if message_type == "unsubscribe":
+        broadcaster.subscribe(client, Subscription())
+        broadcaster.send(client, {"type": "subscribed", "filters": {}})
+    elif message_type == "subscribe":
+        try:
+            subscription = Subscription.parse(message)
+        except ValueError as e:
+            broadcaster.send(client, {"type": "error", "detail": str(e)})
+            return
+        broadcaster.subscribe(client, subscription)
+        broadcaster.send(client, {"type": "subscribed", "filters": subscription.to_dict()})
 
 @app.get("/posts", response_model=List[SocialMediaPost])
 async def get_posts(
@@ -284,11 +694,15 @@ async def get_notifications():
     negative_count = sum(1 for post in recent_posts if post.get("sentiment") == "negative")
     portal_count = sum(1 for post in recent_posts if post.get("platform") == "Citizen Portal")
     active_sources = sorted({post.get("platform") for post in posts if post.get("platform")})
+    spikes = [
+        spike_notification(alert)
+        for alert in spike_detector.recent_alerts(float(os.getenv("SPIKE_ALERT_TTL_SECONDS", "3600")))
+    ]
 
-    return [
+    return spikes + [
         DashboardNotification(
             title="Live pipeline",
-            detail=f"{ingestion_state['mode'].title()} ingestion is {'running' if ingestion_state['running'] else 'offline'} with {len(connected_clients)} live client(s).",
+            detail=f"{ingestion_state['mode'].title()} ingestion is {'running' if ingestion_state['running'] else 'offline'} with {len(broadcaster)} live client(s).",
             level="success" if ingestion_state["running"] else "warning",
         ),
         DashboardNotification(
@@ -306,17 +720,13 @@ async def get_notifications():
 @app.get("/message-queue", response_model=List[MessageQueueItem])
 async def get_message_queue(limit: int = 5):
     posts = await db_manager.get_posts(limit=None, filters={})
-    critical_categories = {"safety", "water", "infrastructure", "waste"}
-    priority_posts = [
-        post for post in posts
-        if post.get("sentiment") == "negative" or post.get("category") in critical_categories
-    ]
+    priority_posts = [post for post in posts if post_priority(post) != "low"]
 
     items = []
     for post in priority_posts[:limit]:
         category = post.get("category") or "general"
         location = post.get("location") or "Tamil Nadu"
-        priority = "high" if post.get("sentiment") == "negative" else "normal"
+        priority = post_priority(post)
         items.append(MessageQueueItem(
             id=str(post.get("id")),
             title=f"{category.title()} signal in {location}",
@@ -329,13 +739,24 @@ async def get_message_queue(limit: int = 5):
 
     return items
 
+def time_range(since: Optional[str], until: Optional[str], window: Optional[str]) -> tuple:
+    """The [since, until) range of an analytics request, e.g. ?window=24h or ?since=2024-03-01"""
+    try:
+        return resolve_time_range(since, until, window)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @app.get("/geo-analytics", response_model=GeoAnalytics)
 async def get_geo_analytics(
     category: Optional[str] = None,
     sentiment: Optional[str] = None,
     platform: Optional[str] = None,
     limit: int = 12,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    window: Optional[str] = None,
 ):
+    start, end = time_range(since, until, window)
     filters: Dict[str, Any] = {}
     if category:
         filters["category"] = category
@@ -344,7 +765,7 @@ async def get_geo_analytics(
     if platform:
         filters["platform"] = platform
 
-    posts = await db_manager.get_posts(limit=None, filters=filters)
+    posts = await db_manager.get_posts(limit=None, filters=filters, since=start, until=end)
     mapped_posts = [
         post for post in posts
         if post.get("latitude") is not None and post.get("longitude") is not None
@@ -454,8 +875,9 @@ async def get_geo_analytics(
     )
 
 @app.get("/analytics-overview", response_model=AnalyticsOverview)
-async def get_analytics_overview():
-    posts = await db_manager.get_posts(limit=None, filters={})
+async def get_analytics_overview(since: Optional[str] = None, until: Optional[str] = None, window: Optional[str] = None):
+    start, end = time_range(since, until, window)
+    posts = await db_manager.get_posts(limit=None, filters={}, since=start, until=end)
     sentiments = ("positive", "neutral", "negative")
     sentiment_totals = {sentiment: 0 for sentiment in sentiments}
     category_sentiment: Dict[str, Dict[str, Any]] = {}
@@ -536,34 +958,98 @@ async def get_analytics_overview():
         )[:10],
     )
 
-@app.post("/grievances", response_model=SocialMediaPost)
-async def submit_grievance(grievance: GrievanceSubmission):
-    now = datetime.now()
+def grievance_record(grievance: GrievanceSubmission, sentiment: str, now: datetime, category: Optional[str] = None) -> Dict[str, Any]:
     location = grievance.district.title()
     lat, lon = LOCATION_COORDS.get(location, LOCATION_COORDS["Tamil Nadu"])
-    record = {
-        "id": f"portal-{int(now.timestamp())}",
+    return {
+        "id": f"portal-{new_ulid()}",
         "platform": "Citizen Portal",
         "content": grievance.content,
         "timestamp": now.isoformat(),
         "location": grievance.area or location,
         "latitude": lat,
         "longitude": lon,
-        "sentiment": sentiment_analyzer.analyze(grievance.content),
-        "category": grievance.category,
+        "sentiment": sentiment,
+        "category": category or grievance.category,
     }
 
-    await db_manager.store_post(record)
-    hour_start = now.replace(minute=0, second=0, microsecond=0)
-    await db_manager.aggregate_hourly_trends(hour_start, datetime.now())
+def submitted_category(grievance: GrievanceSubmission) -> Optional[str]:
+    """The category a citizen picked; None when left blank, for the classifier to fill in"""
+    return grievance.category.strip() or None
+
+def _analyse_grievances(grievances: List[GrievanceSubmission]) -> tuple:
+    """Sentiment for every grievance, and a category for those submitted without one"""
+    texts = preprocess_all(grievance.content for grievance in grievances)
+    sentiments = sentiment_analyzer.analyze_batch(texts)
+    categories = [submitted_category(grievance) for grievance in grievances]
+    missing = [index for index, category in enumerate(categories) if category is None]
+    if missing:
+        classified = category_classifier.classify_batch([texts[index] for index in missing])
+        for index, category in zip(missing, classified):
+            categories[index] = category
+    return sentiments, categories
+
+@app.post("/grievances", response_model=SocialMediaPost)
+async def submit_grievance(grievance: GrievanceSubmission):
+    # Same rules as /grievances/batch, including classifying a blank category
+    (sentiment,), (category,) = await asyncio.get_running_loop().run_in_executor(None, _analyse_grievances, [grievance])
+    record = grievance_record(grievance, sentiment, datetime.now(), category)
+    if not await grievance_writer.write(record):
+        raise HTTPException(status_code=503, detail="Grievance could not be stored, please retry")
+    return SocialMediaPost(**record)
 
-    for ws in list(connected_clients):
+@app.post("/grievances/batch", response_model=GrievanceBatchResult)
+async def submit_grievance_batch(batch: GrievanceBatch):
+    """Bulk intake for helpdesks and gateways: one analysis pass, one transaction, one broadcast."""
+    max_items = int(os.getenv("GRIEVANCE_BATCH_MAX_ITEMS", "5000"))
+    if len(batch.grievances) > max_items:
+        raise HTTPException(status_code=413, detail=f"At most {max_items} grievances per batch")
+
+    results: List[GrievanceBatchItem] = []
+    valid: List[tuple] = []
+    for index, item in enumerate(batch.grievances):
         try:
-            await ws.send_json([record])
-        except:
-            connected_clients.remove(ws)
+            valid.append((index, GrievanceSubmission.model_validate(item)))
+        except ValidationError as e:
+            results.append(GrievanceBatchItem(index=index, status="invalid", error=str(e.errors()[0]["msg"])))
+
+    records: List[Dict[str, Any]] = []
+    if valid:
+        loop = asyncio.get_running_loop()
+        sentiments, categories = await loop.run_in_executor(
+            None, _analyse_grievances, [grievance for _, grievance in valid]
+        )
+        now = datetime.now()
+        records = [
+            grievance_record(grievance, sentiment, now, category)
+            for (_, grievance), sentiment, category in zip(valid, sentiments, categories)
+        ]
+
+    inserted_ids = await db_manager.store_posts(records) if records else []
+    inserted = set(inserted_ids or ())
+    for (index, _), record in zip(valid, records):
+        stored = record["id"] in inserted
+        results.append(GrievanceBatchItem(index=index, status="stored" if stored else "failed", id=record["id"] if stored else None))
+    if inserted:
+        await after_grievance_commit([record for record in records if record["id"] in inserted])
+
+    results.sort(key=lambda item: item.index)
+    return GrievanceBatchResult(
+        stored=len(inserted),
+        invalid=len(batch.grievances) - len(valid),
+        failed=len(valid) - len(inserted),
+        results=results,
+    )
 
-    return SocialMediaPost(**record)
+@app.get("/trending")
+async def get_trending(window: Optional[str] = None, limit: int = 10, sort: str = "count"):
+    """Top issues (category x location) and key phrases of a tracked window, answered from memory."""
+    window = window or next(iter(trending.windows))
+    if window not in trending.windows:
+        raise HTTPException(status_code=400, detail=f"window must be one of {', '.join(trending.windows)}")
+    if sort not in ("count", "rising"):
+        raise HTTPException(status_code=400, detail="sort must be count or rising")
+    return trending.top(window, min(max(limit, 1), 50), sort)
 
 @app.get("/trend-data")
 async def get_trend_data(days: int = 7):
@@ -582,42 +1068,37 @@ async def get_historical_trends(
     return await db_manager.get_historical_trends(start, end, interval)
 
 @app.get("/category-data")
-async def get_category_data():
-    return await db_manager.get_category_counts()
+async def get_category_data(since: Optional[str] = None, until: Optional[str] = None, window: Optional[str] = None):
+    start, end = time_range(since, until, window)
+    return await db_manager.get_category_counts(since=start, until=end)
 
 @app.get("/platform-data")
-async def get_platform_data():
-    return await db_manager.get_platform_counts()
+async def get_platform_data(since: Optional[str] = None, until: Optional[str] = None, window: Optional[str] = None):
+    start, end = time_range(since, until, window)
+    return await db_manager.get_platform_counts(since=start, until=end)
 
 @app.get("/sentiment-data")
-async def get_sentiment_data():
-    posts = await db_manager.get_posts(limit=None, filters={})
-    counts = {"positive": 0, "neutral": 0, "negative": 0}
-    for post in posts:
-        sentiment = post.get("sentiment") or "neutral"
-        if sentiment in counts:
-            counts[sentiment] += 1
+async def get_sentiment_data(since: Optional[str] = None, until: Optional[str] = None, window: Optional[str] = None):
+    start, end = time_range(since, until, window)
+    counts = await db_manager.get_sentiment_counts(since=start, until=end)
 
     return [
-        {"name": "positive", "value": counts["positive"]},
-        {"name": "neutral", "value": counts["neutral"]},
-        {"name": "negative", "value": counts["negative"]},
+        {"name": "positive", "value": counts.get("positive", 0)},
+        {"name": "neutral", "value": counts.get("neutral", 0)},
+        {"name": "negative", "value": counts.get("negative", 0)},
     ]
 
 @app.get("/dashboard-summary")
-async def get_dashboard_summary():
-    posts = await db_manager.get_posts(limit=None, filters={})
-    total = len(posts)
-    citizen_reports = sum(1 for post in posts if post.get("platform") == "Citizen Portal")
-    social_posts = total - citizen_reports
-    negative_signals = sum(1 for post in posts if post.get("sentiment") == "negative")
+async def get_dashboard_summary(since: Optional[str] = None, until: Optional[str] = None, window: Optional[str] = None):
+    start, end = time_range(since, until, window)
+    summary = await db_manager.get_signal_summary(since=start, until=end)
     recent_ingested = ingestion_state.get("last_post_count", 0)
 
     return {
-        "total_signals": total,
-        "citizen_reports": citizen_reports,
-        "social_posts": social_posts,
-        "negative_signals": negative_signals,
+        "total_signals": summary["total"],
+        "citizen_reports": summary["citizen_reports"],
+        "social_posts": summary["total"] - summary["citizen_reports"],
+        "negative_signals": summary["negative"],
         "recent_ingested": recent_ingested,
     }
 
@@ -637,4 +1118,10 @@ async def get_heatmap():
     return {"heatmap_file": path}
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000, reload=True)
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=8000,
+        reload=True,
+        ws_per_message_deflate=os.getenv("WS_PER_MESSAGE_DEFLATE", "true").lower() == "true",
+    )
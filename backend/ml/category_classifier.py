@@ -1,32 +1,37 @@
 
 import os
-import random
-from typing import Dict, List
-import re
+import logging
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from ml.linear_category_model import load_model
+from ml.text_preprocessing import ProcessedText, preprocess_all, tokenize
+from observability.metrics import ML_INFERENCE_SECONDS, timed
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATEGORY_MODEL_PATH = "models/category_model.npz"
 
 class CategoryClassifier:
-    def __init__(self):
-        # Check if we should use mock data (for development without GPU)
-        self.use_mock_data = os.getenv("USE_MOCK_ML", "false").lower() == "true"
-        
-        if not self.use_mock_data:
-            try:
-                # In a real implementation, you would load a trained text classification model
-                # for the specific categories in Tamil Nadu context
-                
-                # For example, using transformers:
-                # from transformers import pipeline
-                # self.classifier = pipeline("text-classification", model="path/to/your/model")
-                
-                # Since this requires training a custom model, we'll use the mock implementation
-                # for this prototype
-                self.use_mock_data = True
-                print("Using rule-based category classification")
-            except Exception as e:
-                print(f"Error initializing category classifier: {e}")
-                self.use_mock_data = True
+    def __init__(self, model_path: Optional[str] = None):
+        self.model_path = os.getenv("CATEGORY_MODEL_PATH", DEFAULT_CATEGORY_MODEL_PATH) if model_path is None else model_path
+        # Predictions below this probability fall back to the keyword rules
+        self.min_confidence = float(os.getenv("CATEGORY_MODEL_MIN_CONFIDENCE", "0.0"))
+        self.model = None
+
+        # The linear model is cheap enough to run on CPU even in mock mode,
+        # so it is used whenever a trained model file exists
+        try:
+            self.model = load_model(self.model_path)
+        except Exception as e:
+            logger.error("Error initializing category classifier: %s", e)
+
+        # use_mock_data means "rule-based", as in SentimentAnalyzer
+        self.use_mock_data = self.model is None
+        if self.model is not None:
+            logger.info("Using linear category model from %s", self.model_path)
         else:
-            print("Using rule-based category classification")
+            logger.info("Using rule-based category classification")
         
         # Define category keywords for rule-based classification
         self.category_keywords: Dict[str, List[str]] = {
@@ -73,30 +78,65 @@ class CategoryClassifier:
             ],
             "other": []  # Default category
         }
+
+        # Inverted index from keyword to categories; multi-word keywords are
+        # matched as token sequences
+        self._word_index: Dict[str, List[str]] = {}
+        self._phrase_index: Dict[Tuple[str, ...], List[str]] = {}
+        for category, keywords in self.category_keywords.items():
+            for keyword in keywords:
+                phrase = tuple(tokenize(keyword))
+                if len(phrase) == 1:
+                    self._word_index.setdefault(phrase[0], []).append(category)
+                else:
+                    self._phrase_index.setdefault(phrase, []).append(category)
     
-    def classify(self, text: str) -> str:
+    def classify(self, text: Union[str, ProcessedText]) -> str:
         """
         Classify text into one of the predefined categories
         Returns the category name
         """
-        # For prototype, we'll use a simple rule-based classifier
-        text = text.lower()
-        
-        # Count matches for each category
-        category_counts = {}
-        for category, keywords in self.category_keywords.items():
-            # Skip 'other' category
-            if category == "other":
-                continue
-                
-            # Count matches
-            count = 0
-            for keyword in keywords:
-                # Check for whole word matches
-                count += len(re.findall(r'\b' + re.escape(keyword) + r'\b', text))
-            
-            if count > 0:
-                category_counts[category] = count
+        return self.classify_batch([text])[0]
+
+    @timed(ML_INFERENCE_SECONDS, "category.classify_batch")
+    def classify_batch(self, texts: Sequence[Union[str, ProcessedText]]) -> List[str]:
+        """Classify many texts with a single matrix operation when a model is loaded"""
+        processed = preprocess_all(texts)
+        if self.model is None:
+            return [self._rule_classify(text) for text in processed]
+
+        predictions = self.model.predict_tokens([text.tokens for text in processed])
+        return [
+            category if probability >= self.min_confidence else self._rule_classify(text)
+            for text, (category, probability) in zip(processed, predictions)
+        ]
+
+    @staticmethod
+    def _keyword_view(text: ProcessedText) -> ProcessedText:
+        """Tokens split at apostrophes, so "hospital's" matches "hospital" as a \\b regex would"""
+        if not any("'" in token for token in text.counts):
+            return text
+        tokens = tuple(part for token in text.tokens for part in token.split("'") if part)
+        return ProcessedText(raw=text.raw, normalized=text.normalized, tokens=tokens, counts=Counter(tokens))
+
+    def _rule_classify(self, text: ProcessedText) -> str:
+        """Keyword counting fallback used when no trained model is available"""
+        text = self._keyword_view(text)
+        # Count whole-word matches per category, looking each distinct token up once
+        totals: Dict[str, int] = {}
+        for token, occurrences in text.counts.items():
+            for category in self._word_index.get(token, ()):
+                totals[category] = totals.get(category, 0) + occurrences
+        for phrase, categories in self._phrase_index.items():
+            occurrences = text.phrase_count(phrase)
+            if occurrences:
+                for category in categories:
+                    totals[category] = totals.get(category, 0) + occurrences
+
+        # Keep the keyword table order so ties resolve as before
+        category_counts = {
+            category: totals[category] for category in self.category_keywords if totals.get(category)
+        }
         
         # Find category with most keyword matches
         if category_counts:
@@ -0,0 +1,72 @@
+"""
+Export the sentiment model to an int8-quantized ONNX directory for CPU inference.
+
+Usage (from backend/):
+    python -m ml.export_onnx --output models/sentiment-onnx-int8
+
+Requires torch, transformers and onnxruntime at export time only; the exported
+directory is loaded by SentimentAnalyzer with SENTIMENT_BACKEND=onnx.
+"""
+
+import argparse
+import shutil
+import tempfile
+from pathlib import Path
+
+from ml.sentiment_analyzer import DEFAULT_MODEL_NAME, DEFAULT_ONNX_MODEL_DIR
+
+
+def export(model_name: str, output_dir: Path, opset: int = 14):
+    """Export model_name to output_dir/model.onnx with dynamic int8 weights"""
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name)
+    model.eval()
+
+    sample = tokenizer(["Chennai metro is great"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["logits"] = {0: "batch"}
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        fp32_path = Path(temp_dir) / "model-fp32.onnx"
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            str(fp32_path),
+            input_names=input_names,
+            output_names=["logits"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+        )
+        quantize_dynamic(str(fp32_path), str(output_dir / "model.onnx"), weight_type=QuantType.QInt8)
+
+    # tokenizer.json and config.json (with id2label) are all the runtime needs
+    tokenizer.save_pretrained(str(output_dir))
+    model.config.save_pretrained(str(output_dir))
+    for leftover in ("pytorch_model.bin", "model.safetensors"):
+        if (output_dir / leftover).exists():
+            (output_dir / leftover).unlink()
+    print(f"Exported quantized ONNX model to {output_dir}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=DEFAULT_MODEL_NAME, help="Hugging Face model name or local path")
+    parser.add_argument("--output", default=DEFAULT_ONNX_MODEL_DIR, help="Directory to write the export to")
+    parser.add_argument("--opset", type=int, default=14)
+    parser.add_argument("--force", action="store_true", help="Replace an existing output directory")
+    args = parser.parse_args()
+
+    output_dir = Path(args.output)
+    if output_dir.exists() and args.force:
+        shutil.rmtree(output_dir)
+    export(args.model, output_dir, args.opset)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+
+import zlib
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+from ml.text_preprocessing import tokenize
+
+DEFAULT_N_FEATURES = 2 ** 18
+
+
+class HashingVectorizer:
+    """
+    Stateless bag-of-ngrams vectorizer: every unigram/bigram is hashed into a
+    fixed number of columns, so no vocabulary has to be stored or shipped
+    """
+
+    def __init__(self, n_features: int = DEFAULT_N_FEATURES, ngram_range: Tuple[int, int] = (1, 2)):
+        self.n_features = n_features
+        self.ngram_range = ngram_range
+
+    def _features(self, tokens: Sequence[str]) -> List[int]:
+        low, high = self.ngram_range
+        columns = []
+        for n in range(low, high + 1):
+            for start in range(len(tokens) - n + 1):
+                gram = " ".join(tokens[start:start + n])
+                columns.append(zlib.crc32(gram.encode("utf-8")) % self.n_features)
+        return columns
+
+    def transform_tokens(self, token_lists: Sequence[Sequence[str]]) -> sp.csr_matrix:
+        """Build a (documents x n_features) CSR matrix of sublinear term counts"""
+        indptr = [0]
+        indices: List[int] = []
+        for tokens in token_lists:
+            indices.extend(self._features(tokens))
+            indptr.append(len(indices))
+
+        data = np.ones(len(indices), dtype=np.float32)
+        matrix = sp.csr_matrix(
+            (data, np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int64)),
+            shape=(len(token_lists), self.n_features),
+        )
+        # Fold duplicate columns into counts, then dampen repeated words
+        matrix.sum_duplicates()
+        np.log1p(matrix.data, out=matrix.data)
+        return matrix
+
+    def transform(self, texts: Sequence[str]) -> sp.csr_matrix:
+        return self.transform_tokens([tokenize(text) for text in texts])
+
+
+class LinearCategoryModel:
+    """
+    Multinomial logistic regression over hashed TF-IDF features.
+    Scoring a batch is one sparse (documents x features) by dense
+    (features x categories) matrix multiply.
+    """
+
+    def __init__(self, n_features: int = DEFAULT_N_FEATURES):
+        self.vectorizer = HashingVectorizer(n_features)
+        self.classes: List[str] = []
+        self.idf = np.ones(n_features, dtype=np.float32)
+        self.weights = np.zeros((n_features, 0), dtype=np.float32)
+        self.bias = np.zeros(0, dtype=np.float32)
+
+    def _tfidf(self, counts: sp.csr_matrix) -> sp.csr_matrix:
+        """Apply idf weights and L2-normalise each row"""
+        matrix = counts.multiply(self.idf).tocsr().astype(np.float32)
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        return sp.diags(1.0 / norms).dot(matrix).tocsr()
+
+    def fit(
+        self,
+        token_lists: Sequence[Sequence[str]],
+        labels: Sequence[str],
+        epochs: int = 200,
+        learning_rate: float = 4.0,
+        l2: float = 1e-5,
+    ) -> "LinearCategoryModel":
+        """Train with full-batch gradient descent on the softmax cross-entropy"""
+        counts = self.vectorizer.transform_tokens(token_lists)
+        n_docs = counts.shape[0]
+
+        document_frequency = np.bincount(counts.indices, minlength=self.vectorizer.n_features)
+        self.idf = (np.log((1 + n_docs) / (1 + document_frequency)) + 1).astype(np.float32)
+        features = self._tfidf(counts)
+
+        self.classes = sorted(set(labels))
+        class_index = {name: index for index, name in enumerate(self.classes)}
+        targets = np.zeros((n_docs, len(self.classes)), dtype=np.float32)
+        targets[np.arange(n_docs), [class_index[label] for label in labels]] = 1.0
+
+        self.weights = np.zeros((self.vectorizer.n_features, len(self.classes)), dtype=np.float32)
+        self.bias = np.zeros(len(self.classes), dtype=np.float32)
+        features_t = features.T.tocsr()
+        for _ in range(epochs):
+            error = (self._softmax(features @ self.weights + self.bias) - targets) / n_docs
+            self.weights -= learning_rate * (features_t @ error + l2 * self.weights)
+            self.bias -= learning_rate * error.sum(axis=0)
+        return self
+
+    @staticmethod
+    def _softmax(scores: np.ndarray) -> np.ndarray:
+        scores = scores - scores.max(axis=1, keepdims=True)
+        np.exp(scores, out=scores)
+        scores /= scores.sum(axis=1, keepdims=True)
+        return scores
+
+    def predict_proba_tokens(self, token_lists: Sequence[Sequence[str]]) -> np.ndarray:
+        features = self._tfidf(self.vectorizer.transform_tokens(token_lists))
+        return self._softmax(np.asarray(features @ self.weights) + self.bias)
+
+    def predict_tokens(self, token_lists: Sequence[Sequence[str]]) -> List[Tuple[str, float]]:
+        """Return (category, probability) for each document"""
+        if not token_lists:
+            return []
+        probabilities = self.predict_proba_tokens(token_lists)
+        best = probabilities.argmax(axis=1)
+        return [(self.classes[index], float(probabilities[row, index])) for row, index in enumerate(best)]
+
+    def predict(self, texts: Sequence[str]) -> List[str]:
+        return [label for label, _ in self.predict_tokens([tokenize(text) for text in texts])]
+
+    def save(self, path: Path):
+        """Store only the hashed columns that carry weight, compressed"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        used = np.flatnonzero(np.abs(self.weights).max(axis=1) > 1e-6).astype(np.int32)
+        np.savez_compressed(
+            path,
+            n_features=np.int64(self.vectorizer.n_features),
+            classes=np.asarray(self.classes),
+            columns=used,
+            weights=self.weights[used].astype(np.float16),
+            idf=self.idf[used],
+            default_idf=np.float32(self.idf.max()),
+            bias=self.bias,
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> "LinearCategoryModel":
+        with np.load(path, allow_pickle=False) as stored:
+            model = cls(int(stored["n_features"]))
+            model.classes = [str(name) for name in stored["classes"]]
+            columns = stored["columns"]
+            # Unseen columns get the rarest-term idf but carry no weight
+            model.idf = np.full(model.vectorizer.n_features, stored["default_idf"], dtype=np.float32)
+            model.idf[columns] = stored["idf"]
+            model.weights = np.zeros((model.vectorizer.n_features, len(model.classes)), dtype=np.float32)
+            model.weights[columns] = stored["weights"].astype(np.float32)
+            model.bias = stored["bias"].astype(np.float32)
+        return model
+
+
+def load_model(path: Optional[str]) -> Optional[LinearCategoryModel]:
+    """Load a trained model file, or None when there is nothing to load"""
+    if not path or not Path(path).exists():
+        return None
+    return LinearCategoryModel.load(Path(path))
@@ -1,89 +1,188 @@
 
 import os
+import logging
+import json
+from pathlib import Path
+from typing import List, Optional, Sequence, Union
+
+from ml.text_preprocessing import ProcessedText, as_processed, preprocess_all
+from observability.metrics import ML_INFERENCE_SECONDS, timed
+
+logger = logging.getLogger(__name__)
+
+# Multilingual sentiment model (supports Tamil and English)
+DEFAULT_MODEL_NAME = "nlptown/bert-base-multilingual-uncased-sentiment"
+DEFAULT_ONNX_MODEL_DIR = "models/sentiment-onnx-int8"
+
+
+# Lists of positive and negative words for the rule-based mock
+POSITIVE_WORDS = [
+    "good", "great", "excellent", "amazing", "wonderful", "fantastic",
+    "love", "happy", "thank", "thanks", "improved", "better", "best",
+    "fixed", "resolved", "solution", "solve", "solved"
+]
+
+NEGATIVE_WORDS = [
+    "bad", "terrible", "horrible", "awful", "poor", "worst",
+    "hate", "issue", "problem", "broken", "damage", "damaged",
+    "not working", "doesn't work", "fail", "failed", "failure",
+    "complaint", "complain", "disappointed", "disappointing"
+]
+
+
+def _count_keywords(text: ProcessedText, keywords: List[str]) -> int:
+    """
+    Count keywords found anywhere in the normalised text, as the original
+    rules did ("solve" also matches "resolved", "issue" matches "issues")
+    """
+    return sum(1 for keyword in keywords if keyword in text.normalized)
+
+
+def stars_to_sentiment(label: str) -> str:
+    """Convert the model's 5-star label to our 3-class sentiment"""
+    if "1 star" in label or "2 stars" in label:
+        return "negative"
+    elif "3 stars" in label:
+        return "neutral"
+    else:  # 4 or 5 stars
+        return "positive"
+
 
 class SentimentAnalyzer:
-    def __init__(self):
+    def __init__(self, backend: Optional[str] = None, model_dir: Optional[str] = None):
         # Check if we should use mock data (for development without GPU)
         self.use_mock_data = os.getenv("USE_MOCK_ML", "true").lower() == "true"
-        
+        # "pytorch" runs the transformers pipeline, "onnx" runs an exported int8 model on CPU
+        self.backend = (backend or os.getenv("SENTIMENT_BACKEND", "pytorch")).lower()
+        self.model_dir = model_dir or os.getenv("SENTIMENT_ONNX_MODEL_DIR", DEFAULT_ONNX_MODEL_DIR)
+
         if not self.use_mock_data:
             try:
-                from transformers import AutoModelForSequenceClassification, AutoTokenizer, pipeline
-                import torch
-
-                # Load multilingual sentiment analysis model (supports Tamil and English)
-                model_name = "nlptown/bert-base-multilingual-uncased-sentiment"
-                
-                # Load model and tokenizer
-                self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-                self.model = AutoModelForSequenceClassification.from_pretrained(model_name)
-                
-                # Create sentiment analysis pipeline
-                self.sentiment_pipeline = pipeline(
-                    "sentiment-analysis", 
-                    model=self.model, 
-                    tokenizer=self.tokenizer,
-                    device=0 if torch.cuda.is_available() else -1  # Use GPU if available
-                )
-                
-                print("Sentiment analysis model loaded successfully")
+                if self.backend == "onnx":
+                    self._load_onnx_backend(Path(self.model_dir))
+                else:
+                    self._load_pytorch_backend()
+
+                logger.info("Sentiment analysis model loaded (%s)", self.backend)
             except Exception as e:
-                print(f"Error loading sentiment analysis model: {e}")
+                logger.error("Error loading sentiment analysis model, falling back to mock analysis: %s", e)
                 self.use_mock_data = True
-                print("Falling back to mock sentiment analysis")
         else:
-            print("Using mock sentiment analysis")
-    
-    def analyze(self, text: str) -> str:
+            logger.info("Using mock sentiment analysis")
+
+    def _load_pytorch_backend(self):
+        """Load the full-precision transformers pipeline"""
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer, pipeline
+        import torch
+
+        # Load model and tokenizer
+        self.tokenizer = AutoTokenizer.from_pretrained(DEFAULT_MODEL_NAME)
+        self.model = AutoModelForSequenceClassification.from_pretrained(DEFAULT_MODEL_NAME)
+
+        # Create sentiment analysis pipeline
+        self.sentiment_pipeline = pipeline(
+            "sentiment-analysis",
+            model=self.model,
+            tokenizer=self.tokenizer,
+            device=0 if torch.cuda.is_available() else -1  # Use GPU if available
+        )
+
+    def _load_onnx_backend(self, model_dir: Path):
+        """
+        Load an exported, int8-quantized ONNX model directory
+        (see ml/export_onnx.py) without importing torch or transformers
         """
-        Analyze the sentiment of the given text
+        import numpy as np
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_path = model_dir / "model.onnx"
+        if not model_path.exists():
+            raise FileNotFoundError(f"No ONNX model found at {model_path}")
+
+        max_length = int(os.getenv("SENTIMENT_MAX_LENGTH", "512"))
+        self.onnx_tokenizer = Tokenizer.from_file(str(model_dir / "tokenizer.json"))
+        self.onnx_tokenizer.enable_truncation(max_length=max_length)
+        self.onnx_tokenizer.enable_padding()
+
+        with open(model_dir / "config.json", encoding="utf-8") as config_file:
+            id2label = json.load(config_file)["id2label"]
+        self.onnx_labels = [id2label[str(index)] for index in range(len(id2label))]
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        threads = int(os.getenv("SENTIMENT_ONNX_THREADS", "0"))
+        if threads:
+            options.intra_op_num_threads = threads
+        self.onnx_session = ort.InferenceSession(
+            str(model_path), options, providers=["CPUExecutionProvider"]
+        )
+        self.onnx_input_names = {model_input.name for model_input in self.onnx_session.get_inputs()}
+        self._np = np
+
+    @timed(ML_INFERENCE_SECONDS, "sentiment.analyze")
+    def analyze(self, text: Union[str, ProcessedText]) -> str:
+        """
+        Analyze the sentiment of the given text (raw or preprocessed)
         Returns: "positive", "neutral", or "negative"
         """
+        text = as_processed(text)
         if self.use_mock_data:
             return self._mock_analyze(text)
-        
+
         try:
+            if self.backend == "onnx":
+                return self._onnx_analyze([text.normalized])[0]
+
             # Run text through sentiment analysis pipeline
-            result = self.sentiment_pipeline(text)[0]
-            score = result['score']
-            label = result['label']
-            
-            # Convert 5-class sentiment to 3-class
-            if "1 star" in label or "2 stars" in label:
-                return "negative"
-            elif "3 stars" in label:
-                return "neutral"
-            else:  # 4 or 5 stars
-                return "positive"
+            result = self.sentiment_pipeline(text.normalized)[0]
+            return stars_to_sentiment(result['label'])
         except Exception as e:
-            print(f"Error analyzing sentiment: {e}")
+            logger.error("Error analyzing sentiment: %s", e)
             return self._mock_analyze(text)
-    
-    def _mock_analyze(self, text: str) -> str:
+
+    @timed(ML_INFERENCE_SECONDS, "sentiment.analyze_batch")
+    def analyze_batch(self, texts: Sequence[Union[str, ProcessedText]]) -> List[str]:
+        """Analyze several texts in one model call"""
+        texts = preprocess_all(texts)
+        if self.use_mock_data or not texts:
+            return [self._mock_analyze(text) for text in texts]
+
+        try:
+            normalized = [text.normalized for text in texts]
+            if self.backend == "onnx":
+                return self._onnx_analyze(normalized)
+
+            results = self.sentiment_pipeline(normalized, truncation=True)
+            return [stars_to_sentiment(result['label']) for result in results]
+        except Exception as e:
+            logger.error("Error analyzing sentiment batch: %s", e)
+            return [self._mock_analyze(text) for text in texts]
+
+    def _onnx_analyze(self, texts: List[str]) -> List[str]:
+        """Run a padded batch through the ONNX session and map the arg-max labels"""
+        np = self._np
+        encodings = self.onnx_tokenizer.encode_batch(texts)
+        inputs = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        feed = {name: value for name, value in inputs.items() if name in self.onnx_input_names}
+        logits = self.onnx_session.run(None, feed)[0]
+        return [stars_to_sentiment(self.onnx_labels[index]) for index in logits.argmax(axis=-1)]
+
+    def _mock_analyze(self, text: Union[str, ProcessedText]) -> str:
         """
         Simple rule-based sentiment analysis for development
         without requiring the full ML model
         """
-        text = text.lower()
-        
-        # Lists of positive and negative words
-        positive_words = [
-            "good", "great", "excellent", "amazing", "wonderful", "fantastic",
-            "love", "happy", "thank", "thanks", "improved", "better", "best",
-            "fixed", "resolved", "solution", "solve", "solved"
-        ]
-        
-        negative_words = [
-            "bad", "terrible", "horrible", "awful", "poor", "worst",
-            "hate", "issue", "problem", "broken", "damage", "damaged",
-            "not working", "doesn't work", "fail", "failed", "failure",
-            "complaint", "complain", "disappointed", "disappointing"
-        ]
-        
+        text = as_processed(text)
+
         # Count matches
-        positive_count = sum(1 for word in positive_words if word in text)
-        negative_count = sum(1 for word in negative_words if word in text)
-        
+        positive_count = _count_keywords(text, POSITIVE_WORDS)
+        negative_count = _count_keywords(text, NEGATIVE_WORDS)
+
         # Determine sentiment
         if positive_count > negative_count:
             return "positive"
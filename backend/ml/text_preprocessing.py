@@ -0,0 +1,70 @@
+
+import re
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Iterable, List, Sequence, Tuple, Union
+
+# Word characters plus the Tamil block, so vowel signs and viramas (which are
+# combining marks, not \w) stay inside the word instead of splitting it.
+# Inner apostrophes are kept so "doesn't" stays one token.
+TOKEN_PATTERN = re.compile(r"[\w\u0B80-\u0BFF]+(?:'[\w\u0B80-\u0BFF]+)*")
+
+# Zero-width characters that appear in pasted Tamil text and break matching
+_STRIP_CHARS = dict.fromkeys(map(ord, "\u200b\u200c\u200d\u2060\ufeff"))
+_STRIP_CHARS.update({ord("\u2018"): "'", ord("\u2019"): "'"})
+
+
+@dataclass(frozen=True)
+class ProcessedText:
+    """A post normalised and tokenised once, shared by every analyser"""
+    raw: str
+    normalized: str
+    tokens: Tuple[str, ...]
+    counts: Counter = field(compare=False, repr=False)
+
+    @property
+    def joined(self) -> str:
+        """Tokens separated by single spaces, for multi-word phrase checks"""
+        return " ".join(self.tokens)
+
+    def phrase_count(self, phrase: Sequence[str]) -> int:
+        """Count occurrences of a multi-token phrase"""
+        size = len(phrase)
+        if size == 1:
+            return self.counts.get(phrase[0], 0)
+        first = phrase[0]
+        if first not in self.counts:
+            return 0
+        phrase = tuple(phrase)
+        return sum(
+            1 for start in range(len(self.tokens) - size + 1)
+            if self.tokens[start] == first and self.tokens[start:start + size] == phrase
+        )
+
+
+def normalize(text: str) -> str:
+    """NFC-normalise, casefold and drop zero-width characters"""
+    return unicodedata.normalize("NFC", text).translate(_STRIP_CHARS).casefold()
+
+
+def tokenize(text: str) -> List[str]:
+    """Tokenise text that has not been preprocessed yet"""
+    return TOKEN_PATTERN.findall(normalize(text))
+
+
+def preprocess(text: str) -> ProcessedText:
+    normalized = normalize(text)
+    tokens = tuple(TOKEN_PATTERN.findall(normalized))
+    return ProcessedText(raw=text, normalized=normalized, tokens=tokens, counts=Counter(tokens))
+
+
+def as_processed(text: Union[str, ProcessedText]) -> ProcessedText:
+    """Accept either a raw string or an already preprocessed post"""
+    if isinstance(text, ProcessedText):
+        return text
+    return preprocess(text)
+
+
+def preprocess_all(texts: Iterable[Union[str, ProcessedText]]) -> List[ProcessedText]:
+    return [as_processed(text) for text in texts]
@@ -0,0 +1,80 @@
+"""
+Train the hashed TF-IDF category model from labelled posts in the database.
+
+Usage (from backend/):
+    python -m ml.train_category_model --db data.db --output models/category_model.npz
+
+Posts labelled "other" or with rare categories are skipped; a held-out split
+is scored so the model can be compared with the keyword rules before use.
+"""
+
+import argparse
+import random
+import sqlite3
+import time
+from collections import Counter
+from pathlib import Path
+
+from ml.category_classifier import CategoryClassifier, DEFAULT_CATEGORY_MODEL_PATH
+from ml.linear_category_model import LinearCategoryModel
+from ml.text_preprocessing import tokenize
+
+
+def load_labelled_posts(db_path: Path):
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute(
+            "SELECT content, category FROM posts WHERE category IS NOT NULL AND category != 'other'"
+        ).fetchall()
+    finally:
+        conn.close()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="data.db", help="SQLite database with a posts table")
+    parser.add_argument("--output", default=DEFAULT_CATEGORY_MODEL_PATH)
+    parser.add_argument("--min-count", type=int, default=5, help="Drop categories with fewer labelled posts")
+    parser.add_argument("--holdout", type=float, default=0.1, help="Fraction of posts held out for evaluation")
+    parser.add_argument("--epochs", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=13)
+    args = parser.parse_args()
+
+    rows = load_labelled_posts(Path(args.db))
+    label_counts = Counter(category for _, category in rows)
+    rows = [(content, category) for content, category in rows if label_counts[category] >= args.min_count]
+    if len(set(category for _, category in rows)) < 2:
+        raise SystemExit("Need labelled posts for at least two categories to train a model")
+
+    random.Random(args.seed).shuffle(rows)
+    split = int(len(rows) * (1 - args.holdout))
+    train_rows, test_rows = rows[:split], rows[split:]
+
+    started = time.perf_counter()
+    model = LinearCategoryModel().fit(
+        [tokenize(content) for content, _ in train_rows],
+        [category for _, category in train_rows],
+        epochs=args.epochs,
+    )
+    print(f"Trained on {len(train_rows)} posts in {time.perf_counter() - started:.1f}s")
+
+    if test_rows:
+        texts = [content for content, _ in test_rows]
+        labels = [category for _, category in test_rows]
+        started = time.perf_counter()
+        predictions = model.predict(texts)
+        elapsed = time.perf_counter() - started
+        rules = CategoryClassifier(model_path="")
+        rule_predictions = [rules.classify(text) for text in texts]
+        accuracy = sum(p == l for p, l in zip(predictions, labels)) / len(labels)
+        rule_accuracy = sum(p == l for p, l in zip(rule_predictions, labels)) / len(labels)
+        print(f"Held-out accuracy: model {accuracy:.2%}, keyword rules {rule_accuracy:.2%}")
+        print(f"Batch scoring: {len(texts) / elapsed:.0f} posts/s")
+
+    model.save(Path(args.output))
+    print(f"Saved model to {args.output} ({Path(args.output).stat().st_size / 1024:.0f} KiB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+
+import os
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+
+# IDs of the posts or batches the current code is working on. Set per fetched
+# batch and carried by the ingestion pipeline, so a batch can be followed
+# through fetch, analyse, persist, aggregate and broadcast.
+correlation_ids: ContextVar[Tuple[str, ...]] = ContextVar("correlation_ids", default=())
+
+# Logged in full up to this many; beyond it only the count is added
+MAX_LOGGED_CORRELATION_IDS = 20
+
+# Attributes every LogRecord has; anything else came from extra={...}
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+@contextmanager
+def correlated(ids: Sequence[str]) -> Iterator[None]:
+    """Attach correlation IDs to every log record made inside the block"""
+    token = correlation_ids.set(tuple(ids))
+    try:
+        yield
+    finally:
+        correlation_ids.reset(token)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Lets through at most `burst` warnings/errors per message template and
+    logger every `window` seconds. Suppressed repeats are counted and
+    reported on the next record let through for that template, so a source
+    failing on every poll logs a few lines a minute instead of one per poll.
+    """
+
+    def __init__(self, burst: int = 5, window: float = 60.0):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        # (logger, level, template) -> [window start, emitted, suppressed]
+        self._seen: Dict[Tuple[str, int, str], list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.WARNING:
+            return True
+        key = (record.name, record.levelno, str(record.msg))
+        now = time.monotonic()
+        state = self._seen.get(key)
+        if state is None or now - state[0] >= self.window:
+            suppressed = state[2] if state else 0
+            self._seen[key] = [now, 1, 0]
+            if suppressed:
+                record.suppressed = suppressed
+            return True
+        if state[1] < self.burst:
+            state[1] += 1
+            return True
+        state[2] += 1
+        return False
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message and any extra fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class _ContextQueueHandler(logging.handlers.QueueHandler):
+    """
+    Runs on the caller's thread: reads the correlation IDs (a context variable)
+    and merges the message arguments, leaving formatting to the listener.
+    Unlike the stock prepare(), exc_info is kept for the JSON formatter; the
+    queue never leaves this process.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        ids = correlation_ids.get()
+        if ids and not hasattr(record, "correlation_ids"):
+            record.correlation_ids = list(ids[:MAX_LOGGED_CORRELATION_IDS])
+            if len(ids) > MAX_LOGGED_CORRELATION_IDS:
+                record.correlation_total = len(ids)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def setup_logging(level: Optional[str] = None, log_format: Optional[str] = None):
+    """
+    Route all logging through a queue so formatting and writes happen on a
+    listener thread, not the event loop. LOG_LEVEL sets the level (INFO by
+    default) and LOG_FORMAT chooses "json" (default) or "text". Safe to call
+    more than once.
+    """
+    global _listener
+    level = (level or os.getenv("LOG_LEVEL", "INFO")).upper()
+    log_format = (log_format or os.getenv("LOG_FORMAT", "json")).lower()
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    # httpx logs every request at INFO, i.e. every poll of every source
+    logging.getLogger("httpx").setLevel(logging.DEBUG if level == "DEBUG" else logging.WARNING)
+    if _listener is not None:
+        return
+
+    stream = logging.StreamHandler(sys.stdout)
+    if log_format == "text":
+        stream.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    else:
+        stream.setFormatter(JsonFormatter())
+
+    handler = _ContextQueueHandler(queue.SimpleQueue())
+    handler.addFilter(RateLimitFilter(
+        burst=int(os.getenv("LOG_ERROR_BURST", "5")),
+        window=float(os.getenv("LOG_ERROR_WINDOW_SECONDS", "60")),
+    ))
+    root.addHandler(handler)
+    _listener = logging.handlers.QueueListener(handler.queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
@@ -0,0 +1,232 @@
+
+import asyncio
+import functools
+import logging
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Prometheus text exposition format, version 0.0.4
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; covers sub-millisecond DB calls up to slow API fetches
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Seconds between a post being written and us storing it
+LAG_BUCKETS = (1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 900.0, 1800.0, 3600.0, 3 * 3600.0, 12 * 3600.0, 86400.0)
+
+Labels = Tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram. observe() is one bisect and a few integer
+    increments under an uncontended lock, so it is cheap enough for every
+    request and query; observations may come from executor threads.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # labels -> [per-bucket counts..., +Inf count], sum
+        self._series: Dict[Labels, List[Any]] = {}
+
+    def observe(self, value: float, *labels: str):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return sum(series[0]) if series else 0
+
+    def render(self) -> Iterable[str]:
+        with self._lock:
+            snapshot = [(labels, list(series[0]), series[1]) for labels, series in self._series.items()]
+        for labels, counts, total in sorted(snapshot):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                yield f"{self.name}_bucket{_label_text(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_label_text(self.labelnames, labels)} {_format_value(total)}"
+            yield f"{self.name}_count{_label_text(self.labelnames, labels)} {cumulative}"
+
+
+class CallbackMetric:
+    """
+    A gauge or counter read at scrape time from values the app already tracks
+    (queue depths, client counts, processed totals), so nothing is added to
+    the hot path. The callback returns a number, or a dict of label value
+    tuples to numbers.
+    """
+
+    def __init__(self, name: str, documentation: str, callback: Callable[[], Any], labelnames: Sequence[str] = (), kind: str = "gauge"):
+        self.kind = kind
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+
+    def render(self) -> Iterable[str]:
+        try:
+            values = self.callback()
+        except Exception as e:
+            logger.error("Error reading metric %s: %s", self.name, e)
+            return
+        if not isinstance(values, dict):
+            values = {(): values}
+        for labels, value in sorted(values.items()):
+            if value is None:
+                continue
+            yield f"{self.name}{_label_text(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name: str, documentation: str, callback: Callable[[], Any], labelnames: Sequence[str] = ()) -> CallbackMetric:
+        return self.register(CallbackMetric(name, documentation, callback, labelnames))
+
+    def counter(self, name: str, documentation: str, callback: Callable[[], Any], labelnames: Sequence[str] = ()) -> CallbackMetric:
+        return self.register(CallbackMetric(name, documentation, callback, labelnames, kind="counter"))
+
+    def get(self, name: str):
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def timed(histogram: Histogram, label: Optional[str] = None):
+    """Decorator observing a function's duration, labelled with its name unless given"""
+
+    def decorate(fn):
+        name = label or fn.__name__
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    histogram.observe(time.perf_counter() - started, name)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started, name)
+        return wrapper
+
+    return decorate
+
+
+class HTTPMetricsMiddleware:
+    """
+    ASGI middleware timing every HTTP request, labelled with the route's path
+    template rather than the raw path so label cardinality stays bounded.
+    Unmatched paths share one label.
+    """
+
+    def __init__(self, app, histogram: Histogram):
+        self.app = app
+        self.histogram = histogram
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.histogram.observe(
+                time.perf_counter() - started, scope["method"], _route_path(scope), str(status[0])
+            )
+
+
+def _route_path(scope) -> str:
+    # The router records the matched endpoint in the scope; map it back to its path template
+    endpoint = scope.get("endpoint")
+    app = scope.get("app")
+    if endpoint is None or app is None:
+        return "unmatched"
+    paths = getattr(app, "_metrics_route_paths", None)
+    if paths is None:
+        paths = {getattr(route, "endpoint", None): route.path for route in app.routes if hasattr(route, "path")}
+        app._metrics_route_paths = paths
+    return paths.get(endpoint, "unmatched")
+
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "citypulse_http_request_duration_seconds", "HTTP request duration by route", ("method", "route", "status"))
+DB_QUERY_SECONDS = REGISTRY.histogram(
+    "citypulse_db_query_duration_seconds", "DatabaseManager call duration", ("method",))
+ML_INFERENCE_SECONDS = REGISTRY.histogram(
+    "citypulse_ml_inference_duration_seconds", "Sentiment and category model call duration", ("model",))
+SOURCE_FETCH_SECONDS = REGISTRY.histogram(
+    "citypulse_source_fetch_duration_seconds", "Social media fetch duration", ("source", "outcome"))
+PIPELINE_STAGE_SECONDS = REGISTRY.histogram(
+    "citypulse_pipeline_stage_duration_seconds", "Ingestion pipeline stage handler duration per batch", ("stage",))
+WS_DISPATCH_SECONDS = REGISTRY.histogram(
+    "citypulse_ws_dispatch_duration_seconds", "Time to route one message into every client queue", ("stream",))
+WS_SEND_LAG_SECONDS = REGISTRY.histogram(
+    "citypulse_ws_send_lag_seconds", "Time a message waited in a client queue before it was sent", ("stream",))
+INGESTION_LAG_SECONDS = REGISTRY.histogram(
+    "citypulse_ingestion_lag_seconds", "Now minus post timestamp when a post is stored", ("platform",), LAG_BUCKETS)
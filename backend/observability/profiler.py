@@ -0,0 +1,268 @@
+
+import os
+import logging
+import asyncio
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Background tasks sampled by an ingestion profile (see IngestionPipeline and SourceRegistry)
+INGESTION_TASK_PREFIXES = ("pipeline-", "ingest-")
+
+# Innermost frames of threads that are waiting rather than working
+_IDLE_FRAMES = {
+    ("selectors.py", "select"),
+    ("thread.py", "_worker"),
+    ("threading.py", "wait"),
+    ("queue.py", "get"),
+}
+
+Stack = Tuple[str, ...]
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+
+def _frames(frame) -> list:
+    """A thread's frames, innermost first"""
+    frames = []
+    while frame is not None:
+        frames.append(frame)
+        frame = frame.f_back
+    return frames
+
+
+def _stack(frame) -> Stack:
+    return tuple(_frame_label(frame) for frame in reversed(_frames(frame)))
+
+
+def _task_frame(task: asyncio.Task):
+    """
+    The frame of a task's outermost coroutine. It is on the loop thread's
+    stack exactly while the task is running, and detached while it waits.
+    """
+    return getattr(task.get_coro(), "cr_frame", None)
+
+
+def _is_idle(frame) -> bool:
+    return (Path(frame.f_code.co_filename).name, frame.f_code.co_name) in _IDLE_FRAMES
+
+
+class ProfileSession:
+    """Samples collected for one request, or for the ingestion tasks over a time window"""
+
+    def __init__(self, kind: str, label: str, tasks: List[asyncio.Task], deadline: Optional[float] = None):
+        self.kind = kind
+        self.label = label
+        self.tasks = tasks
+        self.deadline = deadline
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        self.samples: Counter = Counter()
+        # Tasks whose coroutine has no frame to look for (e.g. not a native
+        # coroutine) can't be told apart from the others on the loop
+        self.unscoped = not tasks or any(not hasattr(task.get_coro(), "cr_frame") for task in tasks)
+        if self.unscoped:
+            logger.warning("Cannot tell when the tasks of profile %r are running; it includes every event-loop sample", label)
+
+    def matches(self, loop_frames: Set[int]) -> bool:
+        """Whether one of the session's tasks is running, given the ids of the loop thread's frames"""
+        if self.unscoped:
+            return True
+        for task in self.tasks:
+            frame = _task_frame(task)
+            if frame is not None and id(frame) in loop_frames:
+                return True
+        return False
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler for a running server, switched on at runtime.
+
+    While enabled, a daemon thread wakes every interval and reads every
+    thread's stack with sys._current_frames(). Event-loop samples are kept
+    only while a profiled request's task (or an ingestion task) is the one
+    running, i.e. while its coroutine's frame is on the loop thread's stack;
+    busy thread-pool stacks (DB queries, model inference) are added to every
+    open session, so they may include work for concurrent requests.
+    Finished sessions are written as folded stacks, the input format of
+    flamegraph.pl and speedscope. When disabled there is no sampling thread
+    and requests pay one attribute check.
+    """
+
+    def __init__(self, output_dir: Optional[str] = None, keep: int = 50):
+        self.output_dir = Path(output_dir or os.getenv("PROFILE_DIR", "profiles"))
+        self.enabled = False
+        self.sample_rate = 0.0
+        self.route: Optional[str] = None
+        self.interval = 0.005
+        self.min_duration = 0.0
+        self.recent: Deque[Dict[str, Any]] = deque(maxlen=keep)
+        self._sessions: List[ProfileSession] = []
+        self._lock = threading.Lock()
+        self._loop_thread: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._counters = {"ticks": 0, "profiles_written": 0, "requests_profiled": 0}
+
+    def configure(
+        self,
+        enabled: bool,
+        sample_rate: float = 0.05,
+        route: Optional[str] = None,
+        interval_ms: float = 5,
+        min_duration_ms: float = 0,
+    ):
+        """Start or stop profiling; must be called from the event loop being profiled"""
+        self.sample_rate = min(1.0, max(0.0, sample_rate))
+        self.route = route or None
+        self.interval = max(0.001, interval_ms / 1000)
+        self.min_duration = max(0.0, min_duration_ms / 1000)
+        self.enabled = enabled
+        if enabled:
+            self._ensure_sampler()
+
+    def _ensure_sampler(self):
+        self._loop_thread = threading.get_ident()
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._sample_loop, name="sampling-profiler", daemon=True)
+            self._thread.start()
+
+    def should_profile(self, path: str) -> bool:
+        if self.route is not None and path != self.route:
+            return False
+        return random.random() < self.sample_rate
+
+    def start_request(self, method: str, path: str) -> ProfileSession:
+        task = asyncio.current_task()
+        session = ProfileSession("request", f"{method} {path}", [task] if task is not None else [])
+        with self._lock:
+            self._sessions.append(session)
+        self._counters["requests_profiled"] += 1
+        return session
+
+    def finish_request(self, session: ProfileSession):
+        with self._lock:
+            if session in self._sessions:
+                self._sessions.remove(session)
+        if time.perf_counter() - session.started >= self.min_duration:
+            self._write(session)
+
+    def start_ingestion(self, seconds: float) -> ProfileSession:
+        """Profile the background ingestion tasks for a while, whether or not requests are sampled"""
+        tasks = [task for task in asyncio.all_tasks() if task.get_name().startswith(INGESTION_TASK_PREFIXES)]
+        session = ProfileSession("ingestion", "ingestion", tasks, deadline=time.perf_counter() + seconds)
+        with self._lock:
+            self._sessions.append(session)
+        self._ensure_sampler()
+        return session
+
+    def _sample_loop(self):
+        own_thread = threading.get_ident()
+        while self.enabled or self._sessions:
+            time.sleep(self.interval)
+            with self._lock:
+                sessions = list(self._sessions)
+            if not sessions:
+                continue
+            self._counters["ticks"] += 1
+            frames = sys._current_frames()
+            loop_stack = None
+            loop_frames: Set[int] = set()
+            loop_frame = frames.get(self._loop_thread)
+            if loop_frame is not None and not _is_idle(loop_frame):
+                thread_frames = _frames(loop_frame)
+                loop_frames = {id(frame) for frame in thread_frames}
+                loop_stack = ("event-loop",) + tuple(_frame_label(frame) for frame in reversed(thread_frames))
+                del thread_frames
+            worker_stacks = [
+                (f"thread:{thread_id}",) + _stack(frame)
+                for thread_id, frame in frames.items()
+                if thread_id not in (own_thread, self._loop_thread) and not _is_idle(frame)
+            ]
+
+            now = time.perf_counter()
+            for session in sessions:
+                if loop_stack is not None and session.matches(loop_frames):
+                    session.samples[loop_stack] += 1
+                for stack in worker_stacks:
+                    session.samples[stack] += 1
+                if session.deadline is not None and now >= session.deadline:
+                    with self._lock:
+                        if session in self._sessions:
+                            self._sessions.remove(session)
+                    self._write(session)
+            del frames
+
+    def _write(self, session: ProfileSession):
+        duration_ms = round((time.perf_counter() - session.started) * 1000, 1)
+        created = datetime.fromtimestamp(session.started_at)
+        slug = re.sub(r"[^A-Za-z0-9]+", "-", session.label).strip("-").lower() or "root"
+        name = f"{created.strftime('%Y%m%dT%H%M%S')}-{slug}-{uuid.uuid4().hex[:8]}.folded"
+        try:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            with open(self.output_dir / name, "w") as handle:
+                for stack, count in session.samples.most_common():
+                    handle.write(";".join(stack) + f" {count}\n")
+        except OSError as e:
+            logger.error("Error writing profile %s: %s", name, e)
+            return
+        self._counters["profiles_written"] += 1
+        self.recent.appendleft({
+            "name": name,
+            "kind": session.kind,
+            "label": session.label,
+            "created_at": created.isoformat(),
+            "duration_ms": duration_ms,
+            "samples": sum(session.samples.values()),
+        })
+
+    def read(self, name: str) -> Optional[str]:
+        """A written profile by name; only names listed in recent are served"""
+        if not any(profile["name"] == name for profile in self.recent):
+            return None
+        try:
+            return (self.output_dir / name).read_text()
+        except OSError:
+            return None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "route": self.route,
+            "interval_ms": round(self.interval * 1000, 2),
+            "min_duration_ms": round(self.min_duration * 1000, 2),
+            "output_dir": str(self.output_dir),
+            "active_sessions": len(self._sessions),
+            **self._counters,
+        }
+
+
+class ProfilingMiddleware:
+    """ASGI middleware handing a sampled fraction of HTTP requests to the profiler"""
+
+    def __init__(self, app, profiler: SamplingProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if not self.profiler.enabled or scope["type"] != "http" or not self.profiler.should_profile(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+        session = self.profiler.start_request(scope["method"], scope["path"])
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.profiler.finish_request(session)
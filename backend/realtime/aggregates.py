@@ -0,0 +1,152 @@
+
+from collections import Counter
+from typing import Any, Dict, Iterable, Mapping, Sequence
+
+SENTIMENTS = ("positive", "neutral", "negative")
+# Hourly trend buckets kept in memory (eight days)
+TREND_HOURS = 192
+
+
+def _hour(timestamp: str) -> str:
+    # Same bucket key the trend_data rollups use
+    return f"{timestamp[:13]}:00:00"
+
+
+class LiveAggregates:
+    """
+    Running dashboard totals, updated once per ingestion batch.
+
+    apply() folds new posts in and returns a delta message with the counter
+    increments (and the new values of any trend hours it touched); snapshot()
+    returns everything, for clients that have just connected. Every message
+    carries a sequence number so clients can spot a missed delta.
+    """
+
+    def __init__(self):
+        self.seq = 0
+        self.loaded = False
+        self._reset()
+
+    def _reset(self):
+        self.totals: Counter = Counter()
+        self.sentiment: Counter = Counter({sentiment: 0 for sentiment in SENTIMENTS})
+        self.category: Counter = Counter()
+        self.platform: Counter = Counter()
+        self.location: Dict[str, Dict[str, Any]] = {}
+        self.trend: Dict[str, Counter] = {}
+
+    def load(self, posts: Iterable[Mapping[str, Any]]):
+        """Start from the posts already stored"""
+        self._reset()
+        self._fold(posts)
+        self.loaded = True
+
+    def load_counts(self, groups: Iterable[Sequence[Any]], trend: Iterable[Sequence[Any]]):
+        """
+        Start from GROUP BY counts of the stored posts instead of the posts
+        themselves: (sentiment, category, platform, location, count) and
+        (hour, sentiment, count) rows, with the same defaults as _fold
+        """
+        self._reset()
+        for sentiment, category, platform, location, count in groups:
+            sentiment = sentiment or "neutral"
+            location = location or "Tamil Nadu"
+            self.totals["signals"] += count
+            if platform == "Citizen Portal":
+                self.totals["citizen_reports"] += count
+            if sentiment == "negative":
+                self.totals["negative_signals"] += count
+            self.sentiment[sentiment] += count
+            if category:
+                self.category[category] += count
+            if platform:
+                self.platform[platform] += count
+            place = self.location.setdefault(location, {"counts": Counter(), "categories": Counter()})
+            place["counts"]["total"] += count
+            place["counts"][sentiment] += count
+            if category:
+                place["categories"][category] += count
+
+        for hour, sentiment, count in trend:
+            counts = self.trend.setdefault(_hour(hour), Counter({sentiment: 0 for sentiment in SENTIMENTS}))
+            counts[sentiment or "neutral"] += count
+        for hour in sorted(self.trend)[:max(0, len(self.trend) - TREND_HOURS)]:
+            del self.trend[hour]
+        self.loaded = True
+
+    def _fold(self, posts: Iterable[Mapping[str, Any]]) -> Dict[str, Any]:
+        delta: Dict[str, Any] = {
+            "totals": Counter(), "sentiment": Counter(), "category": Counter(),
+            "platform": Counter(), "location": {}, "trend": {},
+        }
+        for post in posts:
+            sentiment = post.get("sentiment") or "neutral"
+            category = post.get("category")
+            platform = post.get("platform")
+            location = post.get("location") or "Tamil Nadu"
+
+            delta["totals"]["signals"] += 1
+            if platform == "Citizen Portal":
+                delta["totals"]["citizen_reports"] += 1
+            if sentiment == "negative":
+                delta["totals"]["negative_signals"] += 1
+            delta["sentiment"][sentiment] += 1
+            if category:
+                delta["category"][category] += 1
+            if platform:
+                delta["platform"][platform] += 1
+
+            place = delta["location"].setdefault(location, {"counts": Counter(), "categories": Counter()})
+            place["counts"]["total"] += 1
+            place["counts"][sentiment] += 1
+            if category:
+                place["categories"][category] += 1
+
+            timestamp = post.get("timestamp")
+            if timestamp:
+                hour = _hour(str(timestamp))
+                self.trend.setdefault(hour, Counter({sentiment: 0 for sentiment in SENTIMENTS}))[sentiment] += 1
+                delta["trend"][hour] = self.trend[hour]
+
+        self.totals.update(delta["totals"])
+        self.sentiment.update(delta["sentiment"])
+        self.category.update(delta["category"])
+        self.platform.update(delta["platform"])
+        for location, place in delta["location"].items():
+            current = self.location.setdefault(location, {"counts": Counter(), "categories": Counter()})
+            current["counts"].update(place["counts"])
+            current["categories"].update(place["categories"])
+
+        if len(self.trend) > TREND_HOURS:
+            for hour in sorted(self.trend)[:len(self.trend) - TREND_HOURS]:
+                del self.trend[hour]
+                delta["trend"].pop(hour, None)
+        return delta
+
+    def apply(self, posts: Iterable[Mapping[str, Any]]) -> Dict[str, Any]:
+        """Fold in newly stored posts and return the delta message"""
+        delta = self._fold(posts)
+        self.seq += 1
+        return self._message("aggregate_delta", delta)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return self._message("aggregate_snapshot", {
+            "totals": self.totals, "sentiment": self.sentiment, "category": self.category,
+            "platform": self.platform, "location": self.location, "trend": self.trend,
+        })
+
+    def _message(self, message_type: str, parts: Dict[str, Any]) -> Dict[str, Any]:
+        # Plain dicts so the message can be serialised (and isn't mutated later)
+        return {
+            "type": message_type,
+            "seq": self.seq,
+            "totals": dict(parts["totals"]),
+            "sentiment": dict(parts["sentiment"]),
+            "category": dict(parts["category"]),
+            "platform": dict(parts["platform"]),
+            "location": {
+                location: {**place["counts"], "categories": dict(place["categories"])}
+                for location, place in parts["location"].items()
+            },
+            "trend": {hour: dict(counts) for hour, counts in parts["trend"].items()},
+        }
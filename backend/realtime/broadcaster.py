@@ -0,0 +1,290 @@
+
+import os
+import asyncio
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Mapping, Optional, Tuple
+
+from observability.metrics import WS_DISPATCH_SECONDS, WS_SEND_LAG_SECONDS
+from realtime.framing import Encoder, make_encoder
+from realtime.subscriptions import Subscription, SubscriptionIndex
+
+# What a full client queue does with a new message:
+#   "drop_oldest" - discard the oldest queued message
+#   "coalesce"    - merge post batches into the newest queued batch
+#   "disconnect"  - close the connection; the dashboard reconnects and refetches
+SLOW_CLIENT_POLICIES = ("drop_oldest", "coalesce", "disconnect")
+
+# Close code sent to clients that cannot keep up (1013: try again later)
+SLOW_CLIENT_CLOSE_CODE = 1013
+
+
+class ClientConnection:
+    """One WebSocket with its own bounded outbound queue and writer task"""
+
+    def __init__(self, ws: Any, queue_size: int, policy: str, send_timeout: float, stream: str = "posts"):
+        self.ws = ws
+        self.stream = stream
+        self.queue_size = queue_size
+        self.policy = policy
+        self.send_timeout = send_timeout
+        # (message, enqueued_at)
+        self.queue: Deque[Tuple[Any, float]] = deque()
+        self.closed = False
+        # Set by configure() for clients that opt into a compact protocol
+        self.protocol = "json"
+        self.encoder: Optional[Encoder] = None
+        self.coalesce_window = 0.0
+        self._ready = asyncio.Event()
+        self._writer: Optional[asyncio.Task] = None
+        self.stats: Dict[str, float] = {
+            "sent": 0,
+            "dropped": 0,
+            "coalesced": 0,
+            "lag_ms_total": 0.0,
+            "lag_ms_max": 0.0,
+        }
+
+    def start(self):
+        self._writer = asyncio.create_task(self._write_loop())
+
+    def configure(self, protocol: str, coalesce_window: float):
+        """
+        Choose the frame encoding, and how long the writer waits after a new
+        message so that post batches arriving meanwhile go out as one frame
+        """
+        self.protocol = protocol
+        self.encoder = make_encoder(protocol)
+        self.coalesce_window = max(0.0, coalesce_window)
+
+    def enqueue(self, message: Any) -> bool:
+        """Queue without waiting; False means the client should be disconnected"""
+        if self.closed:
+            return True
+        now = time.perf_counter()
+        if len(self.queue) >= self.queue_size:
+            if self.policy == "disconnect":
+                return False
+            last_message = self.queue[-1][0]
+            if self.policy == "coalesce" and isinstance(message, list) and isinstance(last_message, list):
+                # Keep the older timestamp so lag reflects the oldest post in the frame
+                self.queue[-1] = (last_message + message, self.queue[-1][1])
+                self.stats["coalesced"] += 1
+                self._ready.set()
+                return True
+            self.queue.popleft()
+            self.stats["dropped"] += 1
+        self.queue.append((message, now))
+        self._ready.set()
+        return True
+
+    async def _write_loop(self):
+        try:
+            while not self.closed:
+                await self._ready.wait()
+                self._ready.clear()
+                if self.coalesce_window and self.queue:
+                    await asyncio.sleep(self.coalesce_window)
+                while self.queue and not self.closed:
+                    message, enqueued_at = self._next_frame()
+                    await asyncio.wait_for(self._send(message), self.send_timeout)
+                    lag = time.perf_counter() - enqueued_at
+                    WS_SEND_LAG_SECONDS.observe(lag, self.stream)
+                    lag_ms = lag * 1000
+                    self.stats["sent"] += 1
+                    self.stats["lag_ms_total"] += lag_ms
+                    self.stats["lag_ms_max"] = max(self.stats["lag_ms_max"], lag_ms)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Send failed or timed out; the connection is treated as gone
+            self.closed = True
+
+    def _next_frame(self) -> Tuple[Any, float]:
+        message, enqueued_at = self.queue.popleft()
+        if self.coalesce_window and isinstance(message, list):
+            # Merge consecutive post batches; other messages keep their place
+            while self.queue and isinstance(self.queue[0][0], list):
+                message = message + self.queue.popleft()[0]
+                self.stats["coalesced"] += 1
+        return message, enqueued_at
+
+    async def _send(self, message: Any):
+        if self.encoder is None:
+            await self.ws.send_json(message)
+            return
+        frame = self.encoder(message)
+        if isinstance(frame, bytes):
+            await self.ws.send_bytes(frame)
+        else:
+            await self.ws.send_text(frame)
+
+    async def close(self, code: Optional[int] = None):
+        self.closed = True
+        if self._writer is not None and self._writer is not asyncio.current_task():
+            self._writer.cancel()
+            try:
+                await self._writer
+            except (asyncio.CancelledError, Exception):
+                pass
+        if code is not None:
+            try:
+                await self.ws.close(code=code)
+            except Exception:
+                pass
+
+
+class Broadcaster:
+    """
+    Fan-out of messages to every connected WebSocket.
+
+    publish() only appends to an outbox, so producers never wait on clients.
+    A dispatcher task copies each message into the per-client queues, and each
+    client's writer task drains its own queue, so a slow browser only delays
+    itself. Full client queues are handled by the slow-client policy.
+    Post batches (lists) are routed through the subscription index, so a
+    subscribed client only receives the posts matching its filters; other
+    messages can be published with a scope of filter fields to reach only
+    the subscribed clients whose filters allow it.
+    """
+
+    def __init__(
+        self,
+        queue_size: Optional[int] = None,
+        policy: Optional[str] = None,
+        send_timeout: Optional[float] = None,
+        name: str = "posts",
+    ):
+        self.name = name
+        self.queue_size = max(1, queue_size if queue_size is not None else int(os.getenv("WS_QUEUE_SIZE", "100")))
+        self.policy = policy or os.getenv("WS_SLOW_CLIENT_POLICY", "drop_oldest")
+        if self.policy not in SLOW_CLIENT_POLICIES:
+            raise ValueError(f"Unknown slow client policy {self.policy!r}; expected one of {SLOW_CLIENT_POLICIES}")
+        self.send_timeout = send_timeout if send_timeout is not None else float(os.getenv("WS_SEND_TIMEOUT_SECONDS", "10"))
+        self.clients: List[ClientConnection] = []
+        self.subscriptions = SubscriptionIndex()
+        # (message, scope)
+        self._outbox: Deque[Tuple[Any, Optional[Mapping[str, Any]]]] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._dispatcher_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._counters = {"published": 0, "slow_disconnects": 0, "failed_clients": 0, "filtered_posts": 0}
+        # Totals from clients that have already gone away
+        self._closed_totals = {"sent": 0, "dropped": 0, "coalesced": 0}
+
+    def __len__(self):
+        return len(self.clients)
+
+    def _ensure_dispatcher(self):
+        loop = asyncio.get_running_loop()
+        if self._dispatcher is None or self._dispatcher.done() or self._dispatcher_loop is not loop:
+            self._wakeup = asyncio.Event()
+            self._dispatcher = asyncio.create_task(self._dispatch_loop())
+            self._dispatcher_loop = loop
+
+    async def connect(self, ws: Any) -> ClientConnection:
+        """Register an accepted WebSocket and start its writer"""
+        client = ClientConnection(ws, self.queue_size, self.policy, self.send_timeout, self.name)
+        client.start()
+        self.clients.append(client)
+        self._ensure_dispatcher()
+        return client
+
+    def subscribe(self, client: ClientConnection, subscription: Subscription):
+        """Replace the client's filters; an unfiltered subscription receives everything"""
+        self.subscriptions.subscribe(client, subscription)
+
+    def send(self, client: ClientConnection, message: Any):
+        """Queue a message for one client, behind anything already queued for it"""
+        if not client.enqueue(message):
+            self._drop_slow(client)
+
+    async def disconnect(self, client: ClientConnection, code: Optional[int] = None):
+        self.subscriptions.unsubscribe(client)
+        if client in self.clients:
+            self.clients.remove(client)
+            for key in self._closed_totals:
+                self._closed_totals[key] += client.stats[key]
+        await client.close(code)
+
+    def publish(self, message: Any, scope: Optional[Mapping[str, Any]] = None):
+        """
+        Queue a message for every client without waiting on any of them.
+        With a scope (e.g. {"location": ..., "category": ...}) subscribed
+        clients only get it if their filters allow those values.
+        """
+        if not self.clients:
+            return
+        self._counters["published"] += 1
+        self._outbox.append((message, scope))
+        self._ensure_dispatcher()
+        self._wakeup.set()
+
+    async def _dispatch_loop(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            while self._outbox:
+                message, scope = self._outbox.popleft()
+                started = time.perf_counter()
+                routed = None
+                allowed = None
+                if isinstance(message, list) and len(self.subscriptions):
+                    routed = self.subscriptions.route(message)
+                elif scope is not None and len(self.subscriptions):
+                    allowed = self.subscriptions.match_scope(scope)
+                for client in list(self.clients):
+                    if client.closed:
+                        self._counters["failed_clients"] += 1
+                        await self.disconnect(client)
+                        continue
+                    payload = message
+                    if routed is not None and client in self.subscriptions:
+                        payload = routed.get(client)
+                        self._counters["filtered_posts"] += len(message) - len(payload or ())
+                        if not payload:
+                            continue
+                    elif allowed is not None and client in self.subscriptions and client not in allowed:
+                        continue
+                    if not client.enqueue(payload):
+                        self._drop_slow(client)
+                WS_DISPATCH_SECONDS.observe(time.perf_counter() - started, self.name)
+
+    def _drop_slow(self, client: ClientConnection):
+        self._counters["slow_disconnects"] += 1
+        self.subscriptions.unsubscribe(client)
+        if client in self.clients:
+            self.clients.remove(client)
+        # Closing can wait on the socket; don't hold up other clients
+        asyncio.create_task(self._close_slow(client))
+
+    async def _close_slow(self, client: ClientConnection):
+        for key in self._closed_totals:
+            self._closed_totals[key] += client.stats[key]
+        await client.close(SLOW_CLIENT_CLOSE_CODE)
+
+    async def close(self):
+        for client in list(self.clients):
+            await self.disconnect(client)
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            self._dispatcher = None
+
+    def stats(self) -> Dict[str, Any]:
+        sent = sum(client.stats["sent"] for client in self.clients)
+        lag_total = sum(client.stats["lag_ms_total"] for client in self.clients)
+        depths = [len(client.queue) for client in self.clients]
+        return {
+            "clients": len(self.clients),
+            "subscribed_clients": len(self.subscriptions),
+            "policy": self.policy,
+            "queue_size": self.queue_size,
+            **self._counters,
+            "outbox_depth": len(self._outbox),
+            "sent": self._closed_totals["sent"] + sent,
+            "dropped": self._closed_totals["dropped"] + sum(client.stats["dropped"] for client in self.clients),
+            "coalesced": self._closed_totals["coalesced"] + sum(client.stats["coalesced"] for client in self.clients),
+            "queue_depth_max": max(depths, default=0),
+            "lag_ms_avg": round(lag_total / sent, 2) if sent else None,
+            "lag_ms_max": round(max((client.stats["lag_ms_max"] for client in self.clients), default=0.0), 2),
+        }
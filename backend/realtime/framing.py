@@ -0,0 +1,70 @@
+
+import json
+from typing import Any, Callable, Dict, List, Optional, Union
+
+try:
+    import msgpack
+except ImportError:  # optional; compact JSON is used instead
+    msgpack = None
+
+# "json" is the original format: every message as plain JSON, post batches as
+# arrays of objects. The compact protocols send post batches as one list of
+# field names plus rows of values, so keys are not repeated for every post.
+PROTOCOLS = ("json", "compact", "msgpack")
+
+Frame = Union[str, bytes]
+Encoder = Callable[[Any], Frame]
+
+
+def resolve_protocol(requested: Optional[str]) -> str:
+    """The protocol actually used for a request; msgpack needs the optional package"""
+    protocol = (requested or "json").strip().lower()
+    if protocol not in PROTOCOLS:
+        raise ValueError(f"protocol must be one of {PROTOCOLS}")
+    if protocol == "msgpack" and msgpack is None:
+        return "compact"
+    return protocol
+
+
+def pack_posts(posts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """{"type": "posts", "fields": [...], "rows": [[...], ...]}"""
+    fields: List[str] = []
+    seen = set()
+    for post in posts:
+        for field in post:
+            if field not in seen:
+                seen.add(field)
+                fields.append(field)
+    return {
+        "type": "posts",
+        "fields": fields,
+        "rows": [[post.get(field) for field in fields] for post in posts],
+    }
+
+
+def unpack_posts(message: Dict[str, Any]) -> List[Dict[str, Any]]:
+    fields = message["fields"]
+    return [dict(zip(fields, row)) for row in message["rows"]]
+
+
+def compact_message(message: Any) -> Any:
+    if isinstance(message, list) and all(isinstance(post, dict) for post in message):
+        return pack_posts(message)
+    return message
+
+
+def make_encoder(protocol: str) -> Optional[Encoder]:
+    """None for the original JSON protocol, which is sent with send_json"""
+    if protocol == "compact":
+        return lambda message: json.dumps(compact_message(message), separators=(",", ":"), ensure_ascii=False)
+    if protocol == "msgpack":
+        return lambda message: msgpack.packb(compact_message(message), use_bin_type=True)
+    return None
+
+
+def decode_frame(frame: Frame) -> Any:
+    """Inverse of the compact encoders, for clients written in Python"""
+    message = msgpack.unpackb(frame, raw=False) if isinstance(frame, bytes) else json.loads(frame)
+    if isinstance(message, dict) and message.get("type") == "posts":
+        return unpack_posts(message)
+    return message
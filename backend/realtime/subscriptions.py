@@ -0,0 +1,156 @@
+
+from collections import defaultdict
+from typing import Any, Dict, FrozenSet, Hashable, Iterable, List, Mapping, Optional, Set
+
+# Ordered from least to most urgent
+PRIORITY_LEVELS = ("low", "normal", "high")
+CRITICAL_CATEGORIES = {"safety", "water", "infrastructure", "waste"}
+
+# Post fields a subscription can constrain
+FILTER_FIELDS = ("category", "sentiment", "platform", "location")
+
+
+def post_priority(post: Mapping[str, Any]) -> str:
+    """Negative posts are high priority, critical categories normal, the rest low"""
+    if post.get("sentiment") == "negative":
+        return "high"
+    if post.get("category") in CRITICAL_CATEGORIES:
+        return "normal"
+    return "low"
+
+
+def _normalize(value: Any) -> Optional[str]:
+    return str(value).strip().lower() if value is not None else None
+
+
+class Subscription:
+    """Which posts a connection wants; an unset field matches anything"""
+
+    def __init__(self, filters: Optional[Dict[str, FrozenSet[str]]] = None, min_priority: str = "low"):
+        self.filters = filters or {}
+        self.min_priority = min_priority
+
+    @classmethod
+    def parse(cls, data: Mapping[str, Any]) -> "Subscription":
+        """
+        Build from a subscribe message or query parameters. Each field takes a
+        value, a list of values or a comma separated string. Raises ValueError.
+        """
+        filters: Dict[str, FrozenSet[str]] = {}
+        for field in FILTER_FIELDS:
+            raw = data.get(field)
+            if raw in (None, "", []):
+                continue
+            values = raw if isinstance(raw, list) else str(raw).split(",")
+            normalized = frozenset(_normalize(value) for value in values if str(value).strip())
+            if normalized:
+                filters[field] = normalized
+
+        min_priority = _normalize(data.get("min_priority")) or "low"
+        if min_priority not in PRIORITY_LEVELS:
+            raise ValueError(f"min_priority must be one of {PRIORITY_LEVELS}")
+        return cls(filters, min_priority)
+
+    @property
+    def is_filtered(self) -> bool:
+        return bool(self.filters) or self.min_priority != "low"
+
+    def matches(self, post: Mapping[str, Any]) -> bool:
+        for field, allowed in self.filters.items():
+            if _normalize(post.get(field)) not in allowed:
+                return False
+        return PRIORITY_LEVELS.index(post_priority(post)) >= PRIORITY_LEVELS.index(self.min_priority)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            **{field: sorted(values) for field, values in self.filters.items()},
+            "min_priority": self.min_priority,
+        }
+
+
+class SubscriptionIndex:
+    """
+    Inverted index from field values to subscribed connections, so routing a
+    post costs a few set intersections rather than a check per connection.
+    Connections without a filtered subscription are not indexed; they get
+    every post.
+    """
+
+    def __init__(self):
+        self._subscriptions: Dict[Hashable, Subscription] = {}
+        self._by_value: Dict[str, Dict[str, Set[Hashable]]] = {field: defaultdict(set) for field in FILTER_FIELDS}
+        # Subscribers that leave a field unconstrained
+        self._any_value: Dict[str, Set[Hashable]] = {field: set() for field in FILTER_FIELDS}
+        self._by_min_priority: Dict[str, Set[Hashable]] = {level: set() for level in PRIORITY_LEVELS}
+
+    def __len__(self):
+        return len(self._subscriptions)
+
+    def __contains__(self, client: Hashable) -> bool:
+        return client in self._subscriptions
+
+    def get(self, client: Hashable) -> Optional[Subscription]:
+        return self._subscriptions.get(client)
+
+    def subscribe(self, client: Hashable, subscription: Subscription):
+        self.unsubscribe(client)
+        if not subscription.is_filtered:
+            return
+        self._subscriptions[client] = subscription
+        for field in FILTER_FIELDS:
+            values = subscription.filters.get(field)
+            if values is None:
+                self._any_value[field].add(client)
+            else:
+                for value in values:
+                    self._by_value[field][value].add(client)
+        self._by_min_priority[subscription.min_priority].add(client)
+
+    def unsubscribe(self, client: Hashable):
+        subscription = self._subscriptions.pop(client, None)
+        if subscription is None:
+            return
+        for field in FILTER_FIELDS:
+            self._any_value[field].discard(client)
+            for value in subscription.filters.get(field, ()):
+                clients = self._by_value[field].get(value)
+                if clients is not None:
+                    clients.discard(client)
+                    if not clients:
+                        del self._by_value[field][value]
+        self._by_min_priority[subscription.min_priority].discard(client)
+
+    def match(self, post: Mapping[str, Any]) -> Set[Hashable]:
+        """Subscribed connections that want this post"""
+        priority = PRIORITY_LEVELS.index(post_priority(post))
+        candidates: Set[Hashable] = set()
+        for level in PRIORITY_LEVELS[:priority + 1]:
+            candidates |= self._by_min_priority[level]
+
+        for field in FILTER_FIELDS:
+            if not candidates:
+                break
+            matching = self._by_value[field].get(_normalize(post.get(field)), set())
+            candidates &= self._any_value[field] | matching
+        return candidates
+
+    def match_scope(self, scope: Mapping[str, Any]) -> Set[Hashable]:
+        """
+        Subscribed connections whose filters allow every field given in scope,
+        for messages about a slice of posts rather than a post; fields the
+        scope leaves out and min_priority are not checked
+        """
+        candidates: Set[Hashable] = set(self._subscriptions)
+        for field in FILTER_FIELDS:
+            if field not in scope or not candidates:
+                continue
+            candidates &= self._any_value[field] | self._by_value[field].get(_normalize(scope[field]), set())
+        return candidates
+
+    def route(self, posts: Iterable[Mapping[str, Any]]) -> Dict[Hashable, List[Mapping[str, Any]]]:
+        """Split a batch into the posts each subscribed connection should receive"""
+        routed: Dict[Hashable, List[Mapping[str, Any]]] = defaultdict(list)
+        for post in posts:
+            for client in self.match(post):
+                routed[client].append(post)
+        return routed
@@ -1,82 +1,229 @@
 
 import os
+import logging
+import json
 import asyncio
-import facebook
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+import httpx
 from dotenv import load_dotenv
 
+from analytics.time_range import stored_timestamp
+
 load_dotenv()
 
+DEFAULT_GRAPH_BASE_URL = "https://graph.facebook.com/v16.0"
+
+logger = logging.getLogger(__name__)
+# The Graph API accepts at most 50 requests per batch call
+MAX_BATCH_SIZE = 50
+# X-App-Usage is a percentage of the app's hourly allowance; above this the
+# remaining share is spread over the hour
+USAGE_THROTTLE_PERCENT = 75.0
+USAGE_WINDOW_SECONDS = 3600.0
+
 class FacebookClient:
-    def __init__(self):
+    def __init__(self, base_url: Optional[str] = None):
         # Load Facebook API credentials
         self.app_id = os.getenv("FACEBOOK_APP_ID", "")
         self.app_secret = os.getenv("FACEBOOK_APP_SECRET", "")
         self.access_token = os.getenv("FACEBOOK_ACCESS_TOKEN", "")
-        
+        self.base_url = base_url or os.getenv("FACEBOOK_GRAPH_BASE_URL", DEFAULT_GRAPH_BASE_URL)
+
         # Check if credentials are available
         self.is_configured = all([self.app_id, self.app_secret, self.access_token])
-        
-        if self.is_configured:
-            # Initialize Facebook Graph API client
-            self.graph = facebook.GraphAPI(access_token=self.access_token, version="v16.0")
-            
-            # List of pages/groups to monitor (would need page IDs in production)
-            self.page_ids = os.getenv("FACEBOOK_PAGE_IDS", "").split(",")
-            
-            # For development/testing, use predefined data
-            self.use_mock_data = not self.is_configured
-        else:
-            self.use_mock_data = True
-            print("Facebook API credentials not found. Using mock data.")
+
+        # List of pages/groups to monitor (would need page IDs in production)
+        self.page_ids = [page_id.strip() for page_id in os.getenv("FACEBOOK_PAGE_IDS", "").split(",") if page_id.strip()]
+        self.batch_size = min(MAX_BATCH_SIZE, max(1, int(os.getenv("FACEBOOK_BATCH_SIZE", str(MAX_BATCH_SIZE)))))
+        self.max_concurrent_batches = max(1, int(os.getenv("FACEBOOK_MAX_CONCURRENT_BATCHES", "4")))
+        self.posts_per_page = int(os.getenv("FACEBOOK_POSTS_PER_PAGE", "25"))
+        self.timeout_seconds = float(os.getenv("FACEBOOK_HTTP_TIMEOUT_SECONDS", "20"))
+
+        # Newest created_time (unix seconds) seen per page, sent as `since`
+        self.since_by_page: Dict[str, int] = {}
+        # Last X-App-Usage header reported by the Graph API
+        self.app_usage: Dict[str, Any] = {}
+        self.last_request_count = 0
+        # Whether the last poll had more posts than one page holds
+        self.last_fetch_saturated = False
+
+        self._http: Optional[httpx.AsyncClient] = None
+        self._http_loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # For development/testing, use predefined data
+        self.use_mock_data = not self.is_configured
+        if self.use_mock_data:
+            logger.info("Facebook API credentials not found. Using mock data.")
+
+    def _client(self) -> httpx.AsyncClient:
+        """One pooled keep-alive client per event loop"""
+        loop = asyncio.get_running_loop()
+        if self._http is None or self._http_loop is not loop:
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout_seconds,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrent_batches,
+                    max_keepalive_connections=self.max_concurrent_batches,
+                ),
+            )
+            self._http_loop = loop
+        return self._http
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    def rate_limit_status(self) -> Dict[str, Optional[float]]:
+        """
+        The app usage budget in the shape the poll scheduler expects: the most
+        used of call_count, total_time and total_cputime, as percent remaining.
+        Usage decays over a rolling hour, so a reset time is only given once
+        the throttle threshold is passed.
+        """
+        usage = [
+            float(self.app_usage[key]) for key in ("call_count", "total_time", "total_cputime")
+            if isinstance(self.app_usage.get(key), (int, float))
+        ]
+        if not usage:
+            return {"limit": None, "remaining": None, "reset_in_seconds": None}
+        remaining = max(0.0, 100.0 - max(usage))
+        return {
+            "limit": 100.0,
+            "remaining": remaining,
+            "reset_in_seconds": USAGE_WINDOW_SECONDS if remaining <= 100.0 - USAGE_THROTTLE_PERCENT else None,
+        }
+
+    def _relative_url(self, page_id: str) -> str:
+        url = f"{page_id}/posts?fields=message,created_time,place&limit={self.posts_per_page}"
+        since = self.since_by_page.get(page_id)
+        if since:
+            url += f"&since={since}"
+        return url
 
     async def fetch_recent_posts(self) -> List[Dict[str, Any]]:
-        """Fetch recent Facebook posts from relevant pages"""
+        """
+        Fetch new posts from every monitored page using Graph API batch
+        requests (up to 50 pages per call), with a bounded number in flight.
+        A failed batch is logged and its pages are retried next poll; only
+        when every batch fails does the error reach the caller.
+        """
+        self.last_fetch_saturated = False
         if self.use_mock_data:
             # Return mock data for development
             return self._get_mock_posts()
-        
-        try:
-            # Convert to async operation
-            loop = asyncio.get_event_loop()
-            
-            all_posts = []
-            for page_id in self.page_ids:
-                # Get posts from this page
-                response = await loop.run_in_executor(
-                    None, 
-                    lambda: self.graph.get_object(
-                        id=page_id,
-                        fields='posts.limit(5){message,created_time,place}'
-                    )
-                )
-                
-                if 'posts' in response and 'data' in response['posts']:
-                    # Process and convert posts to our format
-                    for post in response['posts']['data']:
-                        if 'message' not in post:
-                            continue
-                            
-                        # Extract location if available
-                        location = "Tamil Nadu"  # Default
-                        if 'place' in post and 'name' in post['place']:
-                            location = post['place']['name']
-                            
-                        processed_post = {
-                            'id': post['id'],
-                            'platform': 'Facebook',
-                            'content': post['message'],
-                            'timestamp': post['created_time'],
-                            'location': location
-                        }
-                        all_posts.append(processed_post)
-            
-            return all_posts
-        except Exception as e:
-            print(f"Error fetching Facebook posts: {e}")
-            return []
-    
+
+        batches = [
+            self.page_ids[start:start + self.batch_size]
+            for start in range(0, len(self.page_ids), self.batch_size)
+        ]
+        self.last_request_count = len(batches)
+        semaphore = asyncio.Semaphore(self.max_concurrent_batches)
+
+        async def run_batch(page_ids: List[str]) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+            async with semaphore:
+                return await self._fetch_batch(page_ids)
+
+        results = await asyncio.gather(*(run_batch(page_ids) for page_ids in batches), return_exceptions=True)
+        failures = [result for result in results if isinstance(result, BaseException)]
+        if failures and len(failures) == len(results):
+            raise failures[0]
+
+        all_posts = []
+        for page_ids, result in zip(batches, results):
+            if isinstance(result, BaseException):
+                logger.warning("Error fetching Facebook batch of %d pages: %s", len(page_ids), result)
+                continue
+            batch_posts, cursors = result
+            all_posts.extend(batch_posts)
+            # Cursors move only together with the posts they skip past
+            for page_id, created_epoch in cursors.items():
+                if created_epoch > self.since_by_page.get(page_id, 0):
+                    self.since_by_page[page_id] = created_epoch
+        return all_posts
+
+    def _relative_next(self, url: str) -> str:
+        """A `paging.next` link made relative to the Graph base URL, for use inside a batch"""
+        parts = urlsplit(url)
+        base_path = urlsplit(self.base_url).path.rstrip("/")
+        path = parts.path[len(base_path):] if parts.path.startswith(base_path) else parts.path
+        return f"{path.lstrip('/')}?{parts.query}"
+
+    async def _post_batch(self, relative_urls: List[str]) -> List[Optional[Dict[str, Any]]]:
+        batch = [{"method": "GET", "relative_url": url} for url in relative_urls]
+        response = await self._client().post(
+            "/",
+            data={
+                "access_token": self.access_token,
+                "batch": json.dumps(batch),
+                "include_headers": "false",
+            },
+        )
+        if "x-app-usage" in response.headers:
+            self.app_usage = json.loads(response.headers["x-app-usage"])
+        response.raise_for_status()
+        return response.json()
+
+    async def _fetch_batch(self, page_ids: List[str]) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+        """
+        New posts of these pages, and the newest created_time per page, which
+        the caller stores as the page's cursor once it has the posts
+        """
+        all_posts = []
+        cursors: Dict[str, int] = {}
+        requests = {page_id: self._relative_url(page_id) for page_id in page_ids}
+        while requests:
+            results = await self._post_batch(list(requests.values()))
+            next_requests = {}
+            # Responses come back in request order; failed entries are null or non-200
+            for page_id, result in zip(requests, results):
+                if not result or result.get("code") != 200:
+                    logger.warning("Error fetching Facebook page %s: %s", page_id, result.get('body') if result else 'no response')
+                    # Posts already fetched for it are kept, but without a
+                    # cursor so the ones this page would have led to are retried
+                    cursors.pop(page_id, None)
+                    continue
+
+                body = json.loads(result.get("body") or "{}")
+                posts = body.get("data", [])
+                oldest_epoch = None
+                for post in posts:
+                    created = datetime.strptime(post['created_time'], "%Y-%m-%dT%H:%M:%S%z")
+                    created_epoch = int(created.timestamp())
+                    oldest_epoch = created_epoch if oldest_epoch is None else min(oldest_epoch, created_epoch)
+                    if created_epoch > cursors.get(page_id, 0):
+                        cursors[page_id] = created_epoch
+                    if 'message' not in post:
+                        continue
+
+                    # Extract location if available
+                    location = "Tamil Nadu"  # Default
+                    if 'place' in post and 'name' in post['place']:
+                        location = post['place']['name']
+
+                    all_posts.append({
+                        'id': post['id'],
+                        'platform': 'Facebook',
+                        'content': post['message'],
+                        'timestamp': stored_timestamp(created),
+                        'location': location
+                    })
+
+                # Posts come newest first; a page that got more than one page of
+                # posts since its cursor is followed until the cursor is reached
+                since = self.since_by_page.get(page_id)
+                next_url = (body.get("paging") or {}).get("next")
+                if since and next_url and oldest_epoch is not None and oldest_epoch > since:
+                    next_requests[page_id] = self._relative_next(next_url)
+                if page_id in next_requests or len(posts) >= self.posts_per_page:
+                    self.last_fetch_saturated = True
+            requests = next_requests
+
+        return all_posts, cursors
+
     def _get_mock_posts(self) -> List[Dict[str, Any]]:
         """Generate mock Facebook posts for development"""
         import random
@@ -1,133 +1,215 @@
 
 import os
-import tweepy
+import logging
 import asyncio
-from typing import List, Dict, Any
+import time
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+import httpx
 from dotenv import load_dotenv
 
+from analytics.time_range import stored_timestamp
+
 load_dotenv()
 
+DEFAULT_API_BASE_URL = "https://api.twitter.com/2"
+
+logger = logging.getLogger(__name__)
+
+# Templates for mock posts, also used by the synthetic benchmark data generator
+MOCK_LOCATIONS = [
+    "Chennai", "Coimbatore", "Madurai", "Trichy", "Salem",
+    "Tirunelveli", "Thoothukudi", "Nagercoil"
+]
+MOCK_PLATFORMS = ["Twitter", "Facebook", "Citizen Portal"]
+MOCK_TOPICS = [
+    "The roads in {loc} need immediate repair. Too many potholes!",
+    "Loving the new park in {loc}. Great job by the municipality!",
+    "Power outage in {loc} again. Third time this week!",
+    "Water supply issue in {loc} has been fixed. Thanks to the corporation!",
+    "Heavy traffic near {loc} central due to ongoing construction.",
+    "Garbage bins are overflowing near the market in {loc}.",
+    "Streetlights are out near the bus stand in {loc}. It feels unsafe.",
+    "The government hospital queue in {loc} moved quickly today.",
+    "Drainage water is flooding the main street in {loc} after rain.",
+    "New bus frequency in {loc} is helping students reach college on time."
+]
+
 class TwitterClient:
-    def __init__(self):
+    def __init__(self, base_url: Optional[str] = None):
         # Load Twitter API credentials
         self.api_key = os.getenv("TWITTER_API_KEY", "")
         self.api_secret = os.getenv("TWITTER_API_SECRET", "")
         self.access_token = os.getenv("TWITTER_ACCESS_TOKEN", "")
         self.access_token_secret = os.getenv("TWITTER_ACCESS_TOKEN_SECRET", "")
         self.bearer_token = os.getenv("TWITTER_BEARER_TOKEN", "")
-        
-        # Check if credentials are available
-        self.is_configured = all([self.api_key, self.api_secret, self.bearer_token])
-        
-        if self.is_configured:
-            # Initialize Twitter client
-            self.client = tweepy.Client(
-                bearer_token=self.bearer_token,
-                consumer_key=self.api_key, 
-                consumer_secret=self.api_secret,
-                access_token=self.access_token, 
-                access_token_secret=self.access_token_secret
+        self.base_url = base_url or os.getenv("TWITTER_API_BASE_URL", DEFAULT_API_BASE_URL)
+
+        # Recent search only needs app-only (bearer token) auth
+        self.is_configured = bool(self.bearer_token)
+
+        # Page size is capped at 100 by the API; pages per poll bound one burst
+        self.max_results = min(100, max(10, int(os.getenv("TWITTER_MAX_RESULTS", "100"))))
+        self.max_pages = max(1, int(os.getenv("TWITTER_MAX_PAGES", "10")))
+        self.timeout_seconds = float(os.getenv("TWITTER_HTTP_TIMEOUT_SECONDS", "10"))
+
+        # Define search query for Tamil Nadu
+        self.tamilnadu_locations = [
+            "Chennai", "Coimbatore", "Madurai", "Trichy", "Salem",
+            "Tirunelveli", "Thoothukudi", "Nagercoil", "Tamil Nadu"
+        ]
+        self.query_string = " OR ".join([f"\"{loc}\"" for loc in self.tamilnadu_locations])
+
+        # Newest tweet already seen; only advanced once a poll has read every page
+        self.last_id: Optional[str] = None
+        # Pagination left unfinished by the previous poll (page cap or rate limit)
+        self._resume: Optional[Dict[str, Optional[str]]] = None
+        # True when the last poll stopped with more pages still available
+        self.last_fetch_saturated = False
+        # HTTP requests made by the last poll, used to pace against the rate limit
+        self.last_request_count = 0
+        self.rate_limit: Dict[str, Optional[float]] = {"limit": None, "remaining": None, "reset_at": None}
+
+        self._http: Optional[httpx.AsyncClient] = None
+        self._http_loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # For development/testing, use a smaller set of predefined data
+        self.use_mock_data = not self.is_configured
+        if self.use_mock_data:
+            logger.info("Twitter API credentials not found. Using mock data.")
+
+    def _client(self) -> httpx.AsyncClient:
+        """One pooled keep-alive client per event loop"""
+        loop = asyncio.get_running_loop()
+        if self._http is None or self._http_loop is not loop:
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {self.bearer_token}"},
+                timeout=self.timeout_seconds,
+                limits=httpx.Limits(max_connections=4, max_keepalive_connections=4),
             )
-            
-            # Define search query for Tamil Nadu
-            self.tamilnadu_locations = [
-                "Chennai", "Coimbatore", "Madurai", "Trichy", "Salem", 
-                "Tirunelveli", "Thoothukudi", "Nagercoil", "Tamil Nadu"
-            ]
-            self.query_string = " OR ".join([f"\"{loc}\"" for loc in self.tamilnadu_locations])
-            
-            # For development/testing, use a smaller set of predefined data
-            self.use_mock_data = not self.is_configured
-            self.last_id = None
-        else:
-            self.use_mock_data = True
-            print("Twitter API credentials not found. Using mock data.")
+            self._http_loop = loop
+        return self._http
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    def _update_rate_limit(self, headers: httpx.Headers):
+        for key, header in (("limit", "x-rate-limit-limit"), ("remaining", "x-rate-limit-remaining"), ("reset_at", "x-rate-limit-reset")):
+            if header in headers:
+                self.rate_limit[key] = float(headers[header])
+
+    def rate_limit_status(self) -> Dict[str, Optional[float]]:
+        """Remaining requests in the current window and seconds until it resets"""
+        reset_at = self.rate_limit["reset_at"]
+        return {
+            "limit": self.rate_limit["limit"],
+            "remaining": self.rate_limit["remaining"],
+            "reset_in_seconds": max(0.0, reset_at - time.time()) if reset_at else None,
+        }
+
+    def _rate_limited(self) -> bool:
+        reset_at = self.rate_limit["reset_at"]
+        return self.rate_limit["remaining"] == 0 and reset_at is not None and reset_at > time.time()
 
     async def fetch_recent_posts(self) -> List[Dict[str, Any]]:
-        """Fetch recent tweets related to Tamil Nadu cities"""
+        """
+        Fetch recent tweets related to Tamil Nadu cities, following next_token
+        pagination. HTTP errors propagate so the source registry can count them.
+        """
         if self.use_mock_data:
             # Return mock data for development
             return self._get_mock_posts()
-        
-        try:
-            # Convert to async operation
-            loop = asyncio.get_event_loop()
-            
-            # Search for recent tweets
-            response = await loop.run_in_executor(
-                None, 
-                lambda: self.client.search_recent_tweets(
-                    query=self.query_string,
-                    max_results=10,
-                    since_id=self.last_id,
-                    tweet_fields=['created_at', 'text', 'geo']
-                )
-            )
-            
-            if not response.data:
-                return []
-                
-            # Update the last ID for next query
-            self.last_id = response.data[0].id
-            
-            # Process and convert tweets to our format
-            processed_posts = []
-            for tweet in response.data:
-                # Extract location from tweet if available
-                location = "Tamil Nadu"  # Default
-                if tweet.geo and tweet.geo.get('place_id'):
-                    # In a real implementation, you'd resolve place_id to actual location
-                    location = "Tamil Nadu"  # For simplicity
-                
-                post = {
-                    'id': str(tweet.id),
-                    'platform': 'Twitter',
-                    'content': tweet.text,
-                    'timestamp': tweet.created_at.isoformat(),
-                    'location': location
-                }
-                processed_posts.append(post)
-                
-            return processed_posts
-        except Exception as e:
-            print(f"Error fetching tweets: {e}")
+
+        if self._rate_limited():
             return []
-    
+
+        params: Dict[str, Any] = {
+            "query": self.query_string,
+            "max_results": self.max_results,
+            "tweet.fields": "created_at,text,geo",
+        }
+        if self.last_id:
+            params["since_id"] = self.last_id
+
+        newest_id = None
+        next_token = None
+        if self._resume:
+            newest_id = self._resume["newest_id"]
+            next_token = self._resume["next_token"]
+
+        http = self._client()
+        processed_posts = []
+        self.last_request_count = 0
+        for _ in range(self.max_pages):
+            page_params = dict(params, next_token=next_token) if next_token else params
+            response = await http.get("/tweets/search/recent", params=page_params)
+            self.last_request_count += 1
+            self._update_rate_limit(response.headers)
+            if response.status_code == 429:
+                logger.warning("Twitter rate limit reached; resuming after reset")
+                break
+            response.raise_for_status()
+
+            body = response.json()
+            meta = body.get("meta", {})
+            # The first page of a search carries the newest id of the whole result
+            newest_id = newest_id or meta.get("newest_id")
+            processed_posts.extend(self._to_post(tweet) for tweet in body.get("data", []))
+            next_token = meta.get("next_token")
+            if not next_token or self.rate_limit["remaining"] == 0:
+                break
+
+        self.last_fetch_saturated = bool(next_token)
+        if next_token:
+            # Keep since_id where it was so the unread pages are fetched next poll
+            self._resume = {"newest_id": newest_id, "next_token": next_token}
+        else:
+            self._resume = None
+            if newest_id:
+                self.last_id = newest_id
+
+        return processed_posts
+
+    def _to_post(self, tweet: Dict[str, Any]) -> Dict[str, Any]:
+        # Extract location from tweet if available
+        location = "Tamil Nadu"  # Default
+        if (tweet.get("geo") or {}).get("place_id"):
+            # In a real implementation, you'd resolve place_id to actual location
+            location = "Tamil Nadu"  # For simplicity
+
+        created_at = tweet.get("created_at")
+        timestamp = (
+            stored_timestamp(datetime.fromisoformat(created_at.replace("Z", "+00:00")))
+            if created_at else datetime.now().isoformat()
+        )
+        return {
+            'id': str(tweet["id"]),
+            'platform': 'Twitter',
+            'content': tweet["text"],
+            'timestamp': timestamp,
+            'location': location
+        }
+
     def _get_mock_posts(self) -> List[Dict[str, Any]]:
         """Generate mock civic posts for local real-time development."""
         import random
         from datetime import datetime
         
-        locations = [
-            "Chennai", "Coimbatore", "Madurai", "Trichy", "Salem",
-            "Tirunelveli", "Thoothukudi", "Nagercoil"
-        ]
-        platforms = ["Twitter", "Facebook", "Citizen Portal"]
-        topics = [
-            "The roads in {loc} need immediate repair. Too many potholes!",
-            "Loving the new park in {loc}. Great job by the municipality!",
-            "Power outage in {loc} again. Third time this week!",
-            "Water supply issue in {loc} has been fixed. Thanks to the corporation!",
-            "Heavy traffic near {loc} central due to ongoing construction.",
-            "Garbage bins are overflowing near the market in {loc}.",
-            "Streetlights are out near the bus stand in {loc}. It feels unsafe.",
-            "The government hospital queue in {loc} moved quickly today.",
-            "Drainage water is flooding the main street in {loc} after rain.",
-            "New bus frequency in {loc} is helping students reach college on time."
-        ]
-        
         # Create 1-3 random posts
         num_posts = random.randint(1, 3)
         posts = []
         
         for i in range(num_posts):
-            loc = random.choice(locations)
-            content = random.choice(topics).format(loc=loc)
+            loc = random.choice(MOCK_LOCATIONS)
+            content = random.choice(MOCK_TOPICS).format(loc=loc)
             now = datetime.now()
             
             post = {
                 'id': f"mock-{int(now.timestamp())}-{i}-{random.randint(100, 999)}",
-                'platform': random.choice(platforms),
+                'platform': random.choice(MOCK_PLATFORMS),
                 'content': content,
                 'timestamp': now.isoformat(),
                 'location': loc
@@ -0,0 +1,106 @@
+import asyncio
+import unittest
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from realtime.broadcaster import Broadcaster, SLOW_CLIENT_CLOSE_CODE
+
+
+class FakeSocket:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.sent = []
+        self.close_code = None
+        self.release = asyncio.Event()
+
+    async def send_json(self, message):
+        if self.delay is None:
+            # Blocks until released, like a browser that stopped reading
+            await self.release.wait()
+        else:
+            await asyncio.sleep(self.delay)
+        self.sent.append(message)
+
+    async def close(self, code=1000):
+        self.close_code = code
+
+
+class BroadcasterTests(unittest.TestCase):
+    def test_slow_client_does_not_delay_others(self):
+        async def run():
+            broadcaster = Broadcaster(queue_size=10, policy="drop_oldest", send_timeout=5)
+            fast, slow = FakeSocket(), FakeSocket(delay=None)
+            await broadcaster.connect(fast)
+            await broadcaster.connect(slow)
+
+            for index in range(3):
+                broadcaster.publish([{"id": index}])
+            await asyncio.sleep(0.05)
+            received_before_release = list(slow.sent)
+            slow.release.set()
+            await asyncio.sleep(0.05)
+            stats = broadcaster.stats()
+            await broadcaster.close()
+            return fast.sent, received_before_release, slow.sent, stats
+
+        fast_sent, slow_before, slow_sent, stats = asyncio.run(run())
+
+        self.assertEqual(fast_sent, [[{"id": 0}], [{"id": 1}], [{"id": 2}]])
+        self.assertEqual(slow_before, [])
+        self.assertEqual(slow_sent, fast_sent)
+        self.assertEqual(stats["published"], 3)
+        self.assertEqual(stats["sent"], 6)
+        self.assertIsNotNone(stats["lag_ms_avg"])
+
+    def test_full_queue_policies(self):
+        async def run(policy):
+            broadcaster = Broadcaster(queue_size=2, policy=policy, send_timeout=5)
+            stuck = FakeSocket(delay=None)
+            await broadcaster.connect(stuck)
+            for index in range(6):
+                broadcaster.publish([index])
+                await asyncio.sleep(0)
+            await asyncio.sleep(0.01)
+            stuck.release.set()
+            await asyncio.sleep(0.01)
+            stats = broadcaster.stats()
+            await broadcaster.close()
+            return stuck, stats
+
+        stuck, stats = asyncio.run(run("drop_oldest"))
+        # The first message is already being sent; the queue keeps the newest two
+        self.assertEqual(stuck.sent, [[0], [4], [5]])
+        self.assertEqual(stats["dropped"], 3)
+
+        stuck, stats = asyncio.run(run("coalesce"))
+        self.assertEqual(stuck.sent, [[0], [1], [2, 3, 4, 5]])
+        self.assertEqual(stats["coalesced"], 3)
+
+        stuck, stats = asyncio.run(run("disconnect"))
+        self.assertEqual(stuck.close_code, SLOW_CLIENT_CLOSE_CODE)
+        self.assertEqual(stats["slow_disconnects"], 1)
+        self.assertEqual(stats["clients"], 0)
+
+    def test_failed_send_removes_client(self):
+        class BrokenSocket(FakeSocket):
+            async def send_json(self, message):
+                raise RuntimeError("connection reset")
+
+        async def run():
+            broadcaster = Broadcaster(queue_size=5)
+            await broadcaster.connect(BrokenSocket())
+            broadcaster.publish(["first"])
+            await asyncio.sleep(0.01)
+            broadcaster.publish(["second"])
+            await asyncio.sleep(0.01)
+            return broadcaster.stats()
+
+        stats = asyncio.run(run())
+        self.assertEqual(stats["clients"], 0)
+        self.assertEqual(stats["failed_clients"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
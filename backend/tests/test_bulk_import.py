@@ -0,0 +1,87 @@
+import asyncio
+import json
+import sqlite3
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from db.database import DatabaseManager
+from ingestion.bulk_import import BulkImporter, Checkpoint
+
+
+class BulkImportTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name)
+        self.db = DatabaseManager(str(self.root / "import.db"))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _import(self, *paths, restart=False):
+        async def run():
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                importer = BulkImporter(self.db, executor, in_flight=2, chunk_size=2, commit_size=3)
+                for path in paths:
+                    await importer.import_file(path, restart=restart)
+                await importer.rebuild_trends()
+                return importer.stats
+
+        return asyncio.run(run())
+
+    def _query(self, sql):
+        conn = sqlite3.connect(self.db.db_path)
+        try:
+            return conn.execute(sql).fetchall()
+        finally:
+            conn.close()
+
+    def test_ndjson_and_csv_rows_are_classified_geocoded_and_rolled_up(self):
+        ndjson = self.root / "tweets.ndjson"
+        ndjson.write_text("\n".join([
+            json.dumps({"id": "t-1", "text": "Garbage bins are overflowing in Salem", "created_at": "2024-03-01T10:15:00Z", "location": "Salem"}),
+            "not json",
+            json.dumps({"id": "t-2", "text": "Loving the new park in Madurai", "created_at": "2024-03-01T10:45:00Z", "location": "Madurai"}),
+            json.dumps({"id": "t-3", "text": "", "created_at": "2024-03-01T11:00:00Z"}),
+        ]))
+        csv_path = self.root / "facebook.csv"
+        csv_path.write_text(
+            "message,created_time,place,platform\n"
+            "Power outage in Chennai again,2024-03-01T11:30:00,Chennai,Facebook\n"
+        )
+
+        stats = self._import(ndjson, csv_path)
+
+        self.assertEqual(stats, {"rows": 5, "inserted": 3, "duplicates": 0, "skipped": 2})
+        rows = self._query("SELECT id, platform, category, latitude FROM posts ORDER BY timestamp")
+        self.assertEqual([row[0] for row in rows[:2]], ["t-1", "t-2"])
+        self.assertTrue(rows[2][0].startswith("import-"))
+        self.assertEqual([row[1] for row in rows], ["Import", "Import", "Facebook"])
+        self.assertEqual(rows[0][2], "waste")
+        self.assertAlmostEqual(rows[2][3], 13.0827)
+        trends = self._query("SELECT timestamp, positive_count + neutral_count + negative_count FROM trend_data ORDER BY timestamp")
+        self.assertEqual(trends, [("2024-03-01T10:00:00", 2), ("2024-03-01T11:00:00", 1)])
+
+    def test_import_resumes_from_checkpoint(self):
+        ndjson = self.root / "posts.ndjson"
+        ndjson.write_text("\n".join(
+            json.dumps({"id": f"p-{index}", "content": f"Road repair update {index}", "timestamp": f"2024-03-02T0{index}:00:00"})
+            for index in range(6)
+        ))
+        Checkpoint(ndjson).save(4)
+
+        stats = self._import(ndjson)
+        self.assertEqual(stats["inserted"], 2)
+        self.assertEqual(self._query("SELECT id FROM posts ORDER BY id"), [("p-4",), ("p-5",)])
+        self.assertTrue(Checkpoint(ndjson).load()["completed"])
+
+        self.assertEqual(self._import(ndjson)["rows"], 0)
+        self.assertEqual(self._import(ndjson, restart=True)["duplicates"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import tempfile
+import unittest
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from ml.category_classifier import CategoryClassifier
+from ml.linear_category_model import LinearCategoryModel
+from ml.text_preprocessing import tokenize
+
+TRAINING_POSTS = [
+    ("Garbage bins overflowing near the market", "waste"),
+    ("Trash not collected for three days", "waste"),
+    ("Heavy traffic near the bus stand", "transportation"),
+    ("New metro line helps my commute", "transportation"),
+    ("No drinking water in our street taps", "water"),
+    ("Water pipeline burst and flooding the lane", "water"),
+] * 4
+
+
+class CategoryClassifierTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.model_path = Path(self.temp_dir.name) / "category_model.npz"
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def train_model(self):
+        model = LinearCategoryModel(n_features=2 ** 12).fit(
+            [tokenize(text) for text, _ in TRAINING_POSTS],
+            [label for _, label in TRAINING_POSTS],
+        )
+        model.save(self.model_path)
+        return model
+
+    def test_falls_back_to_keyword_rules_without_model_file(self):
+        classifier = CategoryClassifier(model_path=str(self.model_path))
+
+        self.assertIsNone(classifier.model)
+        self.assertEqual(classifier.classify("Garbage dumping near the lake shore road"), "waste")
+
+    def test_keyword_rules_match_possessives(self):
+        classifier = CategoryClassifier(model_path=str(self.model_path))
+
+        self.assertEqual(classifier.classify("the hospital's staff never came"), "healthcare")
+        self.assertEqual(classifier.classify("School’s roof leaking"), "education")
+        self.assertEqual(classifier.classify("auto's are late"), "transportation")
+        self.assertEqual(classifier.classify("the kids' public space's benches"), "parks")
+
+    def test_saved_model_round_trips_and_classifies_batches(self):
+        trained = self.train_model()
+        classifier = CategoryClassifier(model_path=str(self.model_path))
+        texts = ["Overflowing garbage bins", "Metro commute is faster", "Taps have no water"]
+
+        self.assertIsNotNone(classifier.model)
+        self.assertEqual(classifier.classify_batch(texts), ["waste", "transportation", "water"])
+        self.assertEqual(classifier.classify_batch(texts), trained.predict(texts))
+        self.assertEqual(classifier.classify(texts[0]), "waste")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import asyncio
+import tempfile
+import unittest
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from cluster.bus import BusBroker, BusClient
+from cluster.leader import FileLock, LeaderElection
+
+
+async def wait_for(condition, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("condition not met in time")
+        await asyncio.sleep(0.01)
+
+
+class LeaderElectionTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.lock_path = str(Path(self.temp_dir.name) / "leader.lock")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_only_one_lock_holder_until_it_releases(self):
+        first, second = FileLock(self.lock_path), FileLock(self.lock_path)
+        self.assertTrue(first.try_acquire())
+        self.assertFalse(second.try_acquire())
+        first.release()
+        self.assertTrue(second.try_acquire())
+        second.release()
+
+    def test_follower_takes_over_when_the_leader_goes_away(self):
+        async def run():
+            elected = []
+
+            async def on_elected(name):
+                elected.append(name)
+
+            leader = LeaderElection(self.lock_path, lambda: on_elected("a"), retry_seconds=0.01)
+            follower = LeaderElection(self.lock_path, lambda: on_elected("b"), retry_seconds=0.01)
+            await leader.run()
+            task = asyncio.create_task(follower.run())
+            await asyncio.sleep(0.05)
+            self.assertEqual(elected, ["a"])
+            self.assertFalse(follower.is_leader)
+
+            leader.lock.release()
+            await asyncio.wait_for(task, 1)
+            self.assertEqual(elected, ["a", "b"])
+            self.assertTrue(follower.is_leader)
+            follower.lock.release()
+
+        asyncio.run(run())
+
+
+class BusTests(unittest.TestCase):
+    def test_messages_reach_every_worker_once(self):
+        async def run():
+            with tempfile.TemporaryDirectory() as temp_dir:
+                path = str(Path(temp_dir) / "bus.sock")
+                broker = BusBroker(path)
+                await broker.start()
+                workers = [BusClient(path, reconnect_seconds=0.01) for _ in range(3)]
+                received = [[] for _ in workers]
+                for worker, inbox in zip(workers, received):
+                    worker.subscribe("posts", inbox.append)
+                    await worker.start()
+                await wait_for(lambda: all(worker.connected for worker in workers))
+                await wait_for(lambda: broker.stats()["workers"] == 3)
+
+                workers[0].publish("posts", [{"id": "p1"}])
+                workers[2].publish("posts", [{"id": "p2"}])
+                await wait_for(lambda: all(len(inbox) == 2 for inbox in received))
+                await asyncio.sleep(0.05)
+
+                for worker in workers:
+                    await worker.stop()
+                await broker.stop()
+                return received
+
+        received = asyncio.run(run())
+        for inbox in received:
+            self.assertEqual(sorted(batch[0]["id"] for batch in inbox), ["p1", "p2"])
+
+    def test_publish_stays_local_while_the_broker_is_down(self):
+        async def run():
+            with tempfile.TemporaryDirectory() as temp_dir:
+                path = str(Path(temp_dir) / "bus.sock")
+                worker = BusClient(path, reconnect_seconds=0.01)
+                inbox = []
+                worker.subscribe("aggregates", inbox.append)
+                await worker.start()
+                worker.publish("aggregates", [{"id": "p1"}])
+
+                broker = BusBroker(path)
+                await broker.start()
+                await wait_for(lambda: worker.connected)
+                stats = worker.stats()
+                await worker.stop()
+                await broker.stop()
+                return inbox, stats
+
+        inbox, stats = asyncio.run(run())
+        self.assertEqual(inbox, [[{"id": "p1"}]])
+        self.assertEqual(stats["unsent"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,183 @@
+import asyncio
+import json
+import os
+import threading
+import time
+import unittest
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from analytics.time_range import stored_timestamp
+from ingestion.scheduler import AdaptivePollScheduler
+from social_media.facebook_client import FacebookClient
+
+LOCAL_0800_UTC = stored_timestamp(datetime(2026, 10, 19, 8, tzinfo=timezone.utc))
+
+
+class StubGraphHandler(BaseHTTPRequestHandler):
+    """
+    Answers Graph API batch calls; page "broken" returns an error entry, a
+    batch with the server's `failing_page` fails as a whole, one with its
+    `slow_page` answers late, and page0 has two pages of new posts after
+    the first poll
+    """
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        length = int(self.headers["Content-Length"])
+        form = {key: values[0] for key, values in parse_qs(self.rfile.read(length).decode()).items()}
+        batch = json.loads(form["batch"])
+        self.server.batches.append(batch)
+        pages = {urlparse(request["relative_url"]).path.split("/")[0] for request in batch}
+        if self.server.failing_page in pages:
+            self.send_response(500)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.server.slow_page in pages:
+            time.sleep(0.5)
+
+        results = []
+        for request in batch:
+            url = urlparse(request["relative_url"])
+            page_id = url.path.split("/")[0]
+            query = parse_qs(url.query)
+            since = query.get("since", ["0"])[0]
+            if page_id == "broken":
+                results.append({"code": 400, "body": json.dumps({"error": {"message": "bad page"}})})
+                continue
+            if page_id == "page0" and since != "0":
+                if "after" in query:
+                    posts = [{"id": "page0_older", "message": "Older update", "created_time": "2026-10-19T09:30:00+0000"}]
+                    results.append({"code": 200, "body": json.dumps({"data": posts})})
+                else:
+                    posts = [{"id": "page0_newer", "message": "Newer update", "created_time": "2026-10-19T10:00:00+0000"}]
+                    port = self.server.server_address[1]
+                    next_url = f"http://127.0.0.1:{port}/v16.0/page0/posts?{url.query}&after=cursor1"
+                    results.append({"code": 200, "body": json.dumps({"data": posts, "paging": {"next": next_url}})})
+                continue
+            created = "2026-10-19T08:00:00+0000" if since == "0" else "2026-10-19T09:00:00+0000"
+            posts = [{"id": f"{page_id}_{since}", "message": f"Update from {page_id}", "created_time": created}]
+            results.append({"code": 200, "body": json.dumps({"data": posts})})
+
+        payload = json.dumps(results).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("x-app-usage", json.dumps(self.server.app_usage))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class FacebookClientTests(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubGraphHandler)
+        self.server.batches = []
+        self.server.failing_page = None
+        self.server.slow_page = None
+        self.server.app_usage = {"call_count": 3, "total_time": 1, "total_cputime": 1}
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+        page_ids = ",".join([f"page{index}" for index in range(119)] + ["broken"])
+        env = {
+            "FACEBOOK_APP_ID": "app",
+            "FACEBOOK_APP_SECRET": "secret",
+            "FACEBOOK_ACCESS_TOKEN": "token",
+            "FACEBOOK_PAGE_IDS": page_ids,
+        }
+        with mock.patch.dict(os.environ, env):
+            self.client = FacebookClient(base_url=f"http://127.0.0.1:{self.server.server_address[1]}/v16.0")
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def poll(self, times=1):
+        async def run():
+            results = [await self.client.fetch_recent_posts() for _ in range(times)]
+            await self.client.aclose()
+            return results
+        return asyncio.run(run())
+
+    def test_pages_are_fetched_in_batches_of_fifty(self):
+        posts, = self.poll()
+
+        self.assertEqual(sorted(len(batch) for batch in self.server.batches), [20, 50, 50])
+        self.assertEqual(len(posts), 119)
+        self.assertEqual(len({post["id"] for post in posts}), 119)
+        self.assertEqual({post["content"] for post in posts}, {f"Update from page{index}" for index in range(119)})
+        self.assertEqual(posts[0]["timestamp"], LOCAL_0800_UTC)
+        self.assertEqual(self.client.app_usage["call_count"], 3)
+
+    def test_each_page_keeps_its_own_since_cursor(self):
+        first, second = self.poll(times=2)
+        second_urls = [request["relative_url"] for batch in self.server.batches[3:] for request in batch]
+
+        self.assertTrue(all("since=" in url for url in second_urls if not url.startswith("broken")))
+        self.assertIn("page7/posts?fields=message,created_time,place&limit=25&since=1792396800", second_urls)
+        self.assertEqual(self.client.since_by_page["page7"], 1792400400)
+        self.assertNotIn("broken", self.client.since_by_page)
+
+    def test_busy_page_is_followed_back_to_its_cursor(self):
+        first, second = self.poll(times=2)
+
+        page0 = [post["id"] for post in second if post["id"].startswith("page0")]
+        self.assertEqual(page0, ["page0_newer", "page0_older"])
+        follow_ups = [batch for batch in self.server.batches if "after=" in json.dumps(batch)]
+        self.assertEqual(len(self.server.batches), 7)
+        self.assertEqual(follow_ups, [[{
+            "method": "GET",
+            "relative_url": "page0/posts?fields=message,created_time,place&limit=25&since=1792396800&after=cursor1",
+        }]])
+        self.assertEqual(self.client.since_by_page["page0"], 1792404000)
+
+    def test_poll_that_follows_paging_is_saturated(self):
+        self.poll()
+        self.assertFalse(self.client.last_fetch_saturated)
+
+        self.poll()
+        self.assertTrue(self.client.last_fetch_saturated)
+
+    def test_app_usage_is_reported_as_a_rate_limit(self):
+        self.poll()
+        self.assertEqual(self.client.rate_limit_status(), {"limit": 100.0, "remaining": 97.0, "reset_in_seconds": None})
+
+        self.server.app_usage = {"call_count": 40, "total_time": 90, "total_cputime": 20}
+        self.poll()
+        status = self.client.rate_limit_status()
+        self.assertEqual(status, {"limit": 100.0, "remaining": 10.0, "reset_in_seconds": 3600.0})
+        # Three batch calls per poll out of the 10% left for the hour
+        self.assertEqual(AdaptivePollScheduler._budget_delay(status, self.client.last_request_count), 1080.0)
+
+    def test_failed_batch_keeps_its_cursors_and_the_rest_is_returned(self):
+        self.server.failing_page = "page60"
+        posts, = self.poll()
+
+        self.assertEqual(len(posts), 69)
+        self.assertEqual({post["id"].split("_")[0] for post in posts} & {f"page{index}" for index in range(50, 100)}, set())
+        self.assertEqual(set(self.client.since_by_page), {post["id"].split("_")[0] for post in posts})
+
+    def test_timed_out_poll_moves_no_cursor(self):
+        self.server.slow_page = "page110"
+
+        async def run():
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(self.client.fetch_recent_posts(), 0.2)
+            await self.client.aclose()
+
+        asyncio.run(run())
+        self.assertEqual(self.client.since_by_page, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,162 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import httpx
+from fastapi import HTTPException
+
+import main
+from db.database import DatabaseManager
+from db.group_commit import GroupCommitWriter
+from ingestion.ids import new_ulid, ulid_timestamp_ms
+
+
+class UlidTests(unittest.TestCase):
+    def test_ids_are_unique_and_sorted_within_a_millisecond(self):
+        ids = [new_ulid() for _ in range(5000)]
+
+        self.assertEqual(len(set(ids)), len(ids))
+        self.assertEqual(ids, sorted(ids))
+        self.assertTrue(all(len(ulid) == 26 for ulid in ids))
+        self.assertLess(abs(ulid_timestamp_ms(ids[-1]) - time.time() * 1000), 5000)
+
+
+class GroupCommitWriterTests(unittest.TestCase):
+    def test_concurrent_writes_share_commits(self):
+        async def run():
+            calls = []
+
+            async def store(records):
+                calls.append(len(records))
+                await asyncio.sleep(0.01)
+                return [record["id"] for record in records if record["id"] != "dup"]
+
+            writer = GroupCommitWriter(store, max_batch=40, max_delay=0.005)
+            results = await asyncio.gather(*(writer.write({"id": str(index)}) for index in range(100)), writer.write({"id": "dup"}))
+            stats = writer.stats()
+            await writer.close()
+            return calls, results, stats
+
+        calls, results, stats = asyncio.run(run())
+        self.assertEqual(sum(calls), 101)
+        self.assertLessEqual(max(calls), 40)
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(results, [True] * 100 + [False])
+        self.assertEqual(stats["inserted"], 100)
+
+    def test_failed_commit_resolves_every_waiter(self):
+        async def run():
+            async def store(records):
+                raise RuntimeError("disk full")
+
+            writer = GroupCommitWriter(store, max_delay=0.001)
+            results = await asyncio.gather(*(writer.write({"id": str(index)}) for index in range(5)))
+            stats = writer.stats()
+            await writer.close()
+            return results, stats
+
+        results, stats = asyncio.run(run())
+        self.assertEqual(results, [False] * 5)
+        self.assertEqual(stats["failed"], 5)
+
+
+class GrievanceIntakeTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.original_db_manager = main.db_manager
+        main.db_manager = DatabaseManager(str(Path(self.temp_dir.name) / "citypulse-test.db"))
+
+    def tearDown(self):
+        main.db_manager = self.original_db_manager
+        self.temp_dir.cleanup()
+
+    def test_simultaneous_submissions_are_all_stored(self):
+        async def run():
+            submissions = [
+                main.GrievanceSubmission(content=f"Burst report {index}", category="water", area="Adyar", district="chennai")
+                for index in range(200)
+            ]
+            commits_before = main.grievance_writer.stats()["commits"]
+            submitted = await asyncio.gather(*(main.submit_grievance(submission) for submission in submissions))
+            commits = main.grievance_writer.stats()["commits"] - commits_before
+            stored = await main.db_manager.get_posts(limit=None, filters={"platform": "Citizen Portal"})
+            trends = await main.get_category_data()
+            return submitted, commits, stored, trends
+
+        submitted, commits, stored, trends = asyncio.run(run())
+        self.assertEqual(len({post.id for post in submitted}), 200)
+        self.assertEqual({post.id for post in submitted}, {post["id"] for post in stored})
+        self.assertLess(commits, 200)
+        self.assertEqual({item["name"]: item["value"] for item in trends}.get("water"), 200)
+
+    def test_single_and_batch_intake_label_blank_categories_alike(self):
+        async def run():
+            fields = {"content": "No water supply since morning", "category": " ", "area": "Velachery", "district": "chennai"}
+            single = await main.submit_grievance(main.GrievanceSubmission(**fields))
+            await main.submit_grievance_batch(main.GrievanceBatch(grievances=[fields]))
+            return single, await main.db_manager.get_posts(limit=None, filters={"platform": "Citizen Portal"})
+
+        single, stored = asyncio.run(run())
+        self.assertTrue(single.category.strip())
+        self.assertEqual({post["category"] for post in stored}, {single.category})
+
+    def test_failed_commit_is_a_server_error(self):
+        async def run():
+            async def store_posts(records):
+                raise RuntimeError("disk full")
+
+            main.db_manager.store_posts = store_posts
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await client.post("/grievances", json={
+                    "content": "Streetlight out", "category": "power", "area": "Adyar", "district": "chennai",
+                })
+
+        response = asyncio.run(run())
+        self.assertEqual(response.status_code, 503)
+
+    def test_batch_reports_each_item_and_commits_once(self):
+        async def run():
+            commits = []
+            original_store_posts = main.db_manager.store_posts
+
+            async def store_posts(records):
+                commits.append(len(records))
+                return await original_store_posts(records)
+
+            main.db_manager.store_posts = store_posts
+            result = await main.submit_grievance_batch(main.GrievanceBatch(grievances=[
+                {"content": "Sewage overflow near the market", "category": "waste", "area": "Anna Nagar", "district": "madurai"},
+                {"category": "water", "area": "Adyar", "district": "chennai"},
+                {"content": "No water supply since morning", "category": "", "area": "Velachery", "district": "chennai"},
+            ]))
+            stored = await main.db_manager.get_posts(limit=None, filters={"platform": "Citizen Portal"})
+            return commits, result, stored
+
+        commits, result, stored = asyncio.run(run())
+        self.assertEqual(commits, [2])
+        self.assertEqual((result.stored, result.invalid, result.failed), (2, 1, 0))
+        self.assertEqual([item.status for item in result.results], ["stored", "invalid", "stored"])
+        self.assertEqual({item.id for item in result.results if item.id}, {post["id"] for post in stored})
+        categories = {post["content"]: post["category"] for post in stored}
+        self.assertEqual(categories["Sewage overflow near the market"], "waste")
+        self.assertTrue(categories["No water supply since morning"])
+
+    def test_batch_over_the_limit_is_rejected(self):
+        os.environ["GRIEVANCE_BATCH_MAX_ITEMS"] = "2"
+        try:
+            with self.assertRaises(HTTPException) as raised:
+                asyncio.run(main.submit_grievance_batch(main.GrievanceBatch(grievances=[{}] * 3)))
+        finally:
+            del os.environ["GRIEVANCE_BATCH_MAX_ITEMS"]
+        self.assertEqual(raised.exception.status_code, 413)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,147 @@
+import asyncio
+import tempfile
+import unittest
+from datetime import datetime
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import main
+from db.database import DatabaseManager
+from ingestion.dedup import SeenIdFilter
+from ingestion.pipeline import IngestionPipeline, Stage
+
+
+class StagedPipelineTests(unittest.TestCase):
+    def test_batches_flow_through_every_stage(self):
+        seen = []
+
+        async def double(batch):
+            return [item * 2 for item in batch]
+
+        async def collect(batch):
+            seen.extend(batch)
+
+        async def run():
+            pipeline = IngestionPipeline([Stage("double", double), Stage("collect", collect)])
+            pipeline.start()
+            await pipeline.submit([1, 2])
+            await pipeline.submit([3])
+            await pipeline.drain()
+            stats = pipeline.stats()
+            await pipeline.stop()
+            return stats
+
+        stats = asyncio.run(run())
+
+        self.assertEqual(sorted(seen), [2, 4, 6])
+        self.assertEqual(stats["double"]["items"], 3)
+        self.assertEqual(stats["collect"]["queue_depth"], 0)
+
+    def test_slow_coalescing_stage_merges_and_drops_oldest(self):
+        calls = []
+
+        async def run():
+            gate = asyncio.Event()
+
+            async def slow(batch):
+                calls.append(list(batch))
+                await gate.wait()
+
+            stage = Stage("slow", slow, queue_size=2, overflow="drop_oldest", coalesce=True)
+            pipeline = IngestionPipeline([stage])
+            pipeline.start()
+            await pipeline.submit([1])
+            await asyncio.sleep(0)  # worker takes [1] and blocks
+            for item in (2, 3, 4):
+                await pipeline.submit([item])
+            gate.set()
+            await pipeline.drain()
+            stats = pipeline.stats()
+            await pipeline.stop()
+            return stats
+
+        stats = asyncio.run(run())
+
+        self.assertEqual(calls, [[1], [3, 4]])
+        self.assertEqual(stats["slow"]["dropped_items"], 1)
+
+    def test_blocking_stage_applies_backpressure(self):
+        async def run():
+            gate = asyncio.Event()
+
+            async def slow(batch):
+                await gate.wait()
+
+            pipeline = IngestionPipeline([Stage("slow", slow, queue_size=1)])
+            pipeline.start()
+            await pipeline.submit([1])
+            await asyncio.sleep(0)
+            await pipeline.submit([2])
+            producer = asyncio.create_task(pipeline.submit([3]))
+            await asyncio.sleep(0.01)
+            blocked = not producer.done()
+            gate.set()
+            await producer
+            await pipeline.drain()
+            stats = pipeline.stats()
+            await pipeline.stop()
+            return blocked, stats
+
+        blocked, stats = asyncio.run(run())
+
+        self.assertTrue(blocked)
+        self.assertEqual(stats["slow"]["blocked_puts"], 1)
+        self.assertEqual(stats["slow"]["items"], 3)
+
+
+class IngestionPipelineIntegrationTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.original_db_manager = main.db_manager
+
+        test_db = DatabaseManager()
+        test_db.db_path = Path(self.temp_dir.name) / "citypulse-test.db"
+        test_db._initialize_db()
+        main.db_manager = test_db
+        self.original_seen_ids = main.seen_ids
+        main.seen_ids = SeenIdFilter(capacity=1000, recent_size=100)
+
+    def tearDown(self):
+        main.db_manager = self.original_db_manager
+        main.seen_ids = self.original_seen_ids
+        self.temp_dir.cleanup()
+
+    def test_fetched_posts_are_analysed_stored_and_deduplicated(self):
+        source = main.source_registry.get("twitter")
+        now = datetime.now().isoformat()
+        posts = [
+            {"id": "pipe-1", "content": "Garbage bins are overflowing in Salem", "timestamp": now, "location": "Salem"},
+            {"id": "pipe-2", "content": "Loving the new park in Madurai", "timestamp": now, "location": "Madurai"},
+        ]
+
+        async def run():
+            main.ingestion_pipeline.start()
+            await main.handle_source_posts(source, [dict(post) for post in posts])
+            await main.handle_source_posts(source, [dict(post) for post in posts])
+            await main.ingestion_pipeline.drain()
+            # Once stored, repeats are rejected before analysis
+            await main.handle_source_posts(source, [dict(post) for post in posts])
+            await main.ingestion_pipeline.drain()
+            stats = main.ingestion_pipeline.stats()
+            await main.ingestion_pipeline.stop()
+            return stats
+
+        stats = asyncio.run(run())
+        stored = asyncio.run(main.db_manager.get_posts(limit=None, filters={}))
+
+        self.assertEqual({post["id"] for post in stored}, {"pipe-1", "pipe-2"})
+        self.assertEqual({post["category"] for post in stored}, {"waste", "parks"})
+        self.assertEqual(stats["analyse"]["items"], 4)
+        self.assertEqual(stats["aggregate"]["items"], 2)
+        self.assertEqual(main.seen_ids.stats()["rejected"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import asyncio
+import time
+import unittest
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from ingestion.sources import SourceRegistry
+
+
+class FakeClient:
+    def __init__(self, posts, delay=0.0, error=None):
+        self.posts = posts
+        self.delay = delay
+        self.error = error
+        self.is_configured = False
+        self.calls = 0
+
+    async def fetch_recent_posts(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return list(self.posts)
+
+
+class SourceRegistryTests(unittest.TestCase):
+    def test_slow_source_times_out_without_delaying_others(self):
+        registry = SourceRegistry()
+        registry.register("fast", FakeClient([{"id": "a"}]), interval_seconds=1, timeout_seconds=1)
+        registry.register("slow", FakeClient([{"id": "b"}], delay=5), interval_seconds=1, timeout_seconds=0.05)
+        registry.register("broken", FakeClient([], error=RuntimeError("quota")), interval_seconds=1, timeout_seconds=1)
+
+        started = time.perf_counter()
+        results = asyncio.run(registry.poll_once())
+        elapsed = time.perf_counter() - started
+        stats = registry.stats()
+
+        self.assertLess(elapsed, 1)
+        self.assertEqual(results, {"fast": [{"id": "a"}], "slow": [], "broken": []})
+        self.assertEqual(stats["slow"]["timeouts"], 1)
+        self.assertEqual(stats["broken"]["errors"], 1)
+        self.assertEqual(stats["broken"]["last_error"], "quota")
+        self.assertEqual(stats["fast"]["total_fetched"], 1)
+
+    def test_sources_poll_on_independent_intervals(self):
+        registry = SourceRegistry()
+        fast = FakeClient([{"id": "a"}])
+        slow = FakeClient([{"id": "b"}])
+        registry.register("fast", fast, interval_seconds=0.01, timeout_seconds=1)
+        registry.register("slow", slow, interval_seconds=10, timeout_seconds=1)
+        handled = []
+
+        async def handle(source, posts):
+            handled.append(source.name)
+
+        async def run_briefly():
+            tasks = registry.start(handle)
+            await asyncio.sleep(0.1)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        asyncio.run(run_briefly())
+
+        self.assertGreater(fast.calls, 3)
+        self.assertEqual(slow.calls, 1)
+        self.assertEqual(handled.count("slow"), 1)
+        self.assertFalse(registry.stats()["fast"]["running"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import asyncio
+import tempfile
+import unittest
+from datetime import datetime
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import main
+from db.database import DatabaseManager
+from realtime.aggregates import LiveAggregates
+
+
+class LiveAggregatesTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.original_db_manager = main.db_manager
+        main.db_manager = DatabaseManager(str(Path(self.temp_dir.name) / "citypulse-test.db"))
+        asyncio.run(main.seed_demo_data())
+
+    def tearDown(self):
+        main.db_manager = self.original_db_manager
+        self.temp_dir.cleanup()
+
+    def assert_matches_endpoints(self, snapshot):
+        summary = asyncio.run(main.get_dashboard_summary())
+        sentiment = asyncio.run(main.get_sentiment_data())
+        categories = asyncio.run(main.get_category_data())
+        platforms = asyncio.run(main.get_platform_data())
+
+        self.assertEqual(snapshot["totals"]["signals"], summary["total_signals"])
+        self.assertEqual(snapshot["totals"].get("citizen_reports", 0), summary["citizen_reports"])
+        self.assertEqual(snapshot["totals"]["negative_signals"], summary["negative_signals"])
+        self.assertEqual(snapshot["sentiment"], {item["name"]: item["value"] for item in sentiment})
+        self.assertEqual(snapshot["category"], {item["name"]: item["value"] for item in categories})
+        self.assertEqual(snapshot["platform"], {item["platform"]: item["count"] for item in platforms})
+
+    def test_snapshot_and_deltas_track_the_analytics_endpoints(self):
+        aggregates = LiveAggregates()
+        aggregates.load(asyncio.run(main.db_manager.get_posts(limit=None, filters={})))
+        self.assert_matches_endpoints(aggregates.snapshot())
+
+        now = datetime.now()
+        new_posts = [
+            {"id": "live-1", "platform": "Citizen Portal", "content": "Open drain near school", "timestamp": now.isoformat(),
+             "location": "Madurai", "sentiment": "negative", "category": "water"},
+            {"id": "live-2", "platform": "Twitter", "content": "Park cleanup went well", "timestamp": now.isoformat(),
+             "location": "Madurai", "sentiment": "positive", "category": "parks"},
+        ]
+        for post in new_posts:
+            asyncio.run(main.db_manager.store_post(post))
+        delta = aggregates.apply(new_posts)
+
+        self.assertEqual(delta["type"], "aggregate_delta")
+        self.assertEqual(delta["seq"], 1)
+        self.assertEqual(delta["totals"], {"signals": 2, "citizen_reports": 1, "negative_signals": 1})
+        self.assertEqual(delta["location"], {"Madurai": {"total": 2, "negative": 1, "positive": 1, "categories": {"water": 1, "parks": 1}}})
+        hour = now.strftime("%Y-%m-%dT%H:00:00")
+        self.assertEqual(delta["trend"][hour]["negative"], aggregates.snapshot()["trend"][hour]["negative"])
+        self.assert_matches_endpoints(aggregates.snapshot())
+
+    def test_grouped_counts_load_the_same_totals_as_the_posts(self):
+        from_posts = LiveAggregates()
+        from_posts.load(asyncio.run(main.db_manager.get_posts(limit=None, filters={})))
+        counts = asyncio.run(main.db_manager.get_live_aggregate_counts())
+        from_counts = LiveAggregates()
+        from_counts.load_counts(counts["groups"], counts["trend"])
+
+        self.assertTrue(from_counts.loaded)
+        self.assertEqual(from_counts.snapshot(), from_posts.snapshot())
+
+    def test_concurrent_loads_share_one_query(self):
+        async def run():
+            calls = []
+            original = main.db_manager.get_live_aggregate_counts
+
+            async def get_live_aggregate_counts():
+                calls.append(1)
+                return await original()
+
+            main.db_manager.get_live_aggregate_counts = get_live_aggregate_counts
+            await asyncio.gather(*(main.load_live_aggregates() for _ in range(5)))
+            return calls
+
+        self.assertEqual(len(asyncio.run(run())), 1)
+        self.assertTrue(main.live_aggregates.loaded)
+
+    def test_trend_buckets_are_bounded(self):
+        aggregates = LiveAggregates()
+        aggregates.load([
+            {"timestamp": f"2024-01-{day:02d}T{hour:02d}:10:00", "sentiment": "neutral"}
+            for day in range(1, 11) for hour in range(24)
+        ])
+
+        trend = aggregates.snapshot()["trend"]
+        self.assertEqual(len(trend), 192)
+        self.assertEqual(min(trend), "2024-01-03T00:00:00")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import asyncio
+import tempfile
+import unittest
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import httpx
+
+import main
+from db.database import DatabaseManager
+from observability.metrics import Registry, timed
+
+
+class HistogramTests(unittest.TestCase):
+    def test_renders_cumulative_buckets_in_prometheus_format(self):
+        registry = Registry()
+        histogram = registry.histogram("demo_seconds", "Demo", ("route",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 3.0):
+            histogram.observe(value, "/a")
+
+        lines = registry.render().splitlines()
+
+        self.assertEqual(lines[:2], ["# HELP demo_seconds Demo", "# TYPE demo_seconds histogram"])
+        self.assertIn('demo_seconds_bucket{route="/a",le="0.1"} 1', lines)
+        self.assertIn('demo_seconds_bucket{route="/a",le="1"} 3', lines)
+        self.assertIn('demo_seconds_bucket{route="/a",le="+Inf"} 4', lines)
+        self.assertIn('demo_seconds_sum{route="/a"} 4.05', lines)
+        self.assertIn('demo_seconds_count{route="/a"} 4', lines)
+
+    def test_timed_labels_sync_and_async_functions(self):
+        registry = Registry()
+        histogram = registry.histogram("calls_seconds", "Calls", ("method",))
+
+        @timed(histogram)
+        def lookup():
+            return 1
+
+        @timed(histogram, "custom")
+        async def fetch():
+            return 2
+
+        self.assertEqual(lookup(), 1)
+        self.assertEqual(asyncio.run(fetch()), 2)
+        self.assertEqual(histogram.count("lookup"), 1)
+        self.assertEqual(histogram.count("custom"), 1)
+
+    def test_callback_metrics_are_read_at_scrape_time(self):
+        registry = Registry()
+        depth = {"value": 1}
+        registry.gauge("queue_depth", "Depth", lambda: {("analyse",): depth["value"]}, ("stage",))
+        depth["value"] = 7
+
+        self.assertIn('queue_depth{stage="analyse"} 7', registry.render().splitlines())
+
+
+class MetricsEndpointTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.original_db_manager = main.db_manager
+        main.db_manager = DatabaseManager(str(Path(self.temp_dir.name) / "citypulse-test.db"))
+
+    def tearDown(self):
+        main.db_manager = self.original_db_manager
+        self.temp_dir.cleanup()
+
+    def test_metrics_cover_routes_and_database_calls(self):
+        async def run():
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                await client.get("/posts", params={"limit": 3})
+                await client.get("/no-such-route")
+                return await client.get("/metrics")
+
+        response = asyncio.run(run())
+        body = response.text
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("text/plain; version=0.0.4"))
+        self.assertIn('citypulse_http_request_duration_seconds_count{method="GET",route="/posts",status="200"}', body)
+        self.assertIn('route="unmatched",status="404"', body)
+        self.assertIn('citypulse_db_query_duration_seconds_count{method="get_posts"}', body)
+        self.assertIn('citypulse_ws_clients{stream="posts"} 0', body)
+        self.assertIn('citypulse_pipeline_queue_depth{pipeline="ingestion",stage="analyse"} 0', body)
+
+
+if __name__ == "__main__":
+    unittest.main()
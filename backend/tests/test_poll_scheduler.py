@@ -0,0 +1,47 @@
+import unittest
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from ingestion.scheduler import AdaptivePollScheduler
+
+
+class AdaptivePollSchedulerTests(unittest.TestCase):
+    def test_full_polls_shorten_interval_down_to_minimum(self):
+        scheduler = AdaptivePollScheduler(8, min_interval=2, max_interval=120)
+
+        delays = [scheduler.next_delay(100, saturated=True) for _ in range(4)]
+
+        self.assertEqual(delays, [4, 2, 2, 2])
+        self.assertEqual(scheduler.last_reason, "saturated")
+
+    def test_empty_and_failed_polls_back_off_exponentially(self):
+        scheduler = AdaptivePollScheduler(8, min_interval=2, max_interval=60)
+
+        delays = [scheduler.next_delay(0), scheduler.next_delay(0, failed=True), scheduler.next_delay(0), scheduler.next_delay(0)]
+
+        self.assertEqual(delays, [16, 32, 60, 60])
+
+    def test_normal_poll_returns_towards_base_interval(self):
+        scheduler = AdaptivePollScheduler(8, min_interval=2, max_interval=60)
+        scheduler.next_delay(0)
+        scheduler.next_delay(0)
+
+        self.assertEqual(scheduler.next_delay(5), 16)
+        self.assertEqual(scheduler.next_delay(5), 8)
+        self.assertEqual(scheduler.next_delay(5), 8)
+
+    def test_delay_paces_to_remaining_rate_limit_budget(self):
+        scheduler = AdaptivePollScheduler(8, min_interval=2, max_interval=60)
+
+        paced = scheduler.next_delay(100, saturated=True, rate_limit={"remaining": 10, "reset_in_seconds": 300}, requests_per_poll=2)
+        exhausted = scheduler.next_delay(100, saturated=True, rate_limit={"remaining": 0, "reset_in_seconds": 400})
+
+        self.assertEqual(paced, 60)
+        self.assertEqual(exhausted, 400)
+        self.assertEqual(scheduler.last_reason, "rate_limit")
+
+
+if __name__ == "__main__":
+    unittest.main()
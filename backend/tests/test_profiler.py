@@ -0,0 +1,153 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import httpx
+
+import main
+from db.database import DatabaseManager
+from observability.profiler import ProfileSession, SamplingProfiler
+
+
+def busy_handler(seconds):
+    deadline = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < deadline:
+        total += 1
+    return total
+
+
+class SamplingProfilerTests(unittest.TestCase):
+    def test_request_profile_captures_the_request_task_stack(self):
+        async def run(output_dir):
+            profiler = SamplingProfiler(output_dir=output_dir)
+            profiler.configure(True, sample_rate=1.0, interval_ms=1)
+
+            async def other_request():
+                await asyncio.sleep(0)
+                busy_handler(0.05)
+
+            other = asyncio.create_task(other_request())
+            session = profiler.start_request("GET", "/geo-analytics")
+            await asyncio.sleep(0.01)
+            busy_handler(0.1)
+            profiler.finish_request(session)
+            await other
+            profiler.configure(False)
+            return profiler
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            profiler = asyncio.run(run(output_dir))
+            [profile] = list(profiler.recent)
+            folded = profiler.read(profile["name"])
+
+        self.assertEqual(profile["label"], "GET /geo-analytics")
+        self.assertGreater(profile["samples"], 0)
+        lines = folded.splitlines()
+        self.assertTrue(all(line.rsplit(" ", 1)[1].isdigit() for line in lines))
+        self.assertTrue(any("busy_handler" in line and "run (test_profiler.py" in line for line in lines))
+        # Samples taken while the unprofiled task ran are left out
+        self.assertFalse(any("other_request" in line for line in lines))
+
+    def test_ingestion_profile_keeps_only_ingestion_task_samples(self):
+        async def run(output_dir):
+            profiler = SamplingProfiler(output_dir=output_dir)
+            profiler.interval = 0.001
+
+            async def ingest_work():
+                await asyncio.sleep(0.01)
+                busy_handler(0.1)
+
+            async def request_work():
+                await asyncio.sleep(0.01)
+                busy_handler(0.1)
+
+            ingest = asyncio.create_task(ingest_work(), name="ingest-twitter")
+            other = asyncio.create_task(request_work(), name="request")
+            profiler.start_ingestion(0.3)
+            await asyncio.gather(ingest, other)
+            while profiler.stats()["active_sessions"]:
+                await asyncio.sleep(0.01)
+            return profiler
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            profiler = asyncio.run(run(output_dir))
+            [profile] = list(profiler.recent)
+            folded = profiler.read(profile["name"])
+
+        self.assertIn("ingest_work", folded)
+        self.assertNotIn("request_work", folded)
+
+    def test_session_without_a_task_warns_and_keeps_every_loop_sample(self):
+        with self.assertLogs("observability.profiler", level="WARNING"):
+            session = ProfileSession("request", "GET /posts", [])
+
+        self.assertTrue(session.matches(set()))
+
+    def test_unknown_profile_names_are_not_read(self):
+        profiler = SamplingProfiler(output_dir=tempfile.gettempdir())
+        self.assertIsNone(profiler.read("../main.py"))
+
+
+class ProfilerEndpointTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.original_db_manager = main.db_manager
+        self.original_output_dir = main.profiler.output_dir
+        main.db_manager = DatabaseManager(str(Path(self.temp_dir.name) / "citypulse-test.db"))
+        main.profiler.output_dir = Path(self.temp_dir.name) / "profiles"
+        os.environ["ADMIN_TOKEN"] = "secret"
+
+    def tearDown(self):
+        del os.environ["ADMIN_TOKEN"]
+        main.profiler.configure(False)
+        main.profiler.recent.clear()
+        main.profiler.output_dir = self.original_output_dir
+        main.db_manager = self.original_db_manager
+        self.temp_dir.cleanup()
+
+    def test_admin_token_guards_profiles_of_the_chosen_route(self):
+        async def run():
+            transport = httpx.ASGITransport(app=main.app)
+            admin = {"X-Admin-Token": "secret"}
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                denied = await client.get("/admin/profiles", headers={"X-Admin-Token": "wrong"})
+                enabled = await client.post(
+                    "/admin/profiler", headers=admin,
+                    json={"enabled": True, "sample_rate": 1.0, "route": "/geo-analytics", "interval_ms": 1},
+                )
+                await client.get("/geo-analytics")
+                await client.get("/posts")
+                await client.post("/admin/profiler", headers=admin, json={"enabled": False})
+                profiles = (await client.get("/admin/profiles", headers=admin)).json()
+                folded = await client.get(f"/admin/profiles/{profiles[0]['name']}", headers=admin)
+            return denied, enabled, profiles, folded
+
+        denied, enabled, profiles, folded = asyncio.run(run())
+
+        self.assertEqual(denied.status_code, 403)
+        self.assertTrue(enabled.json()["enabled"])
+        self.assertEqual([profile["label"] for profile in profiles], ["GET /geo-analytics"])
+        self.assertEqual(folded.status_code, 200)
+
+    def test_admin_endpoints_are_hidden_without_a_token(self):
+        del os.environ["ADMIN_TOKEN"]
+        try:
+            async def run():
+                transport = httpx.ASGITransport(app=main.app)
+                async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                    return await client.get("/admin/profiler", headers={"X-Admin-Token": ""})
+
+            self.assertEqual(asyncio.run(run()).status_code, 404)
+        finally:
+            os.environ["ADMIN_TOKEN"] = "secret"
+
+
+if __name__ == "__main__":
+    unittest.main()
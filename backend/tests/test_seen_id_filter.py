@@ -0,0 +1,94 @@
+import asyncio
+import tempfile
+import unittest
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import main
+from db.database import DatabaseManager
+from ingestion.dedup import BloomFilter, SeenIdFilter
+
+
+class SeenIdFilterTests(unittest.TestCase):
+    def test_bloom_filter_has_no_false_negatives(self):
+        bloom = BloomFilter(1000, error_rate=0.01)
+        ids = [f"tweet-{index}" for index in range(1000)]
+        for post_id in ids:
+            bloom.add(post_id)
+
+        self.assertTrue(all(post_id in bloom for post_id in ids))
+        false_positives = sum(f"other-{index}" in bloom for index in range(1000))
+        self.assertLess(false_positives, 50)
+
+    def test_recent_ids_are_rejected_and_batch_repeats_collapsed(self):
+        seen = SeenIdFilter(capacity=100, recent_size=10)
+        seen.add_many(["1", "2"])
+
+        fresh, maybe = seen.screen([{"id": "1"}, {"id": "3"}, {"id": "3"}, {"id": "4"}])
+
+        self.assertEqual([post["id"] for post in fresh], ["3", "4"])
+        self.assertEqual(maybe, set())
+        self.assertEqual(seen.stats()["rejected"], 1)
+
+    def test_evicted_ids_fall_through_to_the_database(self):
+        seen = SeenIdFilter(capacity=100, recent_size=2)
+        seen.add_many(["1", "2", "3"])
+
+        self.assertEqual(seen.check("1"), "maybe")
+        self.assertEqual(seen.check("3"), "duplicate")
+        self.assertEqual(seen.check("9"), "new")
+
+    def test_full_bloom_filter_is_rebuilt_from_recent_ids(self):
+        seen = SeenIdFilter(capacity=5, recent_size=3)
+        seen.add_many(str(index) for index in range(6))
+
+        self.assertEqual(seen.stats()["rebuilds"], 1)
+        self.assertEqual(seen.bloom.count, 3)
+        self.assertTrue(all(post_id in seen.bloom for post_id in ["3", "4", "5"]))
+
+
+class DropStoredPostsTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.original_db_manager = main.db_manager
+        self.original_seen_ids = main.seen_ids
+        main.db_manager = DatabaseManager(str(Path(self.temp_dir.name) / "citypulse-test.db"))
+        main.seen_ids = SeenIdFilter(capacity=100, recent_size=1)
+
+    def tearDown(self):
+        main.db_manager = self.original_db_manager
+        main.seen_ids = self.original_seen_ids
+        self.temp_dir.cleanup()
+
+    def test_only_bloom_maybes_are_looked_up_and_stored_ones_dropped(self):
+        async def run():
+            await main.db_manager.store_posts([
+                {"id": post_id, "platform": "Twitter", "content": "Old post", "timestamp": "2024-03-01T10:00:00",
+                 "location": "Madurai", "latitude": None, "longitude": None, "sentiment": "neutral", "category": "water"}
+                for post_id in ("old-1", "old-2")
+            ])
+            main.seen_ids.add_many(["old-1", "old-2"])
+            lookups = []
+            original_lookup = main.db_manager.get_existing_ids
+
+            async def get_existing_ids(post_ids):
+                lookups.append(list(post_ids))
+                return await original_lookup(post_ids)
+
+            main.db_manager.get_existing_ids = get_existing_ids
+            fresh = await main.drop_stored_posts([{"id": "old-1"}, {"id": "new-1"}, {"id": "old-2"}])
+            return fresh, lookups
+
+        fresh, lookups = asyncio.run(run())
+
+        # old-2 is in the exact LRU; old-1 only in the Bloom filter; new-1 in neither
+        self.assertEqual([post["id"] for post in fresh], ["new-1"])
+        self.assertEqual(lookups, [["old-1"]])
+        self.assertEqual(main.seen_ids.stats()["maybe_stored"], 1)
+        self.assertEqual(main.seen_ids.check("old-1"), "duplicate")
+
+
+if __name__ == "__main__":
+    unittest.main()
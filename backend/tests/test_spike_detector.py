@@ -0,0 +1,137 @@
+import asyncio
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import httpx
+
+import main
+from analytics.spikes import SpikeDetector
+from db.database import DatabaseManager
+
+START = datetime(2024, 3, 1, 12).timestamp()
+
+
+def post(at, category="water", location="Madurai", sentiment="negative"):
+    return {
+        "timestamp": datetime.fromtimestamp(at).isoformat(),
+        "category": category,
+        "location": location,
+        "sentiment": sentiment,
+    }
+
+
+class SpikeDetectorTests(unittest.TestCase):
+    def setUp(self):
+        self.now = START
+        self.pushed = []
+        self.detector = SpikeDetector(
+            bucket_seconds=300, alpha=0.2, threshold=3, min_count=5,
+            on_alert=self.pushed.append, clock=lambda: self.now,
+        )
+
+    def feed_baseline(self, buckets=20, per_bucket=1):
+        """A steady trickle of complaints, one batch per bucket"""
+        for index in range(buckets):
+            self.now = START + index * 300
+            self.detector.add_posts([post(self.now + 10)] * per_bucket)
+
+    def test_burst_alerts_once_in_the_batch_that_completes_it(self):
+        self.feed_baseline()
+        self.now = START + 20 * 300
+
+        self.assertEqual(self.detector.add_posts([post(self.now + 5)] * 3), [])
+        alerts = self.detector.add_posts([post(self.now + 20)] * 6)
+
+        self.assertEqual(len(alerts), 1)
+        self.assertEqual(self.pushed, alerts)
+        alert = alerts[0]
+        self.assertEqual((alert["location"], alert["category"], alert["count"]), ("Madurai", "water", 5))
+        self.assertGreaterEqual(alert["zscore"], 3)
+        self.assertAlmostEqual(alert["expected"], 1, delta=0.1)
+        # More of the same bucket does not alert again
+        self.assertEqual(self.detector.add_posts([post(self.now + 30)] * 5), [])
+
+    def test_steady_rate_and_other_sentiments_do_not_alert(self):
+        self.feed_baseline(per_bucket=8)
+        self.now = START + 20 * 300
+        self.detector.add_posts([post(self.now, sentiment="neutral")] * 50)
+
+        # Including the first bucket, which has nothing to compare to
+        self.assertEqual(self.pushed, [])
+        self.assertEqual(self.detector.stats()["keys"], 1)
+        self.assertEqual(self.detector.stats()["negative_posts"], 160)
+
+    def test_keys_are_independent_and_bounded(self):
+        detector = SpikeDetector(max_keys=2, clock=lambda: self.now)
+        detector.add_posts([post(START, location=city) for city in ("Chennai", "Salem", "Trichy")])
+
+        self.assertEqual(set(detector.keys), {("Salem", "water"), ("Trichy", "water")})
+        self.assertEqual(detector.stats()["evicted_keys"], 1)
+
+    def test_posts_for_closed_buckets_are_skipped(self):
+        self.feed_baseline(buckets=3)
+        self.detector.add_posts([post(START)] * 10)
+
+        self.assertEqual(self.detector.stats()["late_posts"], 10)
+        self.assertEqual(self.pushed, [])
+
+    def test_load_replays_history_without_pushing(self):
+        history = [post(START + index * 300) for index in range(20)] + [post(START + 20 * 300)] * 6
+        self.now = START + 20 * 300 + 60
+
+        self.detector.load(reversed(history))
+
+        self.assertEqual(self.pushed, [])
+        self.assertEqual(len(self.detector.recent_alerts(3600)), 1)
+        self.assertEqual(self.detector.recent_alerts(0), [])
+
+
+class SpikeAlertEndpointTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.original_db_manager = main.db_manager
+        self.original_detector = main.spike_detector
+        main.db_manager = DatabaseManager(str(Path(self.temp_dir.name) / "citypulse-test.db"))
+        main.spike_detector = SpikeDetector(bucket_seconds=60, min_count=3, on_alert=main.push_spike_alert)
+
+    def tearDown(self):
+        main.db_manager = self.original_db_manager
+        main.spike_detector = self.original_detector
+        self.temp_dir.cleanup()
+
+    def test_spike_is_pushed_and_listed_in_notifications(self):
+        published = []
+        original_publish = main.broadcaster.publish
+        main.broadcaster.publish = lambda message, scope=None: published.append((message, scope))
+        now = datetime.now()
+        try:
+            main.spike_detector.add_posts([post((now - timedelta(minutes=10)).timestamp(), "power", "Salem")])
+            main.spike_detector.add_posts([post(now.timestamp(), "power", "Salem")] * 4)
+
+            async def run():
+                transport = httpx.ASGITransport(app=main.app)
+                async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                    return await client.get("/notifications")
+
+            response = asyncio.run(run())
+        finally:
+            main.broadcaster.publish = original_publish
+
+        self.assertEqual(len(published), 1)
+        message, scope = published[0]
+        self.assertEqual(message["type"], "alert")
+        self.assertEqual(message["alert"]["location"], "Salem")
+        self.assertEqual(scope, {"location": "Salem", "category": "power", "sentiment": "negative"})
+        notifications = response.json()
+        self.assertEqual(notifications[0]["title"], "Spike: power in Salem")
+        self.assertEqual(notifications[0]["level"], "warning")
+        self.assertEqual(len(notifications), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
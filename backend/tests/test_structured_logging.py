@@ -0,0 +1,78 @@
+import asyncio
+import json
+import logging
+import queue
+import time
+import unittest
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from ingestion.pipeline import IngestionPipeline, Stage
+from observability.log import JsonFormatter, RateLimitFilter, _ContextQueueHandler, correlated, correlation_ids
+
+
+def make_record(message="Error fetching posts: %s", args=("quota",), level=logging.ERROR, **extra):
+    record = logging.LogRecord("ingestion.sources", level, __file__, 1, message, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+class StructuredLoggingTests(unittest.TestCase):
+    def test_queued_records_are_formatted_as_json_with_correlation_ids(self):
+        handler = _ContextQueueHandler(queue.SimpleQueue())
+        with correlated(["twitter-01", "twitter-02"]):
+            handler.handle(make_record(source="twitter"))
+
+        entry = json.loads(JsonFormatter().format(handler.queue.get_nowait()))
+
+        self.assertEqual(entry["level"], "error")
+        self.assertEqual(entry["logger"], "ingestion.sources")
+        self.assertEqual(entry["message"], "Error fetching posts: quota")
+        self.assertEqual(entry["source"], "twitter")
+        self.assertEqual(entry["correlation_ids"], ["twitter-01", "twitter-02"])
+
+    def test_repeated_errors_are_rate_limited_and_counted(self):
+        rate_limit = RateLimitFilter(burst=2, window=0.05)
+
+        allowed = [rate_limit.filter(make_record()) for _ in range(5)]
+        self.assertEqual(allowed, [True, True, False, False, False])
+        self.assertTrue(rate_limit.filter(make_record(level=logging.INFO)))
+
+        time.sleep(0.06)
+        record = make_record()
+        self.assertTrue(rate_limit.filter(record))
+        self.assertEqual(record.suppressed, 3)
+
+    def test_pipeline_stages_run_with_the_submitted_correlation_ids(self):
+        async def run():
+            seen = {}
+
+            async def analyse(batch):
+                seen.setdefault("analyse", []).append(correlation_ids.get())
+                await asyncio.sleep(0.01)
+                return batch
+
+            async def broadcast(batch):
+                seen.setdefault("broadcast", []).append(correlation_ids.get())
+
+            pipeline = IngestionPipeline([
+                Stage("analyse", analyse),
+                Stage("broadcast", broadcast, coalesce=True),
+            ])
+            pipeline.start()
+            for batch_id in ("a", "b"):
+                with correlated([batch_id]):
+                    await pipeline.submit([{"id": batch_id}])
+            await pipeline.drain()
+            await pipeline.stop()
+            return seen
+
+        seen = asyncio.run(run())
+        self.assertEqual(seen["analyse"], [("a",), ("b",)])
+        self.assertEqual(sorted(ident for ids in seen["broadcast"] for ident in ids), ["a", "b"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import asyncio
+import sqlite3
+import tempfile
+import unittest
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.synthetic import generate_posts, write_database
+from db.database import DatabaseManager
+
+
+def label(content):
+    return "neutral", "other"
+
+
+class SyntheticDataTests(unittest.TestCase):
+    def test_same_seed_generates_same_posts(self):
+        end = datetime(2024, 3, 1, 12)
+        first = list(generate_posts(200, seed=3, end=end, label=label))
+        second = list(generate_posts(200, seed=3, end=end, label=label))
+        other = list(generate_posts(200, seed=4, end=end, label=label))
+
+        self.assertEqual(first, second)
+        self.assertNotEqual([post["content"] for post in first], [post["content"] for post in other])
+
+    def test_posts_follow_skewed_distributions_within_window(self):
+        end = datetime(2024, 3, 1, 12)
+        posts = list(generate_posts(2000, days=7, end=end, label=label))
+
+        locations = Counter(post["location"] for post in posts)
+        self.assertEqual(locations.most_common(1)[0][0], "Chennai")
+        self.assertIn(None, locations)
+        hours = Counter(datetime.fromisoformat(post["timestamp"]).hour for post in posts)
+        self.assertGreater(hours[19], hours[3] * 3)
+        self.assertTrue(all(datetime(2024, 2, 23, 12) <= datetime.fromisoformat(post["timestamp"]) < end for post in posts))
+
+    def test_database_is_filled_with_rollups(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_manager = write_database(str(Path(temp_dir) / "synthetic.db"), 500, days=3)
+            posts = asyncio.run(db_manager.get_posts(limit=None, filters={}))
+            conn = sqlite3.connect(db_manager.db_path)
+            try:
+                rolled_up = conn.execute("SELECT SUM(positive_count + neutral_count + negative_count) FROM trend_data").fetchone()[0]
+            finally:
+                conn.close()
+
+        self.assertEqual(len(posts), 500)
+        self.assertEqual(rolled_up, 500)
+        self.assertIsInstance(db_manager, DatabaseManager)
+
+
+if __name__ == "__main__":
+    unittest.main()
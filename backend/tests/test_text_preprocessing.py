@@ -0,0 +1,37 @@
+import unittest
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from ml.category_classifier import CategoryClassifier
+from ml.sentiment_analyzer import SentimentAnalyzer
+from ml.text_preprocessing import preprocess
+
+
+class TextPreprocessingTests(unittest.TestCase):
+    def test_tamil_words_are_not_split_on_vowel_signs(self):
+        processed = preprocess("மதுரையில் குடிநீர் வரவில்லை - Water supply")
+
+        self.assertEqual(processed.tokens, ("மதுரையில்", "குடிநீர்", "வரவில்லை", "water", "supply"))
+        self.assertEqual(processed.phrase_count(("water", "supply")), 1)
+
+    def test_zero_width_characters_and_curly_quotes_are_normalised(self):
+        processed = preprocess("Pump DOESN\u2019T work in Vela\u200cchery")
+
+        self.assertIn("doesn't", processed.tokens)
+        self.assertIn("velachery", processed.tokens)
+
+    def test_analysers_accept_shared_preprocessed_text(self):
+        text = "Garbage collection issues near the bus stand are not working out"
+        processed = preprocess(text)
+        sentiment_analyzer = SentimentAnalyzer()
+        category_classifier = CategoryClassifier(model_path="")
+
+        self.assertEqual(sentiment_analyzer.analyze(processed), sentiment_analyzer.analyze(text))
+        self.assertEqual(sentiment_analyzer.analyze(processed), "negative")
+        self.assertEqual(category_classifier.classify(processed), category_classifier.classify(text))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,186 @@
+import asyncio
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import httpx
+
+import main
+from analytics.time_range import parse_window, resolve_time_range, stored_timestamp
+from db.database import DatabaseManager
+
+
+class TimeRangeParsingTests(unittest.TestCase):
+    def test_window_counts_back_from_until_or_now(self):
+        now = datetime(2024, 3, 2, 12)
+
+        self.assertEqual(resolve_time_range(window="24h", now=now), (datetime(2024, 3, 1, 12), None))
+        self.assertEqual(
+            resolve_time_range(until="2024-03-01", window="2d", now=now),
+            (datetime(2024, 2, 28), datetime(2024, 3, 1)),
+        )
+        self.assertEqual(parse_window("90m"), timedelta(minutes=90))
+        self.assertEqual(resolve_time_range(), (None, None))
+
+    def test_offsets_are_converted_to_local_time(self):
+        since, _ = resolve_time_range(since="2024-03-01T06:30:00Z")
+        expected = datetime(2024, 3, 1, 6, 30, tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+
+        self.assertEqual(since, expected)
+
+    def test_rejects_malformed_and_contradictory_ranges(self):
+        for kwargs in (
+            {"window": "yesterday"},
+            {"window": "0h"},
+            {"since": "last week"},
+            {"since": "2024-03-01", "window": "24h"},
+            {"since": "2024-03-02", "until": "2024-03-01"},
+        ):
+            with self.subTest(**kwargs), self.assertRaises(ValueError):
+                resolve_time_range(**kwargs)
+
+
+class TimeRangeEndpointTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.original_db_manager = main.db_manager
+        self.db_path = Path(self.temp_dir.name) / "citypulse-test.db"
+        main.db_manager = DatabaseManager(str(self.db_path))
+        now = datetime.now()
+        posts = [
+            ("recent-1", "Twitter", now - timedelta(hours=1), "negative", "water"),
+            ("recent-2", "Citizen Portal", now - timedelta(hours=5), "positive", "roads"),
+            ("old-1", "Facebook", now - timedelta(days=3), "negative", "water"),
+            ("old-2", "Twitter", now - timedelta(days=10), "neutral", "waste"),
+        ]
+        asyncio.run(main.db_manager.store_posts([
+            {
+                "id": post_id,
+                "platform": platform,
+                "content": f"{category} report",
+                "timestamp": timestamp.isoformat(),
+                "location": "Madurai",
+                "latitude": 9.9252,
+                "longitude": 78.1198,
+                "sentiment": sentiment,
+                "category": category,
+            }
+            for post_id, platform, timestamp, sentiment, category in posts
+        ]))
+
+    def tearDown(self):
+        main.db_manager = self.original_db_manager
+        self.temp_dir.cleanup()
+
+    def get(self, path, **params):
+        async def run():
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await client.get(path, params=params)
+
+        return asyncio.run(run())
+
+    def test_every_analytics_endpoint_honours_the_window(self):
+        summary = self.get("/dashboard-summary", window="24h").json()
+        sentiment = self.get("/sentiment-data", window="24h").json()
+        categories = self.get("/category-data", window="24h").json()
+        platforms = self.get("/platform-data", window="24h").json()
+        overview = self.get("/analytics-overview", window="24h").json()
+        geo = self.get("/geo-analytics", window="24h").json()
+
+        self.assertEqual(summary["total_signals"], 2)
+        self.assertEqual(summary["citizen_reports"], 1)
+        self.assertEqual(summary["negative_signals"], 1)
+        self.assertEqual({item["name"]: item["value"] for item in sentiment}, {"positive": 1, "neutral": 0, "negative": 1})
+        self.assertEqual(sorted(item["name"] for item in categories), ["roads", "water"])
+        self.assertEqual(sorted(item["platform"] for item in platforms), ["Citizen Portal", "Twitter"])
+        self.assertEqual(overview["total_signals"], 2)
+        self.assertEqual(geo["total_signals"], 2)
+        # Without a range the whole history is still reported
+        self.assertEqual(self.get("/dashboard-summary").json()["total_signals"], 4)
+
+    def test_since_until_range_excludes_until(self):
+        since = (datetime.now() - timedelta(days=11)).isoformat()
+        until = (datetime.now() - timedelta(days=2)).isoformat()
+
+        summary = self.get("/dashboard-summary", since=since, until=until).json()
+
+        self.assertEqual(summary["total_signals"], 2)
+
+    def test_bad_range_is_a_client_error(self):
+        response = self.get("/category-data", window="soon")
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_range_queries_use_the_timestamp_index(self):
+        conn = sqlite3.connect(self.db_path)
+        plan = " ".join(
+            str(row[-1]) for row in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT category, COUNT(*) FROM posts WHERE timestamp >= ? GROUP BY category",
+                ("2024-01-01",),
+            )
+        )
+        conn.close()
+
+        self.assertIn("idx_posts_timestamp", plan)
+
+
+class MixedTimestampTests(unittest.TestCase):
+    """Sources that report UTC against a server that is not on UTC"""
+
+    def setUp(self):
+        self.original_tz = os.environ.get("TZ")
+        os.environ["TZ"] = "Asia/Kolkata"
+        time.tzset()
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = Path(self.temp_dir.name) / "citypulse-test.db"
+
+    def tearDown(self):
+        if self.original_tz is None:
+            os.environ.pop("TZ", None)
+        else:
+            os.environ["TZ"] = self.original_tz
+        time.tzset()
+        self.temp_dir.cleanup()
+
+    def test_utc_timestamps_are_stored_as_local_time(self):
+        at = datetime(2024, 3, 1, 6, 30, tzinfo=timezone.utc)
+
+        self.assertEqual(stored_timestamp(at), "2024-03-01T12:00:00")
+        self.assertEqual(stored_timestamp(datetime(2024, 3, 1, 12)), "2024-03-01T12:00:00")
+
+    def test_offset_rows_are_converted_and_windowed_with_naive_ones(self):
+        now = datetime.now().astimezone()
+        rows = [
+            ("naive-recent", (now - timedelta(minutes=30)).replace(tzinfo=None).isoformat()),
+            ("utc-recent", (now - timedelta(minutes=30)).astimezone(timezone.utc).isoformat()),
+            ("zulu-recent", (now - timedelta(minutes=45)).astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")),
+            ("utc-old", (now - timedelta(hours=3)).astimezone(timezone.utc).isoformat()),
+        ]
+        DatabaseManager(str(self.db_path))
+        conn = sqlite3.connect(self.db_path)
+        conn.executemany(
+            "INSERT INTO posts (id, platform, content, timestamp) VALUES (?, 'Twitter', 'report', ?)", rows
+        )
+        # As written before every source stored local time
+        conn.execute("PRAGMA user_version = 0")
+        conn.commit()
+        conn.close()
+
+        db_manager = DatabaseManager(str(self.db_path))
+        since, until = resolve_time_range(window="2h")
+        posts = asyncio.run(db_manager.get_posts(limit=None, since=since, until=until))
+
+        self.assertEqual(sorted(post["id"] for post in posts), ["naive-recent", "utc-recent", "zulu-recent"])
+        self.assertTrue(all("+" not in post["timestamp"] for post in posts))
+
+
+if __name__ == "__main__":
+    unittest.main()
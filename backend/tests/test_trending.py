@@ -0,0 +1,141 @@
+import asyncio
+import random
+import tempfile
+import unittest
+from collections import Counter
+from datetime import datetime, timedelta
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import httpx
+
+import main
+from analytics.trending import SpaceSaving, TrendingTracker, key_phrases
+from db.database import DatabaseManager
+
+START = datetime(2024, 3, 1, 12).timestamp()
+
+
+def post(at, category="water", location="Madurai", content="No water supply since morning"):
+    return {
+        "timestamp": datetime.fromtimestamp(at).isoformat(),
+        "category": category,
+        "location": location,
+        "content": content,
+    }
+
+
+class SpaceSavingTests(unittest.TestCase):
+    def test_heavy_hitters_survive_in_a_few_counters(self):
+        rng = random.Random(5)
+        stream = ["water"] * 400 + ["roads"] * 250 + [f"noise-{rng.randrange(5000)}" for _ in range(2000)]
+        rng.shuffle(stream)
+        summary = SpaceSaving(capacity=20)
+        for key in stream:
+            summary.add(key)
+
+        true_counts = Counter(stream)
+        self.assertEqual(len(summary.counts), 20)
+        for key in ("water", "roads"):
+            count, error = summary.counts[key], summary.errors[key]
+            self.assertGreaterEqual(count, true_counts[key])
+            self.assertLessEqual(count - error, true_counts[key])
+        self.assertEqual(summary.total, len(stream))
+
+
+class KeyPhraseTests(unittest.TestCase):
+    def test_phrases_skip_stopwords_and_numbers(self):
+        self.assertEqual(
+            key_phrases("No water supply in Velachery for 3 days, water supply please!"),
+            ["water supply", "supply velachery", "velachery days", "days water"],
+        )
+
+
+class TrendingTrackerTests(unittest.TestCase):
+    def setUp(self):
+        self.now = START
+        self.tracker = TrendingTracker({"1h": 3600}, panes=12, capacity=50, clock=lambda: self.now)
+
+    def test_counts_only_posts_inside_the_window(self):
+        self.tracker.add_posts([post(START - 600)] * 3 + [post(START - 300, "roads", "Salem", "Pothole on main road")])
+        self.tracker.add_posts([post(START - 3 * 3600)])
+
+        result = self.tracker.top("1h")
+
+        self.assertEqual(result["posts"], 4)
+        self.assertEqual(
+            [(item["category"], item["location"], item["count"]) for item in result["issues"]],
+            [("water", "Madurai", 3), ("roads", "Salem", 1)],
+        )
+        self.assertEqual(result["phrases"][0]["phrase"], "water supply")
+        self.assertEqual(result["phrases"][0]["count"], 3)
+
+        # An hour later the same posts are the previous window
+        self.now = START + 3600
+        later = self.tracker.top("1h")
+        self.assertEqual(later["posts"], 0)
+        self.assertEqual(later["previous_posts"], 4)
+        # Two hours later they are forgotten
+        self.now = START + 2 * 3600
+        self.assertEqual(self.tracker.top("1h")["previous_posts"], 0)
+
+    def test_rising_sorts_by_growth_over_the_previous_window(self):
+        self.tracker.add_posts([post(START - 4000)] * 5)
+        self.tracker.add_posts([post(START - 60)] * 5 + [post(START - 60, "power", "Trichy", "Power cut again")] * 3)
+
+        by_count = self.tracker.top("1h")["issues"]
+        rising = self.tracker.top("1h", sort="rising")["issues"]
+
+        self.assertEqual(by_count[0]["category"], "water")
+        self.assertEqual((by_count[0]["previous"], by_count[0]["change"]), (5, 0))
+        self.assertEqual((rising[0]["category"], rising[0]["change"]), ("power", 3))
+
+    def test_results_are_cached_until_new_posts_arrive(self):
+        self.tracker.add_posts([post(START - 60)])
+        first = self.tracker.top("1h")
+        self.assertIs(self.tracker.top("1h"), first)
+
+        self.tracker.add_posts([post(START - 30)])
+        self.assertEqual(self.tracker.top("1h")["posts"], 2)
+
+
+class TrendingEndpointTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.original_db_manager = main.db_manager
+        main.db_manager = DatabaseManager(str(Path(self.temp_dir.name) / "citypulse-test.db"))
+
+    def tearDown(self):
+        main.db_manager = self.original_db_manager
+        self.temp_dir.cleanup()
+
+    def test_stored_and_newly_ingested_posts_are_trending(self):
+        now = datetime.now()
+        stored = [
+            {**post(0), "id": f"stored-{index}", "platform": "Twitter", "sentiment": "negative",
+             "latitude": None, "longitude": None, "timestamp": (now - timedelta(minutes=10)).isoformat()}
+            for index in range(2)
+        ]
+
+        async def run():
+            await main.db_manager.store_posts(stored)
+            await main.load_trending()
+            main.live_bus.publish("aggregates", [{**stored[0], "id": "new-1", "timestamp": now.isoformat()}])
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                trending = await client.get("/trending", params={"window": "1h", "limit": 5})
+                invalid = await client.get("/trending", params={"window": "5m"})
+            return trending, invalid
+
+        trending, invalid = asyncio.run(run())
+
+        self.assertEqual(trending.status_code, 200)
+        top = trending.json()["issues"][0]
+        self.assertEqual((top["category"], top["location"], top["count"]), ("water", "Madurai", 3))
+        self.assertEqual(invalid.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
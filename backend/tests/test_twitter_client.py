@@ -0,0 +1,116 @@
+import asyncio
+import json
+import os
+import threading
+import time
+import unittest
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from analytics.time_range import stored_timestamp
+from social_media.twitter_client import TwitterClient
+
+LOCAL_0800_UTC = stored_timestamp(datetime(2026, 10, 19, 8, tzinfo=timezone.utc))
+
+
+class StubTwitterHandler(BaseHTTPRequestHandler):
+    """Serves /tweets/search/recent from the server's pages, keyed by next_token"""
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        query = {key: values[0] for key, values in parse_qs(urlparse(self.path).query).items()}
+        server.requests.append(query)
+        server.connections.add(self.client_address)
+
+        token = query.get("next_token", "")
+        status, body = server.pages.get((query.get("since_id"), token), (200, {"meta": {"result_count": 0}}))
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("x-rate-limit-limit", "450")
+        self.send_header("x-rate-limit-remaining", str(server.remaining))
+        self.send_header("x-rate-limit-reset", str(int(time.time()) + 900))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def tweet(tweet_id):
+    return {"id": str(tweet_id), "text": f"Chennai update {tweet_id}", "created_at": "2026-10-19T08:00:00.000Z"}
+
+
+class TwitterClientTests(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubTwitterHandler)
+        self.server.requests = []
+        self.server.connections = set()
+        self.server.remaining = 400
+        self.server.pages = {
+            (None, ""): (200, {"data": [tweet(30), tweet(29)], "meta": {"newest_id": "30", "next_token": "p2"}}),
+            (None, "p2"): (200, {"data": [tweet(28), tweet(27)], "meta": {"next_token": "p3"}}),
+            (None, "p3"): (200, {"data": [tweet(26)], "meta": {}}),
+        }
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        with mock.patch.dict(os.environ, {"TWITTER_BEARER_TOKEN": "test-token", "TWITTER_MAX_PAGES": "10"}):
+            self.client = TwitterClient(base_url=base_url)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def poll(self, times=1):
+        async def run():
+            results = [await self.client.fetch_recent_posts() for _ in range(times)]
+            await self.client.aclose()
+            return results
+        return asyncio.run(run())
+
+    def test_follows_pagination_and_advances_since_id_once(self):
+        self.server.pages[("30", "")] = (200, {"data": [tweet(31)], "meta": {"newest_id": "31"}})
+
+        first, second = self.poll(times=2)
+
+        self.assertEqual([post["id"] for post in first], ["30", "29", "28", "27", "26"])
+        self.assertEqual([post["id"] for post in second], ["31"])
+        self.assertEqual(self.client.last_id, "31")
+        self.assertEqual(first[0]["timestamp"], LOCAL_0800_UTC)
+        self.assertTrue(all(request["max_results"] == "100" for request in self.server.requests))
+        self.assertEqual(len(self.server.connections), 1)
+
+    def test_page_cap_resumes_from_next_token_without_skipping(self):
+        self.client.max_pages = 2
+
+        first, second = self.poll(times=2)
+
+        self.assertEqual([post["id"] for post in first], ["30", "29", "28", "27"])
+        self.assertEqual(self.client.last_id, "30")
+        self.assertEqual([post["id"] for post in second], ["26"])
+        self.assertNotIn("since_id", self.server.requests[2])
+        self.assertEqual(self.server.requests[2]["next_token"], "p3")
+
+    def test_rate_limit_stops_polling_until_reset(self):
+        self.server.remaining = 0
+
+        first, second = self.poll(times=2)
+
+        self.assertEqual(len(first), 2)
+        self.assertEqual(second, [])
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertTrue(self.client.last_fetch_saturated)
+        self.assertEqual(self.client.rate_limit_status()["remaining"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
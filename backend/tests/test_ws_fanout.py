@@ -0,0 +1,72 @@
+import asyncio
+import os
+import time
+import unittest
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.ws_fanout import LoadSource, ProcessSampler, histogram_percentiles
+
+
+class LoadSourceTests(unittest.TestCase):
+    def test_waits_for_clients_then_produces_the_rate_for_the_duration(self):
+        clock = {"now": 0.0}
+        ready = {"value": False}
+        source = LoadSource(rate=20, duration=2, ready=lambda: ready["value"], clock=lambda: clock["now"])
+
+        def poll(at):
+            clock["now"] = at
+            return asyncio.run(source.fetch_recent_posts())
+
+        self.assertEqual(poll(5.0), [])
+        ready["value"] = True
+        self.assertEqual(poll(10.0), [])
+        first = poll(10.5)
+        # A late poll catches up instead of lowering the rate
+        second = poll(12.7)
+        self.assertEqual(poll(14.0), [])
+
+        self.assertEqual(len(first), 10)
+        self.assertEqual(len(second), 30)
+        self.assertEqual([post["id"] for post in first + second], [f"load-{seq}" for seq in range(40)])
+        self.assertEqual(source.state(), {"started": True, "finished": True, "generated": 40})
+
+    def test_starts_without_every_client_after_the_timeout(self):
+        clock = {"now": 0.0}
+        source = LoadSource(rate=10, duration=1, ready=lambda: False, start_timeout=30, clock=lambda: clock["now"])
+        clock["now"] = 31.0
+        asyncio.run(source.fetch_recent_posts())
+
+        self.assertTrue(source.state()["started"])
+
+
+class ReportTests(unittest.TestCase):
+    def test_percentiles_from_millisecond_buckets(self):
+        histogram = {5: 90, 40: 9, 900: 1}
+
+        summary = histogram_percentiles(histogram)
+
+        self.assertEqual(summary["p50"], 5)
+        self.assertEqual(summary["p99"], 40)
+        self.assertEqual(summary["max"], 900)
+        self.assertEqual(summary["mean"], 17.1)
+        self.assertIsNone(histogram_percentiles({}))
+
+    @unittest.skipUnless(Path("/proc/self/stat").exists(), "needs /proc")
+    def test_process_sampler_reads_cpu_and_memory(self):
+        sampler = ProcessSampler(os.getpid(), interval=0.02)
+        sampler.start()
+        deadline = time.perf_counter() + 0.2
+        while time.perf_counter() < deadline:
+            pass
+        sampler.stop()
+
+        summary = sampler.summary()
+        self.assertGreater(summary["cpu_seconds"], 0)
+        self.assertGreater(summary["rss_mib_max"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import asyncio
+import json
+import unittest
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from realtime import framing
+from realtime.broadcaster import Broadcaster
+
+POSTS = [
+    {"id": "1", "platform": "Twitter", "content": "Power cut in Salem", "sentiment": "negative"},
+    {"id": "2", "platform": "Facebook", "content": "New park", "sentiment": "positive", "location": "Madurai"},
+]
+
+
+class TextSocket:
+    def __init__(self):
+        self.frames = []
+
+    async def send_json(self, message):
+        self.frames.append(("json", message))
+
+    async def send_text(self, text):
+        self.frames.append(("text", text))
+
+    async def send_bytes(self, data):
+        self.frames.append(("bytes", data))
+
+    async def close(self, code=1000):
+        pass
+
+
+class FramingTests(unittest.TestCase):
+    def test_compact_frames_round_trip_and_are_smaller(self):
+        encode = framing.make_encoder("compact")
+        frame = encode(POSTS)
+
+        self.assertEqual(json.loads(frame)["fields"], ["id", "platform", "content", "sentiment", "location"])
+        self.assertEqual(framing.decode_frame(frame), [dict(post, location=post.get("location")) for post in POSTS])
+        self.assertLess(len(frame), len(json.dumps(POSTS)))
+        self.assertEqual(framing.decode_frame(encode({"type": "hello"})), {"type": "hello"})
+
+    def test_protocol_resolution(self):
+        self.assertEqual(framing.resolve_protocol(None), "json")
+        self.assertEqual(framing.resolve_protocol("msgpack"), "msgpack" if framing.msgpack else "compact")
+        self.assertIsNone(framing.make_encoder("json"))
+        with self.assertRaises(ValueError):
+            framing.resolve_protocol("xml")
+
+    def test_batches_within_window_go_out_as_one_frame(self):
+        async def run():
+            broadcaster = Broadcaster(queue_size=10)
+            socket = TextSocket()
+            client = await broadcaster.connect(socket)
+            client.configure("compact", 0.05)
+            broadcaster.publish([POSTS[0]])
+            await asyncio.sleep(0.01)
+            broadcaster.publish([POSTS[1]])
+            await asyncio.sleep(0.1)
+            await broadcaster.close()
+            return socket.frames
+
+        frames = asyncio.run(run())
+
+        self.assertEqual(len(frames), 1)
+        kind, frame = frames[0]
+        self.assertEqual(kind, "text")
+        self.assertEqual([post["id"] for post in framing.decode_frame(frame)], ["1", "2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import asyncio
+import unittest
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from realtime.broadcaster import Broadcaster
+from realtime.subscriptions import Subscription, SubscriptionIndex, post_priority
+
+POSTS = [
+    {"id": "1", "category": "water", "sentiment": "negative", "platform": "Twitter", "location": "Chennai"},
+    {"id": "2", "category": "parks", "sentiment": "positive", "platform": "Facebook", "location": "Chennai"},
+    {"id": "3", "category": "waste", "sentiment": "neutral", "platform": "Twitter", "location": "Madurai"},
+    {"id": "4", "category": "education", "sentiment": "neutral", "platform": "Citizen Portal", "location": "Salem"},
+]
+
+
+class RecordingSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send_json(self, message):
+        self.sent.append(message)
+
+    async def close(self, code=1000):
+        pass
+
+
+class SubscriptionTests(unittest.TestCase):
+    def test_priority_follows_message_queue_rules(self):
+        self.assertEqual([post_priority(post) for post in POSTS], ["high", "low", "normal", "low"])
+
+    def test_parse_accepts_lists_and_comma_separated_values(self):
+        subscription = Subscription.parse({"category": "Water, waste", "platform": ["Twitter"], "min_priority": "normal"})
+
+        self.assertEqual(subscription.to_dict(), {"category": ["waste", "water"], "platform": ["twitter"], "min_priority": "normal"})
+        self.assertEqual([post["id"] for post in POSTS if subscription.matches(post)], ["1", "3"])
+        with self.assertRaises(ValueError):
+            Subscription.parse({"min_priority": "urgent"})
+
+    def test_index_routing_matches_linear_filtering(self):
+        index = SubscriptionIndex()
+        subscriptions = {
+            "chennai": Subscription.parse({"location": "chennai"}),
+            "twitter-urgent": Subscription.parse({"platform": "twitter", "min_priority": "normal"}),
+            "salem-education": Subscription.parse({"location": "Salem", "category": "education"}),
+            "nothing": Subscription.parse({"category": "transportation"}),
+        }
+        for client, subscription in subscriptions.items():
+            index.subscribe(client, subscription)
+        index.subscribe("everything", Subscription())
+
+        routed = index.route(POSTS)
+
+        for client, subscription in subscriptions.items():
+            expected = [post["id"] for post in POSTS if subscription.matches(post)]
+            self.assertEqual([post["id"] for post in routed.get(client, [])], expected)
+        self.assertNotIn("everything", index)
+
+        index.unsubscribe("chennai")
+        self.assertNotIn("chennai", index.route(POSTS))
+
+    def test_broadcaster_sends_each_client_only_matching_posts(self):
+        async def run():
+            broadcaster = Broadcaster(queue_size=10)
+            scoped_socket, open_socket = RecordingSocket(), RecordingSocket()
+            scoped = await broadcaster.connect(scoped_socket)
+            await broadcaster.connect(open_socket)
+            broadcaster.subscribe(scoped, Subscription.parse({"location": "Madurai"}))
+
+            broadcaster.publish(POSTS)
+            broadcaster.publish([POSTS[1]])
+            await asyncio.sleep(0.01)
+            stats = broadcaster.stats()
+            await broadcaster.close()
+            return scoped_socket.sent, open_socket.sent, stats
+
+        scoped_sent, open_sent, stats = asyncio.run(run())
+
+        self.assertEqual(scoped_sent, [[POSTS[2]]])
+        self.assertEqual(open_sent, [POSTS, [POSTS[1]]])
+        self.assertEqual(stats["filtered_posts"], 4)
+        self.assertEqual(stats["subscribed_clients"], 1)
+
+    def test_scoped_messages_reach_only_clients_whose_filters_allow_them(self):
+        async def run():
+            broadcaster = Broadcaster(queue_size=10)
+            sockets = {name: RecordingSocket() for name in ("madurai", "chennai-water", "positive", "open")}
+            clients = {name: await broadcaster.connect(socket) for name, socket in sockets.items()}
+            broadcaster.subscribe(clients["madurai"], Subscription.parse({"location": "Madurai", "min_priority": "high"}))
+            broadcaster.subscribe(clients["chennai-water"], Subscription.parse({"location": "Chennai", "category": "water"}))
+            broadcaster.subscribe(clients["positive"], Subscription.parse({"sentiment": "positive"}))
+
+            alert = {"type": "alert", "alert": {"location": "Chennai", "category": "water"}}
+            broadcaster.publish(alert, scope={"location": "Chennai", "category": "water", "sentiment": "negative"})
+            await asyncio.sleep(0.01)
+            await broadcaster.close()
+            return {name: socket.sent for name, socket in sockets.items()}, alert
+
+        sent, alert = asyncio.run(run())
+
+        self.assertEqual(sent, {"madurai": [], "chennai-water": [alert], "positive": [], "open": [alert]})
+
+
+if __name__ == "__main__":
+    unittest.main()
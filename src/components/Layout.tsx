@@ -3,12 +3,16 @@ import React from 'react';
 import Navbar from './Navbar';
 import Sidebar from './Sidebar';
 import GrievanceForm from './GrievanceForm';
+import { useAggregateStream } from '@/hooks/use-aggregate-stream';
 
 interface LayoutProps {
   children: React.ReactNode;
 }
 
 const Layout: React.FC<LayoutProps> = ({ children }) => {
+  // Live totals for every page; views poll only while it is down
+  useAggregateStream();
+
   return (
     <div className="h-screen flex flex-col">
       <Navbar />
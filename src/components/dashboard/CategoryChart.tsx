@@ -5,12 +5,14 @@ import { PieChart, Pie, Cell, Tooltip, ResponsiveContainer, Legend } from 'recha
 import { categoryColors } from '@/data/mockData';
 import { fetchCategoryData } from '@/data/api';
 import { useQuery } from '@tanstack/react-query';
+import { useAggregatePolling } from '@/hooks/use-aggregate-stream';
 
 const CategoryChart: React.FC = () => {
+  const refetchInterval = useAggregatePolling(30000);
   const { data = [], isLoading } = useQuery({
     queryKey: ['socialCategories'],
     queryFn: fetchCategoryData,
-    refetchInterval: 30000,
+    refetchInterval,
   });
 
   const getColor = (category: string) => {
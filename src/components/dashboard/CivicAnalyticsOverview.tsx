@@ -14,6 +14,7 @@ import { useQuery } from '@tanstack/react-query';
 import { Card, CardContent, CardHeader, CardTitle } from '@/components/ui/card';
 import { Badge } from '@/components/ui/badge';
 import { fetchAnalyticsOverview } from '@/data/api';
+import { useAggregatePolling } from '@/hooks/use-aggregate-stream';
 import { sentimentColors } from '@/data/mockData';
 
 const sourceColors: Record<string, string> = {
@@ -25,10 +26,12 @@ const sourceColors: Record<string, string> = {
 const formatName = (value: string) => value.replace(/-/g, ' ');
 
 const CivicAnalyticsOverview: React.FC = () => {
+  // Totals come from /ws/aggregates while it is live, which also triggers refetches
+  const refetchInterval = useAggregatePolling(30000);
   const { data, isLoading } = useQuery({
     queryKey: ['analyticsOverview'],
     queryFn: fetchAnalyticsOverview,
-    refetchInterval: 30000,
+    refetchInterval,
   });
 
   const issueSourceKeys = useMemo(() => {
@@ -1,6 +1,7 @@
 import React, { useEffect, useState } from 'react';
 import { Card, CardContent, CardHeader, CardTitle } from '@/components/ui/card';
 import { Badge } from '@/components/ui/badge';
+import { useQueryClient } from '@tanstack/react-query';
 import { connectToWebSocket, SocialMediaPost } from '@/data/api';
 import { toast } from 'sonner';
 
@@ -13,6 +14,7 @@ type ConnectionStatus = 'connecting' | 'connected' | 'disconnected' | 'error';
 const LiveUpdates: React.FC<LiveUpdatesProps> = ({ onPostsReceived }) => {
   const [livePosts, setLivePosts] = useState<SocialMediaPost[]>([]);
   const [connectionStatus, setConnectionStatus] = useState<ConnectionStatus>('connecting');
+  const queryClient = useQueryClient();
 
   useEffect(() => {
     const connection = connectToWebSocket((data) => {
@@ -25,12 +27,16 @@ const LiveUpdates: React.FC<LiveUpdatesProps> = ({ onPostsReceived }) => {
         
         toast.info(`${data.length} new post(s) received`);
       }
-    }, setConnectionStatus);
+    }, setConnectionStatus, undefined, (alert) => {
+      toast.warning(`Spike: ${alert.category} in ${alert.location}`);
+      // The navbar lists recent spikes from /notifications
+      queryClient.invalidateQueries({ queryKey: ['notifications'] });
+    });
 
     return () => {
       connection.close();
     };
-  }, [onPostsReceived]);
+  }, [onPostsReceived, queryClient]);
 
   const getSentimentColor = (sentiment?: string) => {
     if (sentiment === 'positive') return 'bg-green-100 text-green-800';
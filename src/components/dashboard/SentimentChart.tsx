@@ -5,12 +5,14 @@ import { BarChart, Bar, XAxis, YAxis, Tooltip, ResponsiveContainer, Cell } from
 import { sentimentColors } from '@/data/mockData';
 import { fetchSentimentData } from '@/data/api';
 import { useQuery } from '@tanstack/react-query';
+import { useAggregatePolling } from '@/hooks/use-aggregate-stream';
 
 const SentimentChart: React.FC = () => {
+  const refetchInterval = useAggregatePolling(30000);
   const { data = [], isLoading } = useQuery({
     queryKey: ['sentimentBreakdown'],
     queryFn: fetchSentimentData,
-    refetchInterval: 30000,
+    refetchInterval,
   });
 
   return (
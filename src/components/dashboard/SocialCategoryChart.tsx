@@ -4,12 +4,14 @@ import { Card, CardContent, CardHeader, CardTitle } from '@/components/ui/card';
 import { PieChart, Pie, Cell, Tooltip, ResponsiveContainer, Legend } from 'recharts';
 import { fetchPlatformData } from '@/data/api';
 import { useQuery } from '@tanstack/react-query';
+import { useAggregatePolling } from '@/hooks/use-aggregate-stream';
 
 const SocialCategoryChart: React.FC = () => {
+  const refetchInterval = useAggregatePolling(30000);
   const { data, isLoading, error } = useQuery({
     queryKey: ['platformData'],
     queryFn: fetchPlatformData,
-    refetchInterval: 30000,
+    refetchInterval,
   });
 
   const chartData = data?.map((item) => ({
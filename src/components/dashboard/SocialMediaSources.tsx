@@ -2,14 +2,16 @@
 import React from 'react';
 import { Card, CardContent, CardHeader, CardTitle } from '@/components/ui/card';
 import { useQuery } from '@tanstack/react-query';
+import { useAggregatePolling } from '@/hooks/use-aggregate-stream';
 import { fetchPlatformData } from '@/data/api';
 import { mockSocialMediaPosts } from '@/data/socialMediaData';
 
 const SocialMediaSources: React.FC = () => {
+  const refetchInterval = useAggregatePolling(60000);
   const { data, isLoading, error } = useQuery({
     queryKey: ['platformData'],
     queryFn: fetchPlatformData,
-    refetchInterval: 60000, // Refetch every minute
+    refetchInterval,
   });
   
   const getCount = (platform: string) => data
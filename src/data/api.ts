@@ -16,6 +16,21 @@ export interface SocialMediaPost {
   category?: string;
 }
 
+export interface IngestionSourceStatus {
+  mode: 'live' | 'mock';
+  interval_seconds: number;
+  timeout_seconds: number;
+  running: boolean;
+  last_run_at: string | null;
+  last_duration_ms: number | null;
+  last_post_count: number;
+  total_fetched: number;
+  polls: number;
+  errors: number;
+  timeouts: number;
+  last_error: string | null;
+}
+
 export interface IngestionStatus {
   running: boolean;
   mode: string;
@@ -25,6 +40,8 @@ export interface IngestionStatus {
   total_processed: number;
   connected_clients: number;
   twitter_configured: boolean;
+  facebook_configured?: boolean;
+  sources?: Record<string, IngestionSourceStatus>;
 }
 
 export interface GrievanceSubmission {
@@ -389,17 +406,54 @@ export async function submitGrievance(grievance: GrievanceSubmission): Promise<S
   return await response.json();
 }
 
+/**
+ * Server-side filters for live updates; unset fields match every post
+ */
+export interface LiveSubscription {
+  category?: string[];
+  sentiment?: string[];
+  platform?: string[];
+  location?: string[];
+  min_priority?: 'low' | 'normal' | 'high';
+}
+
+/**
+ * A spike in negative posts for one location and category, pushed on /ws
+ */
+export interface SpikeAlert {
+  id: string;
+  location: string;
+  category: string;
+  count: number;
+  expected: number;
+  zscore: number;
+  bucket_start: string;
+  bucket_seconds: number;
+  detected_at: string;
+}
+
 /**
  * Connect to the WebSocket for real-time updates
  * @param onMessage Callback for handling incoming messages
+ * @param subscription Optional filters so only matching posts (and alerts) are pushed
+ * @param onAlert Callback for spike alerts
  * @returns WebSocket connection object with close method
  */
 export function connectToWebSocket(
   onMessage: (data: SocialMediaPost[]) => void,
-  onStatusChange?: (status: 'connecting' | 'connected' | 'disconnected' | 'error') => void
+  onStatusChange?: (status: 'connecting' | 'connected' | 'disconnected' | 'error') => void,
+  subscription?: LiveSubscription,
+  onAlert?: (alert: SpikeAlert) => void
 ) {
   try {
-    const ws = new WebSocket(`${API_BASE_URL.replace('http', 'ws')}/ws`);
+    const params = new URLSearchParams();
+    Object.entries(subscription ?? {}).forEach(([key, value]) => {
+      if (Array.isArray(value) ? value.length : value) {
+        params.set(key, Array.isArray(value) ? value.join(',') : value);
+      }
+    });
+    const query = params.toString();
+    const ws = new WebSocket(`${API_BASE_URL.replace('http', 'ws')}/ws${query ? `?${query}` : ''}`);
     onStatusChange?.('connecting');
     
     ws.onopen = () => {
@@ -410,6 +464,13 @@ export function connectToWebSocket(
     
     ws.onmessage = (event) => {
       const data = JSON.parse(event.data);
+      // Control messages (subscription acknowledgements, errors) carry a type
+      if (!Array.isArray(data) && data?.type) {
+        if (data.type === 'alert') {
+          onAlert?.(data.alert);
+        }
+        return;
+      }
       onMessage(Array.isArray(data) ? data : [data]);
     };
     
@@ -435,3 +496,154 @@ export function connectToWebSocket(
     };
   }
 }
+
+type CountMap = Record<string, number>;
+
+export interface LocationAggregate {
+  total?: number;
+  positive?: number;
+  neutral?: number;
+  negative?: number;
+  categories: CountMap;
+}
+
+/**
+ * Dashboard totals from /ws/aggregates. Deltas have the same shape with
+ * counter increments; trend hours carry their new absolute values.
+ */
+export interface AggregateSnapshot {
+  type: 'aggregate_snapshot' | 'aggregate_delta';
+  seq: number;
+  totals: CountMap;
+  sentiment: CountMap;
+  category: CountMap;
+  platform: CountMap;
+  location: Record<string, LocationAggregate>;
+  trend: Record<string, CountMap>;
+}
+
+const addCounts = (target: CountMap, delta: CountMap) => {
+  Object.entries(delta).forEach(([key, value]) => {
+    target[key] = (target[key] ?? 0) + value;
+  });
+};
+
+/**
+ * Keep live dashboard totals without polling the analytics endpoints: the
+ * server sends a snapshot on connect and one delta per ingestion batch.
+ * A gap in sequence numbers triggers a fresh snapshot.
+ */
+export function connectToAggregateStream(
+  onUpdate: (totals: AggregateSnapshot) => void,
+  onStatusChange?: (status: 'connecting' | 'connected' | 'disconnected' | 'error') => void,
+) {
+  let state: AggregateSnapshot | null = null;
+  try {
+    const ws = new WebSocket(`${API_BASE_URL.replace('http', 'ws')}/ws/aggregates`);
+    onStatusChange?.('connecting');
+
+    ws.onopen = () => {
+      onStatusChange?.('connected');
+    };
+
+    ws.onmessage = (event) => {
+      const message: AggregateSnapshot = JSON.parse(event.data);
+      if (message.type === 'aggregate_snapshot') {
+        state = message;
+      } else if (state && message.seq <= state.seq) {
+        // Already included in the snapshot
+        return;
+      } else if (!state || message.seq !== state.seq + 1) {
+        ws.send(JSON.stringify({ type: 'snapshot' }));
+        return;
+      } else {
+        addCounts(state.totals, message.totals);
+        addCounts(state.sentiment, message.sentiment);
+        addCounts(state.category, message.category);
+        addCounts(state.platform, message.platform);
+        Object.entries(message.location).forEach(([location, delta]) => {
+          const current = state!.location[location] ?? (state!.location[location] = { categories: {} });
+          const { categories, ...counts } = delta;
+          addCounts(current as unknown as CountMap, counts as CountMap);
+          addCounts(current.categories, categories);
+        });
+        Object.assign(state.trend, message.trend);
+        state = { ...state, seq: message.seq };
+      }
+      onUpdate(state);
+    };
+
+    ws.onerror = (error) => {
+      console.error('Aggregate stream error:', error);
+      onStatusChange?.('error');
+    };
+
+    ws.onclose = () => {
+      onStatusChange?.('disconnected');
+    };
+
+    return {
+      close: () => ws.close()
+    };
+  } catch (error) {
+    console.error('Error connecting to aggregate stream:', error);
+    onStatusChange?.('error');
+    return {
+      close: () => {}
+    };
+  }
+}
+
+const byName = (counts: CountMap) => Object.entries(counts).sort(([a], [b]) => a.localeCompare(b));
+
+/**
+ * The aggregate stream's totals in the shapes the analytics endpoints return,
+ * so views can show them without polling
+ */
+export function aggregatesToDashboardSummary(state: AggregateSnapshot, recentIngested = 0): DashboardSummary {
+  const total = state.totals.signals ?? 0;
+  const citizenReports = state.totals.citizen_reports ?? 0;
+  return {
+    total_signals: total,
+    citizen_reports: citizenReports,
+    social_posts: total - citizenReports,
+    negative_signals: state.totals.negative_signals ?? 0,
+    recent_ingested: recentIngested,
+  };
+}
+
+export function aggregatesToSentimentData(state: AggregateSnapshot) {
+  return (['positive', 'neutral', 'negative'] as const).map((name) => ({ name, value: state.sentiment[name] ?? 0 }));
+}
+
+export function aggregatesToCategoryData(state: AggregateSnapshot) {
+  return byName(state.category).map(([name, value]) => ({ name, value }));
+}
+
+export function aggregatesToPlatformData(state: AggregateSnapshot): PlatformData[] {
+  return byName(state.platform).map(([platform, count]) => ({ platform, count }));
+}
+
+/**
+ * The overview's totals and per-location rows from the stream. The
+ * category, source and issue cross-tabs are not streamed and are kept from
+ * the last /analytics-overview response.
+ */
+export function aggregatesToAnalyticsOverview(state: AggregateSnapshot, current: AnalyticsOverview): AnalyticsOverview {
+  const locationSentiment = Object.entries(state.location)
+    .map(([name, counts]) => ({
+      name,
+      positive: counts.positive ?? 0,
+      neutral: counts.neutral ?? 0,
+      negative: counts.negative ?? 0,
+      total: counts.total ?? 0,
+    }))
+    .sort((a, b) => b.total - a.total)
+    .slice(0, 10);
+  return {
+    ...current,
+    total_signals: state.totals.signals ?? 0,
+    sentiment_totals: aggregatesToSentimentData(state),
+    location_sentiment: locationSentiment,
+  };
+}
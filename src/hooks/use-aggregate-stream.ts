@@ -0,0 +1,113 @@
+import { useEffect, useSyncExternalStore } from 'react';
+import { useQueryClient } from '@tanstack/react-query';
+import {
+  aggregatesToAnalyticsOverview,
+  aggregatesToCategoryData,
+  aggregatesToDashboardSummary,
+  aggregatesToPlatformData,
+  aggregatesToSentimentData,
+  AnalyticsOverview,
+  connectToAggregateStream,
+  DashboardSummary,
+} from '@/data/api';
+
+const RECONNECT_DELAY_MS = 5000;
+
+// Views that need more than the stream carries (cross-tabs, map hotspots with
+// coordinates and recent posts) are refetched when the stream reports new
+// posts, at most this often, instead of polling while nothing changes
+const REFETCH_ON_CHANGE_MS: Record<string, number> = {
+  analyticsOverview: 30000,
+  geoAnalytics: 10000,
+};
+
+// Whether /ws/aggregates is currently feeding the query cache
+let streamLive = false;
+const listeners = new Set<() => void>();
+
+const setStreamLive = (live: boolean) => {
+  if (live === streamLive) return;
+  streamLive = live;
+  listeners.forEach((listener) => listener());
+};
+
+const subscribe = (listener: () => void) => {
+  listeners.add(listener);
+  return () => {
+    listeners.delete(listener);
+  };
+};
+
+/**
+ * Keep the summary, sentiment, category and platform queries up to date from
+ * /ws/aggregates: one server-side aggregation per ingestion batch instead of
+ * every dashboard recomputing them. The analytics overview takes its totals
+ * from the stream too; it and the map are refetched only when posts arrive.
+ * Reconnects after a drop; meanwhile the views fall back to polling (see
+ * useAggregatePolling). Mount once, in the layout.
+ */
+export function useAggregateStream() {
+  const queryClient = useQueryClient();
+
+  useEffect(() => {
+    let connection: { close: () => void } | null = null;
+    let retry: ReturnType<typeof setTimeout> | undefined;
+    let stopped = false;
+    const refetchedAt: Record<string, number> = {};
+    const pending: Record<string, ReturnType<typeof setTimeout>> = {};
+
+    const refetchOnChange = (key: string) => {
+      if (pending[key] !== undefined) return;
+      const wait = Math.max(0, (refetchedAt[key] ?? 0) + REFETCH_ON_CHANGE_MS[key] - Date.now());
+      pending[key] = setTimeout(() => {
+        delete pending[key];
+        refetchedAt[key] = Date.now();
+        queryClient.invalidateQueries({ queryKey: [key] });
+      }, wait);
+    };
+
+    const connect = () => {
+      connection = connectToAggregateStream(
+        (state) => {
+          setStreamLive(true);
+          queryClient.setQueryData<DashboardSummary | null>(['dashboardSummary'], (current) =>
+            aggregatesToDashboardSummary(state, current?.recent_ingested),
+          );
+          queryClient.setQueryData(['sentimentBreakdown'], aggregatesToSentimentData(state));
+          queryClient.setQueryData(['socialCategories'], aggregatesToCategoryData(state));
+          queryClient.setQueryData(['platformData'], aggregatesToPlatformData(state));
+          queryClient.setQueryData<AnalyticsOverview | null>(['analyticsOverview'], (current) =>
+            current ? aggregatesToAnalyticsOverview(state, current) : current,
+          );
+          Object.keys(REFETCH_ON_CHANGE_MS).forEach(refetchOnChange);
+        },
+        (status) => {
+          if (status === 'disconnected' || status === 'error') {
+            setStreamLive(false);
+            if (!stopped && retry === undefined) {
+              retry = setTimeout(() => {
+                retry = undefined;
+                connect();
+              }, RECONNECT_DELAY_MS);
+            }
+          }
+        },
+      );
+    };
+
+    connect();
+    return () => {
+      stopped = true;
+      clearTimeout(retry);
+      Object.values(pending).forEach(clearTimeout);
+      connection?.close();
+      setStreamLive(false);
+    };
+  }, [queryClient]);
+}
+
+/** The refetch interval for an aggregate-backed query: none while the stream is live */
+export function useAggregatePolling(intervalMs: number): number | false {
+  const live = useSyncExternalStore(subscribe, () => streamLive);
+  return live ? false : intervalMs;
+}
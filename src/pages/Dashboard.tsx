@@ -21,6 +21,7 @@ import LiveUpdates from '@/components/dashboard/LiveUpdates';
 import CivicAnalyticsOverview from '@/components/dashboard/CivicAnalyticsOverview';
 import { fetchDashboardSummary, fetchIngestionStatus, fetchSocialMediaPosts, SocialMediaPost } from '@/data/api';
 import { useQuery, useQueryClient } from '@tanstack/react-query';
+import { useAggregatePolling } from '@/hooks/use-aggregate-stream';
 import { toast } from 'sonner';
 import { useLocation, useSearchParams } from 'react-router-dom';
 
@@ -58,10 +59,12 @@ const Dashboard: React.FC = () => {
     refetchInterval: 5000,
   });
 
+  // Summary and chart totals arrive over /ws/aggregates (see Layout); polling is the fallback
+  const summaryRefetchInterval = useAggregatePolling(5000);
   const { data: summary } = useQuery({
     queryKey: ['dashboardSummary'],
     queryFn: fetchDashboardSummary,
-    refetchInterval: 5000,
+    refetchInterval: summaryRefetchInterval,
   });
   
   const socialMediaCount = socialMediaPosts?.length || 0;
@@ -85,15 +88,18 @@ const Dashboard: React.FC = () => {
     });
 
     queryClient.invalidateQueries({ queryKey: ['sentimentTrend'] });
-    queryClient.invalidateQueries({ queryKey: ['socialCategories'] });
-    queryClient.invalidateQueries({ queryKey: ['platformData'] });
-    queryClient.invalidateQueries({ queryKey: ['sentimentBreakdown'] });
-    queryClient.invalidateQueries({ queryKey: ['dashboardSummary'] });
+    // The aggregate stream already carries these totals while it is connected
+    if (summaryRefetchInterval !== false) {
+      queryClient.invalidateQueries({ queryKey: ['socialCategories'] });
+      queryClient.invalidateQueries({ queryKey: ['platformData'] });
+      queryClient.invalidateQueries({ queryKey: ['sentimentBreakdown'] });
+      queryClient.invalidateQueries({ queryKey: ['dashboardSummary'] });
+      queryClient.invalidateQueries({ queryKey: ['analyticsOverview'] });
+    }
     queryClient.invalidateQueries({ queryKey: ['ingestionStatus'] });
     queryClient.invalidateQueries({ queryKey: ['notifications'] });
     queryClient.invalidateQueries({ queryKey: ['messageQueue'] });
-    queryClient.invalidateQueries({ queryKey: ['analyticsOverview'] });
-  }, [postsQueryKey, queryClient, searchTerm, sourceFilter]);
+  }, [postsQueryKey, queryClient, searchTerm, sourceFilter, summaryRefetchInterval]);
   
   // Refresh all data
   const handleRefresh = () => {
@@ -8,6 +8,7 @@ import { Card, CardContent, CardHeader, CardTitle } from '@/components/ui/card';
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from '@/components/ui/select';
 import { categoryColors, sentimentColors } from '@/data/mockData';
 import { fetchGeoAnalytics, GeoHotspot } from '@/data/api';
+import { useAggregatePolling } from '@/hooks/use-aggregate-stream';
 
 const TN_BOUNDS = {
   minLatitude: 8.0,
@@ -37,10 +38,12 @@ const MapView: React.FC = () => {
   const [sentiment, setSentiment] = useState('all');
   const [platform, setPlatform] = useState('all');
 
+  // Refetched when /ws/aggregates reports new posts; polling only while it is down
+  const refetchInterval = useAggregatePolling(10000);
   const { data, isLoading, refetch, isFetching } = useQuery({
     queryKey: ['geoAnalytics', category, sentiment, platform],
     queryFn: () => fetchGeoAnalytics({ category, sentiment, platform, limit: 14 }),
-    refetchInterval: 10000,
+    refetchInterval,
   });
 
   const hotspots = useMemo(() => data?.hotspots || [], [data?.hotspots]);